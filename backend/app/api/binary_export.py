@@ -0,0 +1,139 @@
+"""Chunked binary export of cached embedding matrices.
+
+``.npy`` bodies are produced row-chunk by row-chunk straight from the cached
+array: the header and data layout are deterministic, so any byte range maps
+to a row range and HTTP ``Range`` requests can resume multi-GB downloads
+without building the whole file. Arrow IPC streams (``doc_id`` +
+fixed-size-list ``embedding`` columns) need the optional ``pyarrow``
+package and are not range-addressable.
+"""
+
+import hashlib
+import io
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import EXPORT_CHUNK_BYTES
+
+EXPORT_DTYPES = ("float32", "float16")
+
+
+def npy_header(shape: Tuple[int, ...], dtype: np.dtype) -> bytes:
+    buf = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buf, {
+        "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        "fortran_order": False,
+        "shape": shape,
+    })
+    return buf.getvalue()
+
+
+def export_etag(doc_ids: List[str], doc_hashes: Optional[List[str]], shape: Tuple[int, ...], dtype: str) -> str:
+    """Validator that changes whenever the exported bytes would."""
+    h = hashlib.sha1(f"{shape}|{dtype}".encode())
+    for part in (doc_hashes or doc_ids):
+        h.update(part.encode())
+        h.update(b"\0")
+    return f'"{h.hexdigest()[:32]}"'
+
+
+def parse_range(header: Optional[str], total: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into an inclusive ``(start, end)``.
+
+    Returns None for a missing or multi-range header (served as a full
+    response); raises ValueError for an unsatisfiable range.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else total - 1
+        else:
+            start, end = max(total - int(last), 0), total - 1
+    except ValueError:
+        return None
+    end = min(end, total - 1)
+    if start > end or start >= total:
+        raise ValueError(f"Range not satisfiable for {total} bytes")
+    return start, end
+
+
+class NpyExport:
+    """Byte-addressable ``.npy`` view of a 2-D matrix, converted per chunk."""
+
+    def __init__(self, matrix: np.ndarray, dtype: str = "float32"):
+        self.matrix = matrix
+        self.dtype = np.dtype(dtype)
+        self.header = npy_header(matrix.shape, self.dtype)
+        self.row_bytes = matrix.shape[1] * self.dtype.itemsize
+        self.size = len(self.header) + matrix.shape[0] * self.row_bytes
+
+    def iter_bytes(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield bytes ``start..end`` (inclusive) of the file."""
+        end = self.size - 1 if end is None else end
+        header_len = len(self.header)
+        if start < header_len:
+            yield self.header[start:min(end + 1, header_len)]
+            start = header_len
+        if end < start:
+            return
+
+        first_row = (start - header_len) // self.row_bytes
+        last_row = (end - header_len) // self.row_bytes
+        chunk_rows = max(1, EXPORT_CHUNK_BYTES // self.row_bytes)
+        for r0 in range(first_row, last_row + 1, chunk_rows):
+            r1 = min(r0 + chunk_rows, last_row + 1)
+            data = self.matrix[r0:r1].astype(self.dtype, copy=False).tobytes()
+            offset = header_len + r0 * self.row_bytes
+            lo = max(start - offset, 0)
+            hi = min(end + 1 - offset, len(data))
+            yield data[lo:hi]
+
+
+def iter_arrow_stream(matrix: np.ndarray, doc_ids: List[str], dtype: str = "float32",
+                      metadata: Optional[dict] = None) -> Iterator[bytes]:
+    """Yield an Arrow IPC stream, one record batch per chunk of rows."""
+    import pyarrow as pa
+
+    np_dtype = np.dtype(dtype)
+    dim = matrix.shape[1]
+    value_type = pa.float16() if np_dtype == np.float16 else pa.float32()
+    schema = pa.schema(
+        [("doc_id", pa.string()), ("embedding", pa.list_(value_type, dim))],
+        metadata={k: str(v) for k, v in (metadata or {}).items()},
+    )
+
+    class _Sink:
+        def __init__(self):
+            self.parts: List[bytes] = []
+            self.closed = False
+
+        def write(self, data) -> int:
+            self.parts.append(bytes(data))
+            return len(data)
+
+        def flush(self):
+            pass
+
+        def drain(self) -> bytes:
+            out, self.parts = b"".join(self.parts), []
+            return out
+
+    sink = _Sink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    yield sink.drain()
+    chunk_rows = max(1, EXPORT_CHUNK_BYTES // (dim * np_dtype.itemsize))
+    for r0 in range(0, matrix.shape[0], chunk_rows):
+        block = matrix[r0:r0 + chunk_rows].astype(np_dtype, copy=False)
+        values = pa.array(np.ascontiguousarray(block).ravel(), type=value_type)
+        batch = pa.record_batch(
+            [pa.array(doc_ids[r0:r0 + chunk_rows], pa.string()), pa.FixedSizeListArray.from_arrays(values, dim)],
+            schema=schema,
+        )
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
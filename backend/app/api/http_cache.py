@@ -0,0 +1,93 @@
+"""Serialize-once response cache for immutable (completed-run) payloads.
+
+Bodies are encoded with orjson (falling back to the stdlib encoder), kept as
+bytes alongside a gzip copy and a content ETag, and served with
+``If-None-Match`` → 304 handling. Entries live until their run is deleted.
+"""
+
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+_GZIP_MIN_BYTES = 1024
+
+
+def encode_json(payload: Any) -> bytes:
+    if isinstance(payload, BaseModel):
+        return payload.model_dump_json().encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(",", ":"), default=float).encode("utf-8")
+
+
+@dataclass
+class CachedBody:
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "CachedBody":
+        body = encode_json(payload)
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= _GZIP_MIN_BYTES else b""
+        return cls(body=body, gzipped=gzipped, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+
+    def respond(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "private, max-age=0, must-revalidate", "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match.strip() == "*" or self.etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        if self.gzipped and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=self.gzipped, media_type="application/json", headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Encoded responses keyed by run id and a per-endpoint key."""
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[Tuple, CachedBody]] = {}
+        self._lock = Lock()
+
+    def get(self, run_id: str, key: Tuple) -> CachedBody | None:
+        with self._lock:
+            return self._entries.get(run_id, {}).get(key)
+
+    def put(self, run_id: str, key: Tuple, entry: CachedBody) -> CachedBody:
+        with self._lock:
+            self._entries.setdefault(run_id, {})[key] = entry
+        return entry
+
+    def invalidate(self, run_id: str):
+        with self._lock:
+            self._entries.pop(run_id, None)
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(len(e.body) + len(e.gzipped) for run in self._entries.values() for e in run.values())
+
+
+response_cache = ResponseCache()
+
+
+async def cached_json(request: Request, run_id: str, key: Tuple,
+                      produce: Callable[[], Awaitable[Any]]) -> Response:
+    """Serve ``produce()``'s payload for a completed run, encoding it only on first use."""
+    entry = response_cache.get(run_id, key)
+    if entry is None:
+        payload = await produce()
+        entry = response_cache.put(run_id, key, CachedBody.from_payload(payload))
+    return entry.respond(request)
@@ -1,13 +1,23 @@
 """Benchmark run/status/cancel routes."""
 
 import uuid
+import asyncio
 from fastapi import APIRouter, HTTPException
 
 from app.models.schemas import (
-    BenchmarkRequest, BenchmarkRunResponse, BenchmarkProgress, BenchmarkStatus,
+    BenchmarkRequest, BenchmarkRunResponse, BenchmarkProgress, BenchmarkStatus, SweepRequest,
+    ScalingRequest, LoadTestMode,
 )
-from app.benchmark.runner import start_benchmark, get_run, cancel_benchmark
+from app.benchmark.runner import (
+    start_benchmark, get_run, cancel_benchmark, resume_benchmark, is_stale, list_runs,
+)
+from app.benchmark.sweep import start_sweep
+from app.benchmark.scaling import start_scaling
 from app.datasets.loader import get_dataset_raw
+from app.benchmark.distributed import worker_health
+from app.datasets.chunking import chunk_window
+from app.evaluation.ir_metrics import query_metric
+from app.config import WORKER_URLS, MODEL_REGISTRY
 
 router = APIRouter()
 
@@ -19,6 +29,30 @@ async def run_benchmark(request: BenchmarkRequest):
     if not raw:
         raise HTTPException(status_code=404, detail=f"Dataset '{request.dataset_id}' not found")
 
+    if request.early_stopping:
+        try:
+            query_metric(request.early_stopping.metric, [], set(), {})
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Unknown early-stopping metric '{request.early_stopping.metric}'")
+
+    if request.load_test and request.load_test.mode == LoadTestMode.closed_loop:
+        if any(not float(level).is_integer() for level in request.load_test.levels):
+            raise HTTPException(status_code=400, detail="Closed-loop load-test levels are worker counts and must be integers")
+
+    if request.distributed and not WORKER_URLS:
+        raise HTTPException(status_code=400, detail="Distributed mode needs WORKER_URLS to be configured")
+
+    if request.chunking:
+        if request.distributed:
+            raise HTTPException(status_code=400, detail="Chunking is not supported with distributed embedding")
+        for model_id in request.model_ids:
+            window = chunk_window(request.chunking.max_tokens, MODEL_REGISTRY.get(model_id, {}).get("max_tokens", 512))
+            if request.chunking.overlap_tokens >= window:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"overlap_tokens must be smaller than the {window}-token window of {model_id}",
+                )
+
     run_id = str(uuid.uuid4())[:8]
 
     start_benchmark(
@@ -30,6 +64,14 @@ async def run_benchmark(request: BenchmarkRequest):
         top_k_values=request.top_k_values,
         similarity_metric=request.similarity_metric.value,
         normalize=request.normalize_embeddings,
+        load_test=request.load_test.model_dump(mode="json") if request.load_test else None,
+        profile=request.profile,
+        early_stopping=request.early_stopping.model_dump() if request.early_stopping else None,
+        force=request.force,
+        autotune_batch_size=request.autotune_batch_size,
+        distributed=request.distributed,
+        chunking=request.chunking.model_dump(mode="json") if request.chunking else None,
+        trace_allocations=request.trace_allocations,
     )
 
     return BenchmarkRunResponse(
@@ -39,6 +81,69 @@ async def run_benchmark(request: BenchmarkRequest):
     )
 
 
+@router.post("/benchmark/sweep", response_model=BenchmarkRunResponse)
+async def run_sweep(request: SweepRequest):
+    """Start a metric × normalize × index-type sweep; results at /results/{run_id}/sweep."""
+    raw = get_dataset_raw(request.dataset_id)
+    if not raw:
+        raise HTTPException(status_code=404, detail=f"Dataset '{request.dataset_id}' not found")
+
+    run_id = str(uuid.uuid4())[:8]
+    start_sweep(
+        run_id=run_id,
+        dataset_id=request.dataset_id,
+        documents=raw["documents"],
+        queries=raw["queries"],
+        model_ids=request.model_ids,
+        top_k_values=request.top_k_values,
+        metrics=[m.value for m in request.similarity_metrics],
+        normalize_options=request.normalize_options,
+        index_types=[t.value for t in request.index_types],
+    )
+
+    n_configs = len(request.similarity_metrics) * len(request.normalize_options) * len(request.index_types)
+    return BenchmarkRunResponse(
+        run_id=run_id,
+        status=BenchmarkStatus.running,
+        message=f"Sweep started: {len(request.model_ids)} models x {n_configs} configurations",
+    )
+
+
+@router.post("/benchmark/scaling", response_model=BenchmarkRunResponse)
+async def run_scaling(request: ScalingRequest):
+    """Start a corpus-scaling study; results at /results/{run_id}/scaling."""
+    raw = get_dataset_raw(request.dataset_id)
+    if not raw:
+        raise HTTPException(status_code=404, detail=f"Dataset '{request.dataset_id}' not found")
+    distractor_source = None
+    if request.distractor_dataset_id:
+        distractor_source = get_dataset_raw(request.distractor_dataset_id)
+        if not distractor_source:
+            raise HTTPException(status_code=404, detail=f"Dataset '{request.distractor_dataset_id}' not found")
+
+    run_id = str(uuid.uuid4())[:8]
+    start_scaling(
+        run_id=run_id,
+        dataset_id=request.dataset_id,
+        documents=raw["documents"],
+        queries=raw["queries"],
+        model_ids=request.model_ids,
+        corpus_sizes=request.corpus_sizes,
+        index_types=[t.value for t in request.index_types],
+        similarity_metric=request.similarity_metric.value,
+        normalize=request.normalize_embeddings,
+        top_k_values=request.top_k_values,
+        distractor_source=distractor_source,
+        seed=request.seed,
+    )
+
+    return BenchmarkRunResponse(
+        run_id=run_id,
+        status=BenchmarkStatus.running,
+        message=f"Scaling run started: {len(request.model_ids)} models x {len(request.corpus_sizes)} sizes",
+    )
+
+
 @router.get("/benchmark/status/{run_id}", response_model=BenchmarkProgress)
 async def benchmark_status(run_id: str):
     """Get benchmark progress."""
@@ -50,6 +155,7 @@ async def benchmark_status(run_id: str):
         run_id=run["run_id"],
         status=run["status"],
         current_model=run.get("current_model"),
+        current_phase=run.get("current_phase"),
         models_completed=run.get("models_completed", 0),
         total_models=run.get("total_models", 0),
         documents_embedded=run.get("documents_embedded", 0),
@@ -58,6 +164,7 @@ async def benchmark_status(run_id: str):
         total_queries=run.get("total_queries", 0),
         elapsed_seconds=round(run.get("elapsed_seconds", 0), 1),
         eta_seconds=round(run["eta_seconds"], 1) if run.get("eta_seconds") else None,
+        stale=is_stale(run),
     )
 
 
@@ -68,3 +175,35 @@ async def cancel_run(run_id: str):
     if not success:
         raise HTTPException(status_code=400, detail="Cannot cancel — run not found or not running")
     return {"message": "Benchmark cancelled", "run_id": run_id}
+
+
+@router.post("/benchmark/resume/{run_id}", response_model=BenchmarkRunResponse)
+async def resume_run(run_id: str):
+    """Resume an interrupted, failed, cancelled or stale run from its checkpoint."""
+    if not resume_benchmark(run_id):
+        raise HTTPException(status_code=400, detail="Cannot resume — no checkpoint, already completed, or still running")
+    run = get_run(run_id)
+    return BenchmarkRunResponse(
+        run_id=run_id,
+        status=BenchmarkStatus.running,
+        message=f"Resumed with {run['models_completed']}/{run['total_models']} models already complete",
+    )
+
+
+@router.get("/benchmark/stale")
+async def stale_runs():
+    """Runs that claim to be running but whose worker died or stopped making progress,
+    plus runs interrupted by a restart."""
+    return {
+        "runs": [
+            {"run_id": run["run_id"], "status": run["status"], "stale": is_stale(run)}
+            for run in list_runs()
+            if is_stale(run) or run["status"] == BenchmarkStatus.interrupted
+        ]
+    }
+
+
+@router.get("/benchmark/workers")
+async def list_workers():
+    """Health of the configured embedding workers."""
+    return await asyncio.to_thread(worker_health)
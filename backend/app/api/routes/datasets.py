@@ -4,8 +4,10 @@ from typing import List
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from app.models.schemas import DatasetInfo, DatasetFull
-from app.datasets.loader import list_datasets, get_dataset, add_uploaded_dataset
+from app.models.schemas import DatasetInfo, DatasetFull, DatasetUpdateRequest, DatasetVersionInfo
+from app.datasets.loader import (
+    list_datasets, get_dataset, add_uploaded_dataset, update_dataset, list_dataset_versions,
+)
 from app.datasets.builder import build_dataset
 
 
@@ -66,3 +68,32 @@ async def build_custom_dataset(request: BuildDatasetRequest):
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.patch("/datasets/{dataset_id}", response_model=DatasetVersionInfo)
+async def update_dataset_version(dataset_id: str, request: DatasetUpdateRequest):
+    """Create a new dataset version by upserting/removing documents.
+
+    The next benchmark on this dataset embeds only the added or changed
+    documents and patches each model's cached index in place.
+    """
+    try:
+        entry = update_dataset(
+            dataset_id,
+            upsert_documents=[d.model_dump(exclude_none=True) for d in request.upsert_documents],
+            remove_doc_ids=request.remove_doc_ids,
+            queries=[q.model_dump(exclude_none=True) for q in request.queries] if request.queries is not None else None,
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Dataset '{dataset_id}' not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return DatasetVersionInfo(**entry)
+
+
+@router.get("/datasets/{dataset_id}/versions", response_model=List[DatasetVersionInfo])
+async def get_dataset_versions(dataset_id: str):
+    """Version history with per-version document diffs (uploaded datasets only)."""
+    if not get_dataset(dataset_id):
+        raise HTTPException(status_code=404, detail=f"Dataset '{dataset_id}' not found")
+    return [DatasetVersionInfo(**v) for v in list_dataset_versions(dataset_id)]
@@ -3,23 +3,48 @@
 import time
 import asyncio
 import numpy as np
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 
 from app.models.schemas import (
     LiveQueryRequest, LiveQueryResponse, LiveQueryModelResult, LiveQueryHit,
     SimilarityRequest, SimilarityResponse,
 )
-from app.benchmark.runner import get_run
-from app.benchmark.cache import embedding_cache
-from app.benchmark.retrieval import build_faiss_index, search_index
+from app.benchmark.runner import get_run, unit_cache_key
+from app.benchmark.cache import embedding_cache, query_embedding_cache
+from app.benchmark.microbatch import get_query_batcher, batcher_stats
 from app.embeddings.registry import get_embedder
+from app.datasets.loader import get_dataset_raw
+from app.api.binary_export import NpyExport, export_etag, iter_arrow_stream, parse_range
+from app.config import EXPLORE_MODEL_TIMEOUT_SEC
 
 router = APIRouter()
 
 
+async def _with_timeout(awaitable):
+    """Await a per-model operation, bounded by the per-model timeout.
+
+    Returns (result, error, latency_ms); exactly one of result/error is set.
+    """
+    t0 = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(awaitable, timeout=EXPLORE_MODEL_TIMEOUT_SEC)
+        return result, None, (time.perf_counter() - t0) * 1000
+    except asyncio.TimeoutError:
+        return None, f"timed out after {EXPLORE_MODEL_TIMEOUT_SEC}s", (time.perf_counter() - t0) * 1000
+    except Exception as e:
+        return None, str(e), (time.perf_counter() - t0) * 1000
+
+
 @router.post("/explore/query", response_model=LiveQueryResponse)
 async def live_query(request: LiveQueryRequest):
-    """Run a live query against cached embeddings from a benchmark run."""
+    """Run a live query against cached embeddings from a benchmark run.
+
+    Models are queried concurrently; a slow or failing provider yields a
+    result with ``error`` set instead of stalling the whole response.
+    Concurrent requests are coalesced per model by ``QueryBatcher``.
+    """
     run = get_run(request.run_id)
     if not run:
         raise HTTPException(status_code=404, detail=f"Run '{request.run_id}' not found")
@@ -27,31 +52,26 @@ async def live_query(request: LiveQueryRequest):
     dataset_id = run["dataset_id"]
     model_ids = run.get("model_ids", [])
     similarity_metric = run.get("similarity_metric", "cosine")
+    normalize = run.get("normalize", True)
 
-    results = []
-    for model_id in model_ids:
-        cached = embedding_cache.get_doc_embeddings(model_id, dataset_id)
-        if not cached:
-            continue
-
-        embeddings, doc_ids = cached
-        embedder = get_embedder(model_id)
+    raw_ds = get_dataset_raw(dataset_id)
+    doc_text_map = {d["doc_id"]: d["text"] for d in raw_ds["documents"]} if raw_ds else {}
 
-        t0 = time.perf_counter()
-        q_vec = await asyncio.to_thread(embedder.embed_queries, [request.query])
-        latency_ms = (time.perf_counter() - t0) * 1000
+    async def _query_model(model_id: str) -> Optional[LiveQueryModelResult]:
+        cache_key = unit_cache_key(run, model_id)
+        if not embedding_cache.has(model_id, cache_key):
+            return None
 
-        index_emb = embeddings.copy()
-        index = build_faiss_index(index_emb, similarity_metric)
-        hits_raw = search_index(index, q_vec, doc_ids, request.top_k, similarity_metric)
-
-        # Get document texts from dataset
-        from app.datasets.loader import get_dataset_raw
-        raw_ds = get_dataset_raw(dataset_id)
-        doc_text_map = {d["doc_id"]: d["text"] for d in raw_ds["documents"]} if raw_ds else {}
+        batcher = get_query_batcher(
+            model_id, cache_key, similarity_metric, normalize,
+            chunk_aggregation=run["chunking"]["aggregation"] if run.get("chunking") else None,
+        )
+        hits_raw, error, latency_ms = await _with_timeout(batcher.search(request.query, request.top_k))
+        if error:
+            return LiveQueryModelResult(model_id=model_id, hits=[], latency_ms=round(latency_ms, 2), error=error)
 
         hits = []
-        for rank, (did, score) in enumerate(hits_raw[0]):
+        for rank, (did, score) in enumerate(hits_raw):
             hits.append(LiveQueryHit(
                 doc_id=did,
                 text=doc_text_map.get(did, "")[:500],
@@ -59,12 +79,14 @@ async def live_query(request: LiveQueryRequest):
                 rank=rank + 1,
             ))
 
-        results.append(LiveQueryModelResult(
+        return LiveQueryModelResult(
             model_id=model_id,
             hits=hits,
             latency_ms=round(latency_ms, 2),
-        ))
+        )
 
+    model_results = await asyncio.gather(*(_query_model(m) for m in model_ids))
+    results = [r for r in model_results if r is not None]
     return LiveQueryResponse(query=request.query, results=results)
 
 
@@ -76,17 +98,112 @@ async def compute_similarity(request: SimilarityRequest):
         raise HTTPException(status_code=404, detail=f"Run '{request.run_id}' not found")
 
     model_ids = run.get("model_ids", [])
-    scores = {}
 
-    for model_id in model_ids:
-        try:
-            embedder = get_embedder(model_id)
-            vecs = await asyncio.to_thread(
-                embedder.embed_documents, [request.text_a, request.text_b]
-            )
-            cos_sim = float(np.dot(vecs[0], vecs[1]) / (np.linalg.norm(vecs[0]) * np.linalg.norm(vecs[1]) + 1e-10))
-            scores[model_id] = round(cos_sim, 4)
-        except Exception:
+    def _embed_pair(model_id: str) -> np.ndarray:
+        embedder = get_embedder(model_id)
+        vecs, _ = query_embedding_cache.embed(embedder, [request.text_a, request.text_b], "document")
+        return vecs
+
+    outcomes = await asyncio.gather(*(_with_timeout(asyncio.to_thread(_embed_pair, m)) for m in model_ids))
+
+    scores, errors, latencies = {}, {}, {}
+    for model_id, (vecs, error, latency_ms) in zip(model_ids, outcomes):
+        latencies[model_id] = round(latency_ms, 2)
+        if error:
             scores[model_id] = 0.0
+            errors[model_id] = error
+            continue
+        cos_sim = float(np.dot(vecs[0], vecs[1]) / (np.linalg.norm(vecs[0]) * np.linalg.norm(vecs[1]) + 1e-10))
+        scores[model_id] = round(cos_sim, 4)
 
-    return SimilarityResponse(text_a=request.text_a, text_b=request.text_b, scores=scores)
+    return SimilarityResponse(
+        text_a=request.text_a, text_b=request.text_b, scores=scores,
+        latency_ms=latencies, errors=errors,
+    )
+
+
+@router.get("/explore/cache")
+async def query_cache_stats():
+    """Hit-rate statistics for the shared query-embedding cache."""
+    return query_embedding_cache.stats()
+
+
+@router.get("/explore/batching")
+async def query_batching_stats():
+    """Coalescing statistics for the live-query micro-batchers."""
+    return batcher_stats()
+
+
+def _cached_matrix(model_id: str, dataset_id: str):
+    cached = embedding_cache.get_doc_embeddings(model_id, dataset_id)
+    if not cached:
+        raise HTTPException(status_code=404, detail=f"No cached embeddings for {model_id} on {dataset_id}")
+    return cached
+
+
+@router.api_route("/explore/embeddings/export", methods=["GET", "HEAD"])
+async def export_embeddings(
+    request: Request,
+    model_id: str,
+    dataset_id: str,
+    format: str = Query(default="npy", pattern="^(npy|arrow)$"),
+    dtype: str = Query(default="float32", pattern="^(float32|float16)$"),
+):
+    """Stream a cached document-embedding matrix as ``.npy`` or Arrow IPC.
+
+    ``.npy`` rows follow ``/explore/embeddings/doc_ids`` and support single
+    ``Range`` requests (with ``If-Range``) for resumable downloads. Arrow
+    streams carry ``doc_id`` and ``embedding`` columns and require pyarrow.
+    """
+    embeddings, doc_ids = _cached_matrix(model_id, dataset_id)
+    etag = export_etag(doc_ids, embedding_cache.get_doc_hashes(model_id, dataset_id), embeddings.shape, dtype)
+    name = f"{model_id.replace('/', '_')}_{dataset_id}_{dtype}"
+
+    if format == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Arrow export requires the pyarrow package")
+        headers = {"ETag": etag, "Content-Disposition": f'attachment; filename="{name}.arrows"'}
+        if request.method == "HEAD":
+            return Response(media_type="application/vnd.apache.arrow.stream", headers=headers)
+        metadata = {"model_id": model_id, "dataset_id": dataset_id}
+        return StreamingResponse(
+            iter_arrow_stream(embeddings, doc_ids, dtype, metadata),
+            media_type="application/vnd.apache.arrow.stream", headers=headers,
+        )
+
+    export = NpyExport(embeddings, dtype)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{name}.npy"',
+    }
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), export.size)
+        except ValueError as e:
+            raise HTTPException(status_code=416, detail=str(e), headers={"Content-Range": f"bytes */{export.size}"})
+
+    status = 200
+    start, end = 0, export.size - 1
+    if byte_range:
+        status = 206
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{export.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    if request.method == "HEAD":
+        return Response(status_code=status, media_type="application/octet-stream", headers=headers)
+    return StreamingResponse(
+        export.iter_bytes(start, end), status_code=status,
+        media_type="application/octet-stream", headers=headers,
+    )
+
+
+@router.get("/explore/embeddings/doc_ids")
+async def export_embedding_doc_ids(model_id: str, dataset_id: str):
+    """Document ids in the row order of the exported matrix."""
+    embeddings, doc_ids = _cached_matrix(model_id, dataset_id)
+    return {"model_id": model_id, "dataset_id": dataset_id, "shape": list(embeddings.shape), "doc_ids": doc_ids}
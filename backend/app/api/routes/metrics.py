@@ -0,0 +1,14 @@
+"""Prometheus text-exposition metrics route."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.monitoring.metrics import registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Scrape endpoint for Prometheus (text format 0.0.4)."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -4,8 +4,8 @@ import asyncio
 from typing import List
 from fastapi import APIRouter
 
-from app.models.schemas import ModelInfo, ValidateModelsRequest, ValidateModelsResponse
-from app.embeddings.registry import list_models, validate_model
+from app.models.schemas import ModelInfo, ModelStatus, ValidateModelsRequest, ValidateModelsResponse
+from app.embeddings.registry import list_models, validate_model, model_load_error
 
 router = APIRouter()
 
@@ -19,8 +19,10 @@ async def get_models():
 @router.post("/models/validate", response_model=ValidateModelsResponse)
 async def validate_models(request: ValidateModelsRequest):
     """Check accessibility of selected models."""
-    results = {}
+    results, errors = {}, {}
     for model_id in request.model_ids:
         status = await asyncio.to_thread(validate_model, model_id)
         results[model_id] = status
-    return ValidateModelsResponse(results=results)
+        if status == ModelStatus.error and model_load_error(model_id):
+            errors[model_id] = model_load_error(model_id)
+    return ValidateModelsResponse(results=results, errors=errors)
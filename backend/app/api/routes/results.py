@@ -4,41 +4,167 @@ import asyncio
 import json
 import hashlib
 from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response
 
-from app.models.schemas import BenchmarkResults, BenchmarkStatus
-from app.benchmark.runner import get_run
+from app.models.schemas import (
+    BenchmarkResults, BenchmarkStatus, SweepResults, ScalingResults, ModelAgreementResults,
+)
+from app.benchmark.runner import get_run, delete_run, unit_cache_key
+from app.api.http_cache import cached_json, response_cache
 from app.benchmark.cache import embedding_cache
+from app.benchmark.columnar import export_npz
+from app.datasets.chunking import pool_chunks
+from app.evaluation.profiling import PROFILE_SORT_KEYS, profile_to_text, profile_to_bytes
+from app.evaluation.statistics import compare_models, default_metrics
+from app.config import STATS_RESAMPLES, STATS_CONFIDENCE, AGREEMENT_MAX_ANCHORS
 from app.evaluation.embedding_quality import (
     compute_isotropy, compute_intra_cluster_similarity, compute_inter_cluster_separation,
+    knn_neighbors, list_agreement,
 )
 
 router = APIRouter()
 
 
+def _materialize_per_query(run: dict, model_results: list) -> list:
+    """Attach legacy per-query dicts expanded from the run's columnar store."""
+    stores = run.get("per_query_store", {})
+    expanded = []
+    for r in model_results:
+        store = stores.get(r.model_id)
+        if store is None:
+            expanded.append(r)
+            continue
+        records = store.to_records(run["query_texts"], run["doc_vocab"], run["relevance"])
+        expanded.append(r.model_copy(update={"per_query_results": records}))
+    return expanded
+
+
 @router.get("/results/{run_id}", response_model=BenchmarkResults)
-async def get_results(run_id: str):
-    """Get full benchmark results."""
+async def get_results(run_id: str, request: Request, per_query: bool = True):
+    """Get full benchmark results.
+
+    ``per_query=false`` omits per-query hits; use the ``per_query.npz``
+    export for a compact copy. Completed runs are served from the response
+    cache with ETag revalidation.
+    """
     run = get_run(run_id)
     if not run:
         raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
     if run["status"] not in (BenchmarkStatus.completed, BenchmarkStatus.running):
         raise HTTPException(status_code=400, detail=f"Run status: {run['status']}")
 
-    return BenchmarkResults(
-        run_id=run["run_id"],
-        dataset_id=run["dataset_id"],
-        model_results=run.get("model_results", []),
-        top_k_values=run.get("top_k_values", []),
-        similarity_metric=run.get("similarity_metric", "cosine"),
+    def _build() -> BenchmarkResults:
+        model_results = list(run.get("model_results", []))
+        if per_query:
+            model_results = _materialize_per_query(run, model_results)
+        return BenchmarkResults(
+            run_id=run["run_id"],
+            dataset_id=run["dataset_id"],
+            model_results=model_results,
+            top_k_values=run.get("top_k_values", []),
+            similarity_metric=run.get("similarity_metric", "cosine"),
+        )
+
+    if run["status"] != BenchmarkStatus.completed:
+        return _build()
+
+    async def _produce():
+        return await asyncio.to_thread(_build)
+
+    return await cached_json(request, run_id, ("results", per_query), _produce)
+
+
+@router.get("/results/{run_id}/sweep", response_model=SweepResults)
+async def get_sweep_results(run_id: str, request: Request):
+    """Per-configuration results of a sweep run (partial while running)."""
+    run = get_run(run_id)
+    if not run or run.get("kind") != "sweep":
+        raise HTTPException(status_code=404, detail=f"Sweep '{run_id}' not found")
+
+    def _build() -> SweepResults:
+        return SweepResults(
+            run_id=run_id,
+            dataset_id=run["dataset_id"],
+            top_k_values=run["top_k_values"],
+            embedding_time_sec=dict(run["embedding_time_sec"]),
+            configs=list(run["sweep_results"]),
+        )
+
+    if run["status"] != BenchmarkStatus.completed:
+        return _build()
+
+    async def _produce():
+        return _build()
+
+    return await cached_json(request, run_id, ("sweep",), _produce)
+
+
+@router.get("/results/{run_id}/scaling", response_model=ScalingResults)
+async def get_scaling_results(run_id: str, request: Request):
+    """Per (model, corpus size, index type) results of a scaling run (partial while running)."""
+    run = get_run(run_id)
+    if not run or run.get("kind") != "scaling":
+        raise HTTPException(status_code=404, detail=f"Scaling run '{run_id}' not found")
+
+    def _build() -> ScalingResults:
+        return ScalingResults(
+            run_id=run_id,
+            dataset_id=run["dataset_id"],
+            similarity_metric=run["similarity_metric"],
+            top_k_values=run["top_k_values"],
+            baseline=dict(run["scaling_baseline"]),
+            points=list(run["scaling_points"]),
+        )
+
+    if run["status"] != BenchmarkStatus.completed:
+        return _build()
+
+    async def _produce():
+        return _build()
+
+    return await cached_json(request, run_id, ("scaling",), _produce)
+
+
+@router.delete("/results/{run_id}")
+async def delete_results(run_id: str):
+    """Delete a finished run and drop its cached responses."""
+    run = get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
+    if run["status"] == BenchmarkStatus.running:
+        raise HTTPException(status_code=400, detail="Cancel the run before deleting it")
+    delete_run(run_id)
+    response_cache.invalidate(run_id)
+    return {"message": "Run deleted", "run_id": run_id}
+
+
+@router.get("/results/{run_id}/per_query.npz")
+async def export_per_query(run_id: str):
+    """Per-query results of every model as a compressed NumPy archive (see ``export_npz``)."""
+    run = get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
+    stores = run.get("per_query_store", {})
+    model_ids = [m for m in run.get("model_ids", []) if m in stores]
+    if not model_ids:
+        raise HTTPException(status_code=404, detail="No per-query results stored for this run")
+
+    content = await asyncio.to_thread(
+        export_npz, model_ids, stores, run["query_texts"], run["doc_vocab"], run.get("relevance"),
+    )
+    return Response(
+        content=content,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{run_id}_per_query.npz"'},
     )
 
 
 @router.get("/results/{run_id}/embeddings")
-async def get_embedding_quality(run_id: str):
+async def get_embedding_quality(run_id: str, request: Request):
     """Get embedding quality analysis for completed run."""
     run = get_run(run_id)
     if not run:
@@ -46,36 +172,41 @@ async def get_embedding_quality(run_id: str):
     if run["status"] != BenchmarkStatus.completed:
         raise HTTPException(status_code=400, detail="Benchmark not yet completed")
 
-    dataset_id = run["dataset_id"]
     model_ids = run.get("model_ids", [])
-
-    quality = {}
-    for model_id in model_ids:
-        cached = embedding_cache.get_doc_embeddings(model_id, dataset_id)
-        if not cached:
-            quality[model_id] = {"error": "embeddings not cached"}
-            continue
-
-        embeddings, doc_ids = cached
-        isotropy = await asyncio.to_thread(compute_isotropy, embeddings)
-        quality[model_id] = {
-            "isotropy": isotropy,
-            "embedding_dimension": embeddings.shape[1],
-            "num_embeddings": embeddings.shape[0],
-        }
-
-    return {"run_id": run_id, "quality": quality}
+    cache_keys = {m: unit_cache_key(run, m) for m in model_ids}
+
+    async def _produce():
+        quality = {}
+        for model_id in model_ids:
+            # Chunked runs are measured over their chunk vectors, the model's actual outputs
+            cached = embedding_cache.get_doc_embeddings(model_id, cache_keys[model_id])
+            if not cached:
+                quality[model_id] = {"error": "embeddings not cached"}
+                continue
+
+            embeddings, doc_ids = cached
+            isotropy = await asyncio.to_thread(compute_isotropy, embeddings)
+            quality[model_id] = {
+                "isotropy": isotropy,
+                "embedding_dimension": embeddings.shape[1],
+                "num_embeddings": embeddings.shape[0],
+            }
+        return {"run_id": run_id, "quality": quality}
+
+    # Partial answers are not cached: a rerun or resume may still fill the embedding cache
+    if not all(embedding_cache.has(m, cache_keys[m]) for m in model_ids):
+        return await _produce()
+    return await cached_json(request, run_id, ("embeddings",), _produce)
 
 
 @router.get("/results/{run_id}/umap")
-async def get_umap_coords(run_id: str, model_id: str, n_components: int = 2):
+async def get_umap_coords(run_id: str, model_id: str, request: Request, n_components: int = 2):
     """Get UMAP coordinates for embedding visualization."""
     run = get_run(run_id)
     if not run:
         raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
 
-    dataset_id = run["dataset_id"]
-    cached = embedding_cache.get_doc_embeddings(model_id, dataset_id)
+    cached = _doc_embeddings(run, model_id)
     if not cached:
         raise HTTPException(status_code=404, detail=f"No cached embeddings for {model_id}")
 
@@ -87,16 +218,184 @@ async def get_umap_coords(run_id: str, model_id: str, n_components: int = 2):
         coords = reducer.fit_transform(embeddings)
         return coords
 
-    coords = await asyncio.to_thread(_compute_umap)
+    async def _produce():
+        coords = await asyncio.to_thread(_compute_umap)
+
+        points = []
+        for i, doc_id in enumerate(doc_ids):
+            point = {"doc_id": doc_id, "x": round(float(coords[i][0]), 4), "y": round(float(coords[i][1]), 4)}
+            if n_components == 3:
+                point["z"] = round(float(coords[i][2]), 4)
+            points.append(point)
+
+        return {"model_id": model_id, "points": points}
+
+    if run["status"] != BenchmarkStatus.completed:
+        return await _produce()
+    return await cached_json(request, run_id, ("umap", model_id, n_components), _produce)
+
+
+def _doc_embeddings(run: dict, model_id: str) -> Optional[Tuple[np.ndarray, List[str]]]:
+    """A model's cached document vectors for a run; chunked runs are pooled back into documents."""
+    cached = embedding_cache.get_doc_embeddings(model_id, unit_cache_key(run, model_id))
+    if cached and run.get("chunking"):
+        return pool_chunks(*cached)
+    return cached
+
+
+def _model_agreement(run: dict, k: int, max_anchors: int) -> ModelAgreementResults:
+    """Pairwise neighbor-list agreement between the run's models.
 
-    points = []
-    for i, doc_id in enumerate(doc_ids):
-        point = {"doc_id": doc_id, "x": round(float(coords[i][0]), 4), "y": round(float(coords[i][1]), 4)}
-        if n_components == 3:
-            point["z"] = round(float(coords[i][2]), 4)
-        points.append(point)
+    Document neighborhoods come from FAISS top-k over each model's cached
+    embeddings, restricted to docs every model embedded and to a seeded sample
+    of at most ``max_anchors`` anchor docs. Retrieval agreement compares the
+    stored top-k lists of queries every model answered.
+    """
+    dataset_id = run["dataset_id"]
+    model_ids = list(run.get("model_ids", []))
+    n_models = len(model_ids)
+
+    cached = {m: _doc_embeddings(run, m) for m in model_ids}
+    with_docs = [m for m in model_ids if cached[m]]
+    common = None
+    for m in with_docs:
+        ids = set(cached[m][1])
+        common = ids if common is None else common & ids
+    common_ids = sorted(common or ())
+
+    neighbors: Dict[str, np.ndarray] = {}
+    anchors = np.arange(len(common_ids))
+    if len(common_ids) > k:
+        if len(anchors) > max_anchors:
+            anchors = np.sort(np.random.default_rng(42).choice(len(anchors), max_anchors, replace=False))
+        for m in with_docs:
+            embeddings, doc_ids = cached[m]
+            row_of = {d: i for i, d in enumerate(doc_ids)}
+            rows = np.fromiter((row_of[d] for d in common_ids), dtype=np.int64, count=len(common_ids))
+            neighbors[m] = knn_neighbors(embeddings[rows], k, anchors)
+
+    stores = run.get("per_query_store", {})
+    common_queries = None
+    for m in model_ids:
+        if m in stores:
+            q = stores[m].query_idx
+            common_queries = q if common_queries is None else np.intersect1d(common_queries, q)
+    retrieved: Dict[str, np.ndarray] = {}
+    for m in model_ids:
+        if m in stores and common_queries is not None and len(common_queries):
+            store = stores[m]
+            _, rows, _ = np.intersect1d(store.query_idx, common_queries, return_indices=True)
+            retrieved[m] = store.doc_idx[rows, :k]
+
+    def _matrices(lists: Dict[str, np.ndarray]):
+        overlap = [[None] * n_models for _ in range(n_models)]
+        rank_corr = [[None] * n_models for _ in range(n_models)]
+        for i, a in enumerate(model_ids):
+            for j in range(i, n_models):
+                b = model_ids[j]
+                if a in lists and b in lists:
+                    ov, rho = list_agreement(lists[a], lists[b])
+                    overlap[i][j] = overlap[j][i] = ov
+                    rank_corr[i][j] = rank_corr[j][i] = rho
+        return overlap, rank_corr
+
+    knn_overlap, knn_rank_corr = _matrices(neighbors)
+    retrieval_overlap, retrieval_rank_corr = _matrices(retrieved)
+    return ModelAgreementResults(
+        run_id=run["run_id"],
+        dataset_id=dataset_id,
+        model_ids=model_ids,
+        k=k,
+        num_documents=len(common_ids),
+        num_anchors=len(anchors) if neighbors else 0,
+        num_queries=len(common_queries) if retrieved else 0,
+        knn_overlap=knn_overlap,
+        knn_rank_correlation=knn_rank_corr,
+        retrieval_overlap=retrieval_overlap,
+        retrieval_rank_correlation=retrieval_rank_corr,
+    )
+
+
+@router.get("/results/{run_id}/agreement", response_model=ModelAgreementResults)
+async def get_model_agreement(
+    run_id: str,
+    request: Request,
+    k: int = Query(default=10, ge=1, le=100),
+    max_anchors: int = Query(default=AGREEMENT_MAX_ANCHORS, ge=1),
+):
+    """Model × model kNN-overlap and rank-correlation matrices for a completed run.
+
+    ``knn_*`` compare each document's k nearest neighbors across models;
+    ``retrieval_*`` compare the stored top-k retrieved lists per query
+    (capped at the stored list width).
+    """
+    run = get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
+    if run["status"] != BenchmarkStatus.completed:
+        raise HTTPException(status_code=400, detail="Benchmark not yet completed")
 
-    return {"model_id": model_id, "points": points}
+    async def _produce():
+        return await asyncio.to_thread(_model_agreement, run, k, max_anchors)
+
+    return await cached_json(request, run_id, ("agreement", k, max_anchors), _produce)
+
+
+def _run_statistics(run: dict, metrics: Optional[List[str]] = None,
+                    n_resamples: int = STATS_RESAMPLES, confidence: float = STATS_CONFIDENCE) -> dict:
+    per_query = run.get("per_query_metrics", {})
+    available = sorted(next(iter(per_query.values()), {}).keys())
+    chosen = metrics or default_metrics(available, run.get("top_k_values"))
+    stats = compare_models(per_query, chosen, n_resamples=n_resamples, confidence=confidence)
+    stats["available_metrics"] = available
+    return stats
+
+
+@router.get("/results/{run_id}/statistics")
+async def get_statistics(
+    run_id: str,
+    metrics: Optional[List[str]] = Query(default=None),
+    n_resamples: int = Query(default=STATS_RESAMPLES, ge=100, le=100000),
+    confidence: float = Query(default=STATS_CONFIDENCE, gt=0.5, lt=1.0),
+):
+    """Bootstrap confidence intervals and paired randomization tests between models.
+
+    Metric names follow the per-query keys (``mrr``, ``map``, ``ndcg@10``,
+    ``recall@5`` ...); pairwise p-values are Holm-adjusted per metric.
+    """
+    run = get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
+    if run["status"] != BenchmarkStatus.completed:
+        raise HTTPException(status_code=400, detail="Benchmark not yet completed")
+
+    stats = await asyncio.to_thread(_run_statistics, run, metrics, n_resamples, confidence)
+    return {"run_id": run_id, **stats}
+
+
+@router.get("/results/{run_id}/profile")
+async def get_profile(run_id: str, format: str = "text", sort: str = "cumulative", limit: int = 60):
+    """Download the cProfile captured for a run started with ``profile=true``.
+
+    ``format=text`` returns a pstats report; ``format=pstats`` returns a
+    ``.prof`` file for snakeviz or ``pstats.Stats``.
+    """
+    run = get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
+    profiler = run.get("profiler")
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="No profile captured (run still in progress or profile not requested)")
+    if sort not in PROFILE_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(PROFILE_SORT_KEYS)}")
+
+    if format == "pstats":
+        return Response(
+            content=profile_to_bytes(profiler),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{run_id}.prof"'},
+        )
+    return PlainTextResponse(content=profile_to_text(profiler, limit=limit, sort=sort))
 
 
 @router.post("/results/{run_id}/export")
@@ -128,8 +427,12 @@ async def export_report(run_id: str, format: str = "json"):
             "model_id": r.model_id,
             "ir_metrics": r.ir_metrics.model_dump(),
             "performance": r.performance.model_dump(),
+            "load_test": [lvl.model_dump(mode="json") for lvl in r.load_test] if r.load_test else None,
+            "stage_timings": {k: v.model_dump() for k, v in r.stage_timings.items()} if r.stage_timings else None,
         })
 
+    report_data["statistics"] = await asyncio.to_thread(_run_statistics, run)
+
     if format == "markdown":
         md = _build_markdown_report(report_data)
         return PlainTextResponse(content=md, media_type="text/markdown")
@@ -173,9 +476,59 @@ def _build_markdown_report(data: dict) -> str:
         p = m["performance"]
         lines.append(
             f"| {m['model_id']} | {p['embedding_latency_avg_ms']} | {p['embedding_latency_p95_ms']} | "
-            f"{p['query_latency_avg_ms']} | {p['throughput_docs_per_sec']}/s | "
+            f"{p['query_latency_avg_ms'] if p['query_latency_avg_ms'] is not None else '—'} | "
+            f"{p['throughput_docs_per_sec']}/s | "
             f"{p['embedding_dimension']} | {p['memory_usage_mb']} | ${p['api_cost_usd']} |"
         )
 
+    stats = data.get("statistics") or {}
+    if stats.get("metrics"):
+        lines += [
+            f"",
+            f"## Statistical Significance",
+            f"",
+            f"{stats['n_queries']} queries, {stats['n_resamples']} resamples, "
+            f"{stats['confidence']:.0%} bootstrap CIs; p-values from paired randomization tests (Holm-adjusted).",
+        ]
+        for metric, block in stats["metrics"].items():
+            lines += [
+                f"",
+                f"### {metric}",
+                f"",
+                f"| Model | Mean | CI |",
+                f"|-------|------|----|",
+            ]
+            for model_id, m in block["models"].items():
+                lines.append(f"| {model_id} | {m['mean']} | [{m['ci_low']}, {m['ci_high']}] |")
+            if block["pairwise"]:
+                lines += [
+                    f"",
+                    f"| Model A | Model B | Δ Mean | Δ CI | p (Holm) |",
+                    f"|---------|---------|--------|------|----------|",
+                ]
+                for p in block["pairwise"]:
+                    marker = " *" if p["significant"] else ""
+                    lines.append(
+                        f"| {p['model_a']} | {p['model_b']} | {p['mean_diff']} | "
+                        f"[{p['ci_low']}, {p['ci_high']}] | {p['p_value_holm']}{marker} |"
+                    )
+
+    load_tested = [m for m in data["models"] if m.get("load_test")]
+    if load_tested:
+        lines += [
+            f"",
+            f"## Load Test",
+            f"",
+            f"| Model | Mode | Level | QPS | P50 (ms) | P95 (ms) | P99 (ms) | Errors |",
+            f"|-------|------|-------|-----|----------|----------|----------|--------|",
+        ]
+        for m in load_tested:
+            for lvl in m["load_test"]:
+                lines.append(
+                    f"| {m['model_id']} | {lvl['mode']} | {lvl['level']} | {lvl['achieved_qps']} | "
+                    f"{lvl['latency_p50_ms']} | {lvl['latency_p95_ms']} | {lvl['latency_p99_ms']} | "
+                    f"{lvl['error_rate']:.1%} |"
+                )
+
     lines += ["", f"---", f"*Generated by Embedding Model Comparison*"]
     return "\n".join(lines)
@@ -0,0 +1,124 @@
+"""Batch-size auto-tuning — probe document throughput per (model, hardware) and persist the winner."""
+
+import os
+import json
+import time
+import random
+import platform
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+from app.embeddings.base import BaseEmbedder
+from app.benchmark.batching import sequential_batches, cap_batches_by_tokens
+from app.config import (
+    MODEL_REGISTRY, DATA_DIR, DEFAULT_BATCH_SIZE, AUTOTUNE_SAMPLE_SIZE, PROVIDER_BATCH_LIMITS,
+)
+
+_STORE_PATH = os.path.join(DATA_DIR, "batch_sizes.json")
+_store_lock = Lock()
+_MIN_CANDIDATE = 8
+
+
+def _provider(model_id: str) -> str:
+    return MODEL_REGISTRY.get(model_id, {}).get("provider", "local")
+
+
+def provider_limits(model_id: str) -> Dict[str, int]:
+    return PROVIDER_BATCH_LIMITS.get(_provider(model_id), {"max_items": 0, "max_tokens": 0})
+
+
+def hardware_key(model_id: str) -> str:
+    """Where throughput is decided: the remote API for hosted models, this machine for local ones."""
+    provider = _provider(model_id)
+    if provider != "local":
+        return f"api:{provider}"
+    key = f"{platform.machine()}-{os.cpu_count()}cpu"
+    try:
+        import torch
+        if torch.cuda.is_available():
+            key += f"-{torch.cuda.get_device_name(0)}"
+    except ImportError:
+        pass
+    return key
+
+
+def _load_store() -> Dict[str, dict]:
+    try:
+        with open(_STORE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_tuned(model_id: str) -> Optional[dict]:
+    """Persisted tuning entry for this model on this hardware, if any."""
+    with _store_lock:
+        return _load_store().get(f"{model_id}|{hardware_key(model_id)}")
+
+
+def batch_size_for(model_id: str) -> int:
+    tuned = get_tuned(model_id)
+    return tuned["batch_size"] if tuned else DEFAULT_BATCH_SIZE
+
+
+def candidate_batch_sizes(model_id: str, n_texts: int) -> List[int]:
+    """Powers of two from 8 up to the provider item limit, capped at the corpus size."""
+    max_items = provider_limits(model_id)["max_items"] or n_texts
+    ceiling = max(1, min(max_items, n_texts))
+    sizes, size = [], _MIN_CANDIDATE
+    while size < ceiling:
+        sizes.append(size)
+        size *= 2
+    sizes.append(ceiling)
+    return sizes
+
+
+def tune_batch_size(embedder: BaseEmbedder, texts: List[str], seed: int = 0,
+                    should_stop: Optional[Callable[[], bool]] = None) -> dict:
+    """Measure docs/sec at each candidate size on a sample of ``texts`` and persist the best.
+
+    Pass the full corpus: candidates are capped at the sample size, so the
+    winner is only persisted when the sample reaches AUTOTUNE_SAMPLE_SIZE
+    (a handful of changed documents must not pin every later run to a tiny
+    batch). Probing stops once throughput has fallen for two consecutive
+    sizes. Returns {"batch_size", "curve", "hardware", "tuned_at", "persisted"}.
+    """
+    model_id = embedder.model_id
+    sample = random.Random(seed).sample(texts, min(len(texts), AUTOTUNE_SAMPLE_SIZE))
+    max_tokens = provider_limits(model_id)["max_tokens"]
+
+    curve, best_size, best_rate, declines = [], DEFAULT_BATCH_SIZE, 0.0, 0
+    for size in candidate_batch_sizes(model_id, len(sample)):
+        if should_stop and should_stop():
+            break
+        batches = cap_batches_by_tokens(sequential_batches(sample, size), sample, max_tokens)
+        t0 = time.perf_counter()
+        for batch in batches:
+            embedder.embed_documents([sample[i] for i in batch])
+        rate = len(sample) / max(time.perf_counter() - t0, 1e-9)
+        curve.append({"batch_size": size, "docs_per_sec": round(rate, 2)})
+        if rate > best_rate:
+            best_size, best_rate, declines = size, rate, 0
+        else:
+            declines += 1
+            if declines >= 2:
+                break
+
+    entry = {
+        "batch_size": best_size,
+        "curve": curve,
+        "hardware": hardware_key(model_id),
+        "tuned_at": datetime.now(timezone.utc).isoformat(),
+    }
+    persist = bool(curve) and len(sample) >= AUTOTUNE_SAMPLE_SIZE
+    if persist:
+        with _store_lock:
+            store = _load_store()
+            store[f"{model_id}|{entry['hardware']}"] = entry
+            os.makedirs(DATA_DIR, exist_ok=True)
+            tmp = _STORE_PATH + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(store, f, indent=2)
+            os.replace(tmp, _STORE_PATH)
+    return {**entry, "persisted": persist}
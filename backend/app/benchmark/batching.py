@@ -0,0 +1,50 @@
+"""Length-aware batching — groups similar-length texts to minimize padding."""
+
+from typing import List
+
+import numpy as np
+
+from app.evaluation.performance import estimate_token_count
+
+
+def sequential_batches(texts: List[str], batch_size: int) -> List[List[int]]:
+    """Split text indices into batches in their original order."""
+    indices = list(range(len(texts)))
+    return [indices[i:i + batch_size] for i in range(0, len(indices), batch_size)]
+
+
+def length_sorted_batches(texts: List[str], batch_size: int) -> List[List[int]]:
+    """Split text indices into batches of similar token length.
+
+    Longest texts come first so memory pressure peaks on the first batch.
+    Callers scatter results back by index to restore the original order.
+    """
+    order = sorted(range(len(texts)), key=lambda i: estimate_token_count(texts[i]), reverse=True)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def cap_batches_by_tokens(batches: List[List[int]], texts: List[str], max_tokens: int) -> List[List[int]]:
+    """Split batches whose estimated token total exceeds ``max_tokens`` (0 disables)."""
+    if not max_tokens:
+        return batches
+    capped = []
+    for batch in batches:
+        current, tokens = [], 0
+        for i in batch:
+            n = estimate_token_count(texts[i])
+            if current and tokens + n > max_tokens:
+                capped.append(current)
+                current, tokens = [], 0
+            current.append(i)
+            tokens += n
+        if current:
+            capped.append(current)
+    return capped
+
+
+def scatter_batches(batches: List[List[int]], vectors: List[np.ndarray]) -> np.ndarray:
+    """Reassemble per-batch embeddings into the original text order."""
+    stacked = np.vstack(vectors)
+    out = np.empty_like(stacked)
+    out[np.concatenate(batches)] = stacked
+    return out
@@ -1,40 +1,234 @@
 """Embedding cache — avoids re-computing embeddings across runs."""
 
+import json
+import hashlib
 import numpy as np
-from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from app.config import QUERY_CACHE_SIZE, RESULT_CACHE_SIZE
+from app.embeddings.base import BaseEmbedder
+from app.benchmark.retrieval import IncrementalIndex
+from app.monitoring.metrics import registry, cache_lookups, Gauge
 
 
 class EmbeddingCache:
-    """In-memory cache keyed by (model_id, dataset_id)."""
+    """In-memory cache keyed by (model_id, dataset_id).
+
+    Alongside each matrix it keeps a content hash per document so a new
+    dataset version only needs its added or changed documents embedded.
+    """
 
     def __init__(self):
         self._doc_embeddings: Dict[Tuple[str, str], np.ndarray] = {}
         self._doc_ids: Dict[Tuple[str, str], list] = {}
+        self._doc_hashes: Dict[Tuple[str, str], list] = {}
 
     def get_doc_embeddings(self, model_id: str, dataset_id: str) -> Optional[Tuple[np.ndarray, list]]:
         key = (model_id, dataset_id)
         if key in self._doc_embeddings:
+            cache_lookups.inc(cache="documents", result="hit")
             return self._doc_embeddings[key], self._doc_ids[key]
+        cache_lookups.inc(cache="documents", result="miss")
         return None
 
-    def set_doc_embeddings(self, model_id: str, dataset_id: str, embeddings: np.ndarray, doc_ids: list):
+    def get_doc_hashes(self, model_id: str, dataset_id: str) -> Optional[list]:
+        return self._doc_hashes.get((model_id, dataset_id))
+
+    def set_doc_embeddings(self, model_id: str, dataset_id: str, embeddings: np.ndarray, doc_ids: list,
+                           doc_hashes: Optional[list] = None):
         key = (model_id, dataset_id)
         self._doc_embeddings[key] = embeddings
         self._doc_ids[key] = doc_ids
+        if doc_hashes is not None:
+            self._doc_hashes[key] = doc_hashes
+        else:
+            self._doc_hashes.pop(key, None)
 
     def has(self, model_id: str, dataset_id: str) -> bool:
         return (model_id, dataset_id) in self._doc_embeddings
 
+    def nbytes(self) -> int:
+        return sum(e.nbytes for e in list(self._doc_embeddings.values()))
+
     def clear(self):
         self._doc_embeddings.clear()
         self._doc_ids.clear()
+        self._doc_hashes.clear()
 
     def clear_model(self, model_id: str):
         keys_to_remove = [k for k in self._doc_embeddings if k[0] == model_id]
         for k in keys_to_remove:
             del self._doc_embeddings[k]
             del self._doc_ids[k]
+            self._doc_hashes.pop(k, None)
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of single-text embeddings.
+
+    Keyed by (model fingerprint, kind, prefix, text); ``kind`` separates
+    query and document encodings for providers whose prefixes are empty but
+    whose input types differ (e.g. Cohere).
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(embedder: BaseEmbedder, kind: str, text: str) -> tuple:
+        prefix = embedder.query_prefix if kind == "query" else embedder.document_prefix
+        return (embedder.fingerprint, kind, prefix, text)
+
+    def embed(self, embedder: BaseEmbedder, texts: List[str], kind: str = "query") -> Tuple[np.ndarray, int]:
+        """Embed texts, serving repeats from the cache.
+
+        Returns (embeddings, number of cache hits). Misses are embedded in a
+        single provider call. The returned array is a fresh copy, safe to
+        normalize in place.
+        """
+        keys = [self._key(embedder, kind, t) for t in texts]
+        vecs: List[Optional[np.ndarray]] = []
+        with self._lock:
+            for key in keys:
+                vec = self._entries.get(key)
+                if vec is not None:
+                    self._entries.move_to_end(key)
+                vecs.append(vec)
+
+        missing = [i for i, v in enumerate(vecs) if v is None]
+        if missing:
+            embed_fn = embedder.embed_queries if kind == "query" else embedder.embed_documents
+            fresh = embed_fn([texts[i] for i in missing])
+            with self._lock:
+                for i, vec in zip(missing, fresh):
+                    vecs[i] = vec
+                    self._entries[keys[i]] = vec.copy()
+                    self._entries.move_to_end(keys[i])
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        n_hits = len(texts) - len(missing)
+        with self._lock:
+            self.hits += n_hits
+            self.misses += len(missing)
+        cache_lookups.inc(n_hits, cache="queries", result="hit")
+        cache_lookups.inc(len(missing), cache="queries", result="miss")
+        return np.vstack(vecs).astype(np.float32), n_hits
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(v.nbytes for v in self._entries.values())
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
 
+class ResultCache:
+    """Bounded LRU cache of memoized per-model benchmark results.
 
-# Global singleton
+    Keyed by a fingerprint of everything that determines a model's results:
+    dataset content, embedder, similarity metric, normalization, top-k values
+    and the early-stopping and chunking configurations.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def fingerprint(dataset_hash: str, embedder: BaseEmbedder, metric: str, normalize: bool,
+                    top_k_values: List[int], early_stopping: Optional[dict] = None,
+                    chunking: Optional[dict] = None) -> str:
+        payload = json.dumps([
+            dataset_hash, embedder.fingerprint, embedder.query_prefix, embedder.document_prefix,
+            metric, normalize, sorted(top_k_values), early_stopping, chunking,
+        ], sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        cache_lookups.inc(cache="results", result="hit" if entry else "miss")
+        return entry
+
+    def set(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class IndexCache:
+    """Incremental FAISS indexes keyed by (model_id, dataset_id, metric, normalize)."""
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, str, str, bool], IncrementalIndex] = {}
+        self._lock = Lock()
+
+    def get_or_create(self, model_id: str, dataset_id: str, metric: str, normalize: bool,
+                      dim: int) -> IncrementalIndex:
+        key = (model_id, dataset_id, metric, normalize)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None or index.index.d != dim:
+                index = self._indexes[key] = IncrementalIndex(dim, metric, normalize)
+            return index
+
+    def nbytes(self) -> int:
+        with self._lock:
+            indexes = list(self._indexes.values())
+        return sum(i.nbytes() for i in indexes)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+# Global singletons
 embedding_cache = EmbeddingCache()
+query_embedding_cache = QueryEmbeddingCache()
+result_cache = ResultCache()
+index_cache = IndexCache()
+
+registry.register(Gauge(
+    "embedding_cache_bytes", "Bytes held by embedding caches.", ("cache",),
+    callback=lambda: {
+        ("documents",): embedding_cache.nbytes(),
+        ("queries",): query_embedding_cache.nbytes(),
+        ("indexes",): index_cache.nbytes(),
+    },
+))
+registry.register(Gauge(
+    "embedding_cache_hit_ratio", "Lifetime hit ratio of the query-embedding cache.", ("cache",),
+    callback=lambda: {("queries",): query_embedding_cache.stats()["hit_rate"]},
+))
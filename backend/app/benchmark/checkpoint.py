@@ -0,0 +1,161 @@
+"""On-disk run checkpoints — resume interrupted benchmarks without re-embedding.
+
+Layout under ``DATA_DIR/checkpoints/<run_id>/``:
+
+- ``spec.json``: the ``start_benchmark`` arguments, including a dataset snapshot
+- ``state.json``: status and heartbeat, rewritten as the run progresses
+- ``model_<i>.json`` / ``model_<i>.npz``: a finished model's result and per-query arrays
+- ``batches_<i>/<n>.npz``: document batches embedded so far for model ``i``
+
+Only one process should own a checkpoint directory at a time.
+"""
+
+import os
+import json
+import time
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.schemas import ModelBenchmarkResult
+from app.benchmark.columnar import PerQueryStore
+from app.config import DATA_DIR, CHECKPOINT_HEARTBEAT_SEC
+
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")
+
+
+def _write_json(path: str, payload: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class RunCheckpoint:
+    """Reads and writes one run's checkpoint directory."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.dir = os.path.join(CHECKPOINT_DIR, run_id)
+        self._last_heartbeat = 0.0
+        self._batch_counts: Dict[int, int] = {}
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.dir, "spec.json"))
+
+    def save_spec(self, spec: dict):
+        os.makedirs(self.dir, exist_ok=True)
+        _write_json(os.path.join(self.dir, "spec.json"), spec)
+        self.write_state("running")
+
+    def load_spec(self) -> Optional[dict]:
+        return _read_json(os.path.join(self.dir, "spec.json"))
+
+    def write_state(self, status: str, **extra):
+        self._last_heartbeat = time.time()
+        _write_json(os.path.join(self.dir, "state.json"), {
+            "status": status, "heartbeat_at": self._last_heartbeat, "pid": os.getpid(), **extra,
+        })
+
+    def heartbeat(self, status: str = "running"):
+        """Rewrite state.json, at most once per CHECKPOINT_HEARTBEAT_SEC."""
+        if time.time() - self._last_heartbeat >= CHECKPOINT_HEARTBEAT_SEC:
+            self.write_state(status)
+
+    def read_state(self) -> dict:
+        return _read_json(os.path.join(self.dir, "state.json")) or {}
+
+    # ── Embedded document batches ───────────────────────────────────────
+
+    def save_batch(self, model_idx: int, doc_ids: List[str], doc_hashes: List[str], vectors: np.ndarray):
+        batch_dir = os.path.join(self.dir, f"batches_{model_idx}")
+        os.makedirs(batch_dir, exist_ok=True)
+        if model_idx not in self._batch_counts:
+            # Count once per model (batches left by an interrupted attempt), then keep a running counter
+            self._batch_counts[model_idx] = len(os.listdir(batch_dir))
+        n = self._batch_counts[model_idx]
+        self._batch_counts[model_idx] = n + 1
+        tmp = os.path.join(batch_dir, f"{n:06d}.tmp.npz")
+        np.savez(tmp, doc_ids=np.asarray(doc_ids, dtype=str), doc_hashes=np.asarray(doc_hashes, dtype=str),
+                 vectors=vectors)
+        os.replace(tmp, os.path.join(batch_dir, f"{n:06d}.npz"))
+
+    def load_batches(self, model_idx: int) -> Optional[Tuple[List[str], List[str], np.ndarray]]:
+        """All checkpointed batches of a model as (doc_ids, doc_hashes, vectors), or None."""
+        batch_dir = os.path.join(self.dir, f"batches_{model_idx}")
+        if not os.path.isdir(batch_dir):
+            return None
+        ids, hashes, vecs = [], [], []
+        for name in sorted(os.listdir(batch_dir)):
+            if not name.endswith(".npz") or ".tmp" in name:
+                continue
+            with np.load(os.path.join(batch_dir, name)) as data:
+                ids.extend(data["doc_ids"].tolist())
+                hashes.extend(data["doc_hashes"].tolist())
+                vecs.append(data["vectors"])
+        if not vecs:
+            return None
+        return ids, hashes, np.vstack(vecs)
+
+    def drop_batches(self):
+        for name in os.listdir(self.dir):
+            if name.startswith("batches_"):
+                shutil.rmtree(os.path.join(self.dir, name), ignore_errors=True)
+        self._batch_counts.clear()
+
+    # ── Finished models ─────────────────────────────────────────────────
+
+    def save_model(self, model_idx: int, result: ModelBenchmarkResult, per_query_metrics: Dict[str, np.ndarray],
+                   store: PerQueryStore, stopping_curve: Optional[np.ndarray]):
+        arrays = {f"metric:{name}": values for name, values in per_query_metrics.items()}
+        arrays.update(query_idx=store.query_idx[:store.size], doc_idx=store.doc_idx[:store.size],
+                      scores=store.scores[:store.size])
+        if stopping_curve is not None:
+            arrays["stopping_curve"] = stopping_curve
+        tmp = os.path.join(self.dir, f"model_{model_idx}.tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, os.path.join(self.dir, f"model_{model_idx}.npz"))
+        _write_json(os.path.join(self.dir, f"model_{model_idx}.json"), result.model_dump(mode="json"))
+
+    def load_models(self) -> List[dict]:
+        """Finished models in run order, each as {"result", "per_query_metrics", "per_query_store", "stopping_curve"}."""
+        models = []
+        # A missing model file must not hide the ones after it, so check every index in the spec
+        spec = self.load_spec() or {}
+        for idx in range(len(spec.get("model_ids", []))):
+            result = _read_json(os.path.join(self.dir, f"model_{idx}.json"))
+            arrays_path = os.path.join(self.dir, f"model_{idx}.npz")
+            if result is None or not os.path.exists(arrays_path):
+                continue
+            with np.load(arrays_path) as data:
+                store = PerQueryStore(0, width=data["doc_idx"].shape[1] if data["doc_idx"].ndim == 2 else 10)
+                store.query_idx, store.doc_idx, store.scores = data["query_idx"], data["doc_idx"], data["scores"]
+                store.size = len(store.query_idx)
+                models.append({
+                    "result": ModelBenchmarkResult(**result),
+                    "per_query_metrics": {
+                        k.split(":", 1)[1]: data[k] for k in data.files if k.startswith("metric:")
+                    },
+                    "per_query_store": store,
+                    "stopping_curve": data["stopping_curve"] if "stopping_curve" in data.files else None,
+                })
+        return models
+
+    def delete(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+        self._batch_counts.clear()
+
+
+def list_checkpoints() -> List[str]:
+    if not os.path.isdir(CHECKPOINT_DIR):
+        return []
+    return sorted(d for d in os.listdir(CHECKPOINT_DIR) if RunCheckpoint(d).exists())
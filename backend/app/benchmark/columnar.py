@@ -0,0 +1,115 @@
+"""Columnar per-query results — int32 doc indices, float32 scores, CSR relevance.
+
+Runs keep these arrays instead of per-query dicts and only expand them to the
+JSON shape (``{"query", "retrieved": [{"doc_id", "score"}], "relevant"}``)
+when a client asks for it.
+"""
+
+import io
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Hits kept per query; matches the top-10 previously stored as dicts
+PER_QUERY_WIDTH = 10
+
+
+class RelevanceCSR:
+    """Relevant doc indices for every query of a dataset in CSR layout."""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_queries(cls, queries: list, vocab: List[str]) -> "RelevanceCSR":
+        """Build from query dicts; unknown relevant ids are appended to ``vocab``."""
+        index = {d: i for i, d in enumerate(vocab)}
+        indptr = [0]
+        indices = []
+        for q in queries:
+            for doc_id in q["relevant_doc_ids"]:
+                if doc_id not in index:
+                    index[doc_id] = len(vocab)
+                    vocab.append(doc_id)
+                indices.append(index[doc_id])
+            indptr.append(len(indices))
+        return cls(np.asarray(indptr, dtype=np.int32), np.asarray(indices, dtype=np.int32))
+
+    def row(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes
+
+
+class PerQueryStore:
+    """Top hits of one model for each evaluated query, as fixed-width arrays."""
+
+    def __init__(self, capacity: int, width: int = PER_QUERY_WIDTH):
+        self.query_idx = np.empty(capacity, dtype=np.int32)
+        self.doc_idx = np.full((capacity, width), -1, dtype=np.int32)
+        self.scores = np.zeros((capacity, width), dtype=np.float32)
+        self.size = 0
+
+    def append(self, query_index: int, doc_indices: List[int], scores: List[float]):
+        n = min(len(doc_indices), self.doc_idx.shape[1])
+        row = self.size
+        self.query_idx[row] = query_index
+        self.doc_idx[row, :n] = doc_indices[:n]
+        self.scores[row, :n] = scores[:n]
+        self.size += 1
+
+    def trim(self) -> "PerQueryStore":
+        """Drop unused capacity (e.g. after early stopping)."""
+        self.query_idx = self.query_idx[:self.size].copy()
+        self.doc_idx = self.doc_idx[:self.size].copy()
+        self.scores = self.scores[:self.size].copy()
+        return self
+
+    @property
+    def nbytes(self) -> int:
+        return self.query_idx.nbytes + self.doc_idx.nbytes + self.scores.nbytes
+
+    def to_records(self, query_texts: List[str], vocab: List[str], relevance: RelevanceCSR) -> List[Dict]:
+        """Expand to the legacy list-of-dicts JSON shape."""
+        records = []
+        for row in range(self.size):
+            qi = int(self.query_idx[row])
+            retrieved = [
+                {"doc_id": vocab[d], "score": round(float(s), 4)}
+                for d, s in zip(self.doc_idx[row], self.scores[row]) if d >= 0
+            ]
+            records.append({
+                "query": query_texts[qi],
+                "retrieved": retrieved,
+                "relevant": [vocab[d] for d in relevance.row(qi)],
+            })
+        return records
+
+
+def export_npz(model_ids: List[str], stores: Dict[str, PerQueryStore], query_texts: List[str],
+               vocab: List[str], relevance: Optional[RelevanceCSR]) -> bytes:
+    """Serialize all models' per-query results into one compressed ``.npz``.
+
+    Arrays: ``model_ids``, ``doc_ids``, ``query_texts``, ``relevance_indptr``,
+    ``relevance_indices`` and, for model ``i``, ``m{i}_query_idx``,
+    ``m{i}_doc_idx`` and ``m{i}_scores``.
+    """
+    arrays = {
+        "model_ids": np.asarray(model_ids, dtype=str),
+        "doc_ids": np.asarray(vocab, dtype=str),
+        "query_texts": np.asarray(query_texts, dtype=str),
+    }
+    if relevance is not None:
+        arrays["relevance_indptr"] = relevance.indptr
+        arrays["relevance_indices"] = relevance.indices
+    for i, model_id in enumerate(model_ids):
+        store = stores[model_id]
+        arrays[f"m{i}_query_idx"] = store.query_idx[:store.size]
+        arrays[f"m{i}_doc_idx"] = store.doc_idx[:store.size]
+        arrays[f"m{i}_scores"] = store.scores[:store.size]
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    return buf.getvalue()
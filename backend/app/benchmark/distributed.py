@@ -0,0 +1,223 @@
+"""Coordinator side of distributed document embedding.
+
+A run's documents are split into ``(model, shard)`` tasks that embedding
+workers (``app.embeddings.worker_server``) pull from a shared queue, so
+faster workers take more shards. Failed tasks are retried on any worker up
+to ``DISTRIBUTED_MAX_ATTEMPTS`` times; a worker that fails three tasks in a
+row stops taking work. Results are merged into the embedding cache, after
+which the normal per-model evaluation finds every document cached.
+"""
+
+import io
+import json
+import time
+import queue
+import urllib.request
+from dataclasses import dataclass, field
+from threading import Thread, Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.benchmark.cache import embedding_cache
+from app.benchmark.autotune import batch_size_for
+from app.config import (
+    WORKER_URLS, WORKER_TOKEN, WORKER_TIMEOUT_SEC, WORKER_CONCURRENCY,
+    DISTRIBUTED_SHARD_SIZE, DISTRIBUTED_MAX_ATTEMPTS,
+)
+
+_MAX_CONSECUTIVE_FAILURES = 3
+
+
+@dataclass
+class ShardTask:
+    model_id: str
+    rows: List[int]  # dataset row of each text
+    texts: List[str]
+    attempts: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+def _request(url: str, path: str, payload: Optional[dict] = None, timeout: float = WORKER_TIMEOUT_SEC):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(f"{url}{path}", data=data, method="POST" if data else "GET")
+    req.add_header("Content-Type", "application/json")
+    if WORKER_TOKEN:
+        req.add_header("X-Worker-Token", WORKER_TOKEN)
+    return urllib.request.urlopen(req, timeout=timeout)
+
+
+def worker_health(urls: List[str] = WORKER_URLS) -> Dict[str, dict]:
+    """Probe each worker's /health endpoint."""
+    status = {}
+    for url in urls:
+        try:
+            with _request(url, "/health", timeout=5) as resp:
+                status[url] = {"ok": True, **json.loads(resp.read())}
+        except Exception as e:
+            status[url] = {"ok": False, "error": str(e)}
+    return status
+
+
+def _embed_remote(url: str, task: ShardTask, batch_size: int) -> Tuple[np.ndarray, Optional[float], int]:
+    """Embed a shard on ``url``; returns (vectors, worker-side embed ms if reported, provider batches)."""
+    payload = {"model_id": task.model_id, "texts": task.texts, "batch_size": batch_size}
+    with _request(url, "/v1/embed_shard", payload) as resp:
+        vectors = np.load(io.BytesIO(resp.read()))
+        embed_ms = resp.headers.get("X-Embed-Ms")
+        n_batches = int(resp.headers.get("X-Batches") or 1)
+    if vectors.shape[0] != len(task.texts):
+        raise ValueError(f"worker returned {vectors.shape[0]} vectors for {len(task.texts)} texts")
+    return vectors, float(embed_ms) if embed_ms else None, n_batches
+
+
+def run_tasks(tasks: List[ShardTask], urls: List[str] = WORKER_URLS,
+              should_stop: Optional[Callable[[], bool]] = None,
+              on_done: Optional[Callable[..., None]] = None) -> Dict[str, dict]:
+    """Drain ``tasks`` across the workers; returns per-worker stats.
+
+    ``on_done(task, vectors, worker_url, elapsed_ms, embed_ms, n_batches)``
+    is called from worker threads as each shard completes; ``embed_ms`` is
+    the worker's own provider time (falls back to the round trip). Raises RuntimeError if a task exhausts
+    its attempts or every worker has been retired.
+    """
+    if not urls:
+        raise RuntimeError("No workers configured (set WORKER_URLS)")
+    pending: "queue.Queue[ShardTask]" = queue.Queue()
+    for task in tasks:
+        pending.put(task)
+    remaining = [len(tasks)]
+    stats = {url: {"tasks": 0, "texts": 0, "failures": 0, "busy_ms": 0.0, "retired": False} for url in urls}
+    lock = Lock()
+    fatal: List[str] = []
+
+    def _worker_loop(url: str):
+        consecutive_failures = 0
+        while not fatal and not (should_stop and should_stop()):
+            with lock:
+                if remaining[0] == 0:
+                    return
+            try:
+                task = pending.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            task.attempts += 1
+            t0 = time.perf_counter()
+            try:
+                vectors, embed_ms, n_batches = _embed_remote(url, task, batch_size_for(task.model_id))
+            except Exception as e:
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                task.errors.append(f"{url}: {e}")
+                consecutive_failures += 1
+                with lock:
+                    stats[url]["failures"] += 1
+                    stats[url]["busy_ms"] += elapsed_ms
+                    if task.attempts >= DISTRIBUTED_MAX_ATTEMPTS:
+                        fatal.append(f"shard of {task.model_id} failed {task.attempts} times: {task.errors[-1]}")
+                    else:
+                        pending.put(task)
+                    if consecutive_failures >= _MAX_CONSECUTIVE_FAILURES:
+                        stats[url]["retired"] = True
+                        if all(s["retired"] for s in stats.values()):
+                            fatal.append("all workers retired after repeated failures")
+                        return
+                continue
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            consecutive_failures = 0
+            if on_done:
+                on_done(task, vectors, url, elapsed_ms, embed_ms if embed_ms is not None else elapsed_ms, n_batches)
+            with lock:
+                stats[url]["tasks"] += 1
+                stats[url]["texts"] += len(task.texts)
+                stats[url]["busy_ms"] += elapsed_ms
+                remaining[0] -= 1
+
+    threads = [Thread(target=_worker_loop, args=(url,), daemon=True)
+               for url in urls for _ in range(max(1, WORKER_CONCURRENCY))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if fatal:
+        raise RuntimeError(fatal[0])
+    return stats
+
+
+def embed_distributed(run: dict, model_ids: List[str], dataset_id: str, doc_ids: List[str],
+                      doc_texts: List[str], doc_hashes: List[str],
+                      pending_rows: Dict[str, List[int]],
+                      on_shard: Optional[Callable[[str, List[int], np.ndarray], None]] = None) -> Dict[str, dict]:
+    """Embed each model's pending rows on the workers and merge them into the embedding cache.
+
+    ``pending_rows`` maps model_id -> dataset rows that need embedding (rows
+    already cached with matching hashes are left out by the caller).
+    ``on_shard(model_id, rows, vectors)`` sees each finished shard, e.g. to
+    checkpoint it. Returns per-model stats: {"shards", "documents",
+    "worker_sec", "wall_sec", "phase_wall_sec", "workers", "shard_timings"}.
+    Models' shards interleave, so ``wall_sec`` is the model's own span from
+    its first shard starting to its last finishing; ``shard_timings`` holds
+    (embed_ms, documents, provider batches) per shard for latency stats.
+    """
+    tasks = []
+    for model_id in model_ids:
+        rows = pending_rows.get(model_id) or []
+        for start in range(0, len(rows), DISTRIBUTED_SHARD_SIZE):
+            shard = rows[start:start + DISTRIBUTED_SHARD_SIZE]
+            tasks.append(ShardTask(model_id=model_id, rows=shard, texts=[doc_texts[i] for i in shard]))
+    if not tasks:
+        return {}
+
+    results: Dict[str, List[tuple]] = {m: [] for m in model_ids}
+    per_model = {
+        m: {"shards": 0, "documents": 0, "worker_sec": 0.0, "workers": {}, "shard_timings": []}
+        for m in model_ids if pending_rows.get(m)
+    }
+    spans: Dict[str, List[float]] = {}  # model_id -> [first shard start, last shard end]
+    lock = Lock()
+
+    def _on_done(task: ShardTask, vectors: np.ndarray, url: str, elapsed_ms: float,
+                 embed_ms: float, n_batches: int):
+        end = time.perf_counter()
+        with lock:
+            results[task.model_id].append((task.rows, vectors))
+            info = per_model[task.model_id]
+            info["shards"] += 1
+            info["documents"] += len(task.rows)
+            info["worker_sec"] += elapsed_ms / 1000
+            info["workers"][url] = info["workers"].get(url, 0) + 1
+            info["shard_timings"].append((embed_ms, len(task.rows), n_batches))
+            span = spans.setdefault(task.model_id, [end - elapsed_ms / 1000, end])
+            span[0] = min(span[0], end - elapsed_ms / 1000)
+            span[1] = max(span[1], end)
+            run["documents_embedded"] += len(task.rows)
+            run["heartbeat_at"] = time.time()
+            if on_shard:
+                on_shard(task.model_id, task.rows, vectors)
+
+    t0 = time.perf_counter()
+    worker_stats = run_tasks(tasks, should_stop=lambda: run.get("cancelled"), on_done=_on_done)
+    wall_sec = time.perf_counter() - t0
+    run["worker_stats"] = worker_stats
+
+    for model_id, parts in results.items():
+        if not parts:
+            continue
+        cached = embedding_cache.get_doc_embeddings(model_id, dataset_id)
+        cached_hashes = embedding_cache.get_doc_hashes(model_id, dataset_id) or []
+        by_id = {}
+        if cached:
+            for i, (d, h) in enumerate(zip(cached[1], cached_hashes)):
+                by_id[d] = (h, cached[0][i])
+        for rows, vectors in parts:
+            for r, vec in zip(rows, vectors):
+                by_id[doc_ids[r]] = (doc_hashes[r], vec)
+        ids = [d for d in doc_ids if d in by_id]
+        embedding_cache.set_doc_embeddings(
+            model_id, dataset_id, np.vstack([by_id[d][1] for d in ids]).astype(np.float32),
+            ids, [by_id[d][0] for d in ids],
+        )
+        first, last = spans[model_id]
+        per_model[model_id]["wall_sec"] = round(last - first, 3)
+        per_model[model_id]["phase_wall_sec"] = round(wall_sec, 3)
+        per_model[model_id]["worker_sec"] = round(per_model[model_id]["worker_sec"], 3)
+    return per_model
@@ -0,0 +1,118 @@
+"""Load testing — latency vs. achieved QPS for query embedding + search under concurrency."""
+
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.evaluation.performance import LatencyTracker
+
+_MAX_OPEN_LOOP_WORKERS = 64
+
+
+def _level_result(mode: str, level: float, latency: LatencyTracker, errors: int, wall_sec: float) -> Dict:
+    # Every issued request has finished by now; a stopped level reports only what it issued
+    completed = latency.count
+    total = completed + errors
+    return {
+        "mode": mode,
+        "level": level,
+        "requests": total,
+        "achieved_qps": round(completed / wall_sec, 2) if wall_sec > 0 else 0.0,
+        "latency_p50_ms": round(latency.p50, 2),
+        "latency_p95_ms": round(latency.p95, 2),
+        "latency_p99_ms": round(latency.p99, 2),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+    }
+
+
+def run_closed_loop(request_fn: Callable[[str], None], texts: List[str],
+                    concurrency: int, num_requests: int,
+                    should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+    """``concurrency`` workers each issue the next request as soon as the previous returns."""
+    lock = Lock()
+    counter = itertools.count()
+    errors = 0
+    worker_latencies = [LatencyTracker() for _ in range(concurrency)]
+
+    def worker(latency: LatencyTracker):
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= num_requests or (should_stop and should_stop()):
+                return
+            t0 = time.perf_counter()
+            try:
+                request_fn(texts[i % len(texts)])
+                latency.record((time.perf_counter() - t0) * 1000)
+            except Exception:
+                with lock:
+                    errors += 1
+
+    threads = [Thread(target=worker, args=(lat,), daemon=True) for lat in worker_latencies]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latency = LatencyTracker()
+    for worker_latency in worker_latencies:
+        latency.merge(worker_latency)
+    return _level_result("closed_loop", concurrency, latency, errors, time.perf_counter() - start)
+
+
+def run_open_loop(request_fn: Callable[[str], None], texts: List[str],
+                  target_qps: float, num_requests: int, seed: int = 42,
+                  should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+    """Issue requests at Poisson arrival times regardless of completions.
+
+    Latency is measured from each request's scheduled arrival, so queueing
+    delay under overload is included (no coordinated omission).
+    """
+    latency = LatencyTracker()
+    lock = Lock()
+    errors = 0
+    arrivals = np.cumsum(np.random.default_rng(seed).exponential(1.0 / target_qps, num_requests))
+
+    def timed(text: str, scheduled: float):
+        nonlocal errors
+        try:
+            request_fn(text)
+            latency.record((time.perf_counter() - scheduled) * 1000)
+        except Exception:
+            with lock:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=_MAX_OPEN_LOOP_WORKERS) as pool:
+        for i, offset in enumerate(arrivals):
+            if should_stop and should_stop():
+                break
+            scheduled = start + float(offset)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(timed, texts[i % len(texts)], scheduled)
+    return _level_result("open_loop", target_qps, latency, errors, time.perf_counter() - start)
+
+
+def run_load_test(request_fn: Callable[[str], None], texts: List[str], mode: str,
+                  levels: List[float], requests_per_level: int,
+                  should_stop: Optional[Callable[[], bool]] = None) -> List[Dict]:
+    """Run one load level after another; levels are concurrency (closed loop) or target QPS (open loop).
+
+    ``should_stop`` is polled before every request, so it doubles as a
+    liveness callback for long levels.
+    """
+    results = []
+    for level in levels:
+        if should_stop and should_stop():
+            break
+        if mode == "open_loop":
+            results.append(run_open_loop(request_fn, texts, level, requests_per_level, should_stop=should_stop))
+        else:
+            results.append(run_closed_loop(request_fn, texts, int(level), requests_per_level, should_stop=should_stop))
+    return results
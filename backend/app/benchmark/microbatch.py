@@ -0,0 +1,148 @@
+"""Request coalescing for live queries — one embed call and one FAISS search per window."""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from app.benchmark.cache import embedding_cache, query_embedding_cache
+from app.benchmark.retrieval import build_faiss_index, mean_chunk_score, needs_normalization, search_index
+from app.datasets.chunking import parent_doc_id
+from app.embeddings.registry import get_embedder
+from app.config import QUERY_BATCH_WINDOW_MS, QUERY_BATCH_MAX_SIZE
+
+
+class QueryBatcher:
+    """Collects concurrent queries for one (model, dataset, metric, normalize) and serves them together.
+
+    Queries arriving within ``window_ms`` of the first pending query (or until
+    ``max_batch`` are queued) are embedded in a single provider call and
+    searched with a single batched FAISS query; each caller gets its own hits.
+    With ``chunk_aggregation``, ``dataset_id`` is a chunk cache key and chunk
+    hits are grouped into documents, scored like ``ChunkedIndex``: by their
+    best chunk (``max``) or their mean over all chunks (``mean``).
+    """
+
+    def __init__(self, model_id: str, dataset_id: str, metric: str, normalize: bool = True,
+                 window_ms: float = QUERY_BATCH_WINDOW_MS, max_batch: int = QUERY_BATCH_MAX_SIZE,
+                 chunk_aggregation: Optional[str] = None):
+        self.model_id = model_id
+        self.dataset_id = dataset_id
+        self.metric = metric
+        self.normalize = normalize
+        self.chunk_aggregation = chunk_aggregation
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, int, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._index = None
+        self._index_source: Optional[np.ndarray] = None
+        self._parents: List[str] = []
+        self._rows_by_doc: Dict[str, List[int]] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._max_chunks = 1
+        self.batches = 0
+        self.queries = 0
+
+    async def search(self, text: str, top_k: int) -> List[Tuple[str, float]]:
+        """Queue a query and wait for its (doc_id, score) hits."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, top_k, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[str, int, asyncio.Future]]):
+        texts = [text for text, _, _ in batch]
+        max_k = max(k for _, k, _ in batch)
+        self.batches += 1
+        self.queries += len(batch)
+        try:
+            hits = await asyncio.to_thread(self._search_batch, texts, max_k)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, k, future), query_hits in zip(batch, hits):
+            if not future.done():  # caller may have timed out
+                future.set_result(query_hits[:k])
+
+    def _get_index(self):
+        cached = embedding_cache.get_doc_embeddings(self.model_id, self.dataset_id)
+        if not cached:
+            raise ValueError(f"No cached embeddings for {self.model_id}")
+        embeddings, doc_ids = cached
+        if self._index is None or self._index_source is not embeddings:
+            self._index = build_faiss_index(embeddings.copy(), self.metric, self.normalize)
+            self._index_source = embeddings
+            if self.chunk_aggregation:
+                self._parents = [parent_doc_id(c) for c in doc_ids]
+                self._rows_by_doc = {}
+                for row, doc_id in enumerate(self._parents):
+                    self._rows_by_doc.setdefault(doc_id, []).append(row)
+                self._max_chunks = max((len(r) for r in self._rows_by_doc.values()), default=1)
+                if self.chunk_aggregation == "mean":
+                    self._vectors = embeddings.astype(np.float32, copy=True)
+                    if needs_normalization(self.metric, self.normalize):
+                        faiss.normalize_L2(self._vectors)
+        return self._index, doc_ids
+
+    def _search_batch(self, texts: List[str], top_k: int) -> List[List[Tuple[str, float]]]:
+        index, doc_ids = self._get_index()
+        embedder = get_embedder(self.model_id)
+        q_vecs, _ = query_embedding_cache.embed(embedder, texts)
+        if not self.chunk_aggregation:
+            return search_index(index, q_vecs, doc_ids, top_k, self.metric, self.normalize)
+        # top_k · max_chunks chunks always cover top_k distinct documents; the search
+        # normalizes q_vecs in place, as mean rescoring expects
+        hits = search_index(index, q_vecs, doc_ids, top_k * self._max_chunks, self.metric, self.normalize)
+        results = []
+        for query, query_hits in zip(q_vecs, hits):
+            best: Dict[str, float] = {}
+            for chunk_id, score in query_hits:  # best-first, so the first hit per document is its max
+                best.setdefault(parent_doc_id(chunk_id), score)
+            if self.chunk_aggregation == "mean":
+                best = {
+                    doc_id: mean_chunk_score(self._vectors[self._rows_by_doc[doc_id]], query, self.metric)
+                    for doc_id in best
+                }
+            results.append(sorted(best.items(), key=lambda h: h[1], reverse=True)[:top_k])
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+_batchers: Dict[Tuple[str, str, str, bool, Optional[str]], QueryBatcher] = {}
+
+
+def get_query_batcher(model_id: str, dataset_id: str, metric: str, normalize: bool = True,
+                      chunk_aggregation: Optional[str] = None) -> QueryBatcher:
+    key = (model_id, dataset_id, metric, normalize, chunk_aggregation)
+    if key not in _batchers:
+        _batchers[key] = QueryBatcher(model_id, dataset_id, metric, normalize, chunk_aggregation=chunk_aggregation)
+    return _batchers[key]
+
+
+def batcher_stats() -> Dict[str, dict]:
+    return {
+        f"{m}|{d}|{metric}|{'norm' if norm else 'raw'}" + (f"|{agg}" if agg else ""): b.stats()
+        for (m, d, metric, norm, agg), b in _batchers.items()
+    }
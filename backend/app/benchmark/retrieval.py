@@ -1,48 +1,229 @@
 """Vector search retrieval using FAISS."""
 
+import copy
 import numpy as np
 import faiss
-from typing import List, Tuple
-
-
-def build_faiss_index(embeddings: np.ndarray, metric: str = "cosine") -> faiss.Index:
-    """Build a FAISS index from embeddings."""
-    dim = embeddings.shape[1]
-    if metric == "cosine":
-        faiss.normalize_L2(embeddings)
-        index = faiss.IndexFlatIP(dim)
-    elif metric == "dot_product":
-        index = faiss.IndexFlatIP(dim)
-    else:  # euclidean
-        index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.evaluation.profiling import span
+from app.config import HNSW_M, HNSW_EF_SEARCH, IVF_NPROBE
+
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+
+
+def needs_normalization(metric: str, normalize: bool) -> bool:
+    return metric == "cosine" or normalize
+
+
+def make_index(dim: int, n: int, metric: str, index_type: str) -> faiss.Index:
+    faiss_metric = faiss.METRIC_L2 if metric == "euclidean" else faiss.METRIC_INNER_PRODUCT
+    if index_type == "hnsw":
+        index = faiss.index_factory(dim, f"HNSW{HNSW_M},Flat", faiss_metric)
+        faiss.ParameterSpace().set_index_parameter(index, "efSearch", HNSW_EF_SEARCH)
+        return index
+    if index_type == "ivf":
+        # ~sqrt(n) lists, capped so each centroid gets FAISS's recommended 39 training points
+        nlist = max(1, min(int(np.sqrt(n)), n // 39))
+        index = faiss.index_factory(dim, f"IVF{nlist},Flat", faiss_metric)
+        faiss.extract_index_ivf(index).nprobe = min(nlist, IVF_NPROBE)
+        return index
+    return faiss.IndexFlatL2(dim) if metric == "euclidean" else faiss.IndexFlatIP(dim)
+
+
+def build_faiss_index(
+    embeddings: np.ndarray,
+    metric: str = "cosine",
+    normalize: bool = False,
+    index_type: str = "flat",
+) -> faiss.Index:
+    """Build a FAISS index from raw embeddings.
+
+    Vectors are L2-normalized in place for cosine or when ``normalize`` is
+    set, so callers pass a copy of anything they keep (e.g. cached vectors).
+    """
+    with span("index_build"):
+        n, dim = embeddings.shape
+        if needs_normalization(metric, normalize):
+            faiss.normalize_L2(embeddings)
+        index = make_index(dim, n, metric, index_type)
+        if not index.is_trained:
+            index.train(embeddings)
+        index.add(embeddings)
     return index
 
 
+def index_size_bytes(index: faiss.Index) -> int:
+    """Size of the index as FAISS serializes it (vectors plus structure overhead)."""
+    return int(faiss.serialize_index(index).nbytes)
+
+
 def search_index(
     index: faiss.Index,
     query_embeddings: np.ndarray,
     doc_ids: List[str],
     top_k: int,
     metric: str = "cosine",
+    normalize: bool = False,
 ) -> List[List[Tuple[str, float]]]:
-    """Search the FAISS index and return (doc_id, score) pairs per query."""
-    if metric == "cosine":
+    """Search the FAISS index and return (doc_id, score) pairs per query.
+
+    Raw query vectors are normalized in place under the same rule as
+    ``build_faiss_index``.
+    """
+    if needs_normalization(metric, normalize):
         faiss.normalize_L2(query_embeddings)
 
     k = min(top_k, index.ntotal)
-    distances, indices = index.search(query_embeddings, k)
-
-    results = []
-    for i in range(len(query_embeddings)):
-        hits = []
-        for j in range(k):
-            idx = int(indices[i][j])
-            if idx < 0:
-                continue
-            score = float(distances[i][j])
-            if metric == "euclidean":
-                score = 1.0 / (1.0 + score)  # convert distance to similarity
-            hits.append((doc_ids[idx], score))
-        results.append(hits)
+    with span("index_search"):
+        distances, indices = index.search(query_embeddings, k)
+
+    with span("hits_assembly"):
+        results = []
+        for i in range(len(query_embeddings)):
+            hits = []
+            for j in range(k):
+                idx = int(indices[i][j])
+                if idx < 0:
+                    continue
+                score = float(distances[i][j])
+                if metric == "euclidean":
+                    score = 1.0 / (1.0 + score)  # convert distance to similarity
+                hits.append((doc_ids[idx], score))
+            results.append(hits)
     return results
+
+
+class IncrementalIndex:
+    """Exact index over a document set that is patched in place between runs.
+
+    Wraps a flat index in an ``IndexIDMap``: every document gets a stable
+    int64 label, changed or removed documents are dropped with
+    ``remove_ids`` and new rows are added with ``add_with_ids``, so a sync
+    costs time proportional to the diff. ``labels`` maps label -> doc_id
+    (None for removed rows) and is what ``search_index`` resolves hits with.
+    """
+
+    def __init__(self, dim: int, metric: str = "cosine", normalize: bool = False):
+        self.metric = metric
+        self.normalize = normalize
+        self.index = faiss.IndexIDMap(make_index(dim, 0, metric, "flat"))
+        self.labels: List[Optional[str]] = []
+        self._label_of: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def sync(self, embeddings: np.ndarray, doc_ids: List[str], changed: Set[str]) -> Tuple[int, int]:
+        """Bring the index in line with ``doc_ids``; returns (rows added, rows removed).
+
+        ``changed`` lists documents whose vectors differ from the indexed ones.
+        """
+        with self._lock, span("index_build"):
+            current = set(doc_ids)
+            stale = [d for d in self._label_of if d not in current or d in changed]
+            if stale:
+                labels = np.array([self._label_of.pop(d) for d in stale], dtype=np.int64)
+                self.index.remove_ids(labels)
+                for label in labels:
+                    self.labels[label] = None
+
+            rows = [i for i, d in enumerate(doc_ids) if d not in self._label_of]
+            if rows:
+                vectors = np.ascontiguousarray(embeddings[rows], dtype=np.float32)
+                if needs_normalization(self.metric, self.normalize):
+                    faiss.normalize_L2(vectors)
+                start = len(self.labels)
+                new_labels = np.arange(start, start + len(rows), dtype=np.int64)
+                for label, i in zip(new_labels, rows):
+                    self._label_of[doc_ids[i]] = int(label)
+                    self.labels.append(doc_ids[i])
+                self.index.add_with_ids(vectors, new_labels)
+        return len(rows), len(stale)
+
+    def nbytes(self) -> int:
+        """Vector storage plus the id map (avoids serializing the index)."""
+        return self.index.ntotal * (self.index.d * 4 + 8)
+
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[List[Tuple[str, float]]]:
+        with self._lock:
+            return search_index(self.index, query_embeddings, self.labels, top_k, self.metric, self.normalize)
+
+    def snapshot(self) -> "IndexSnapshot":
+        """Read-only copy that concurrent callers can search without taking the lock."""
+        with self._lock:
+            return IndexSnapshot(faiss.clone_index(self.index), list(self.labels), self.metric, self.normalize)
+
+
+class IndexSnapshot:
+    """Frozen copy of an ``IncrementalIndex``; FAISS searches on it run in parallel."""
+
+    def __init__(self, index: faiss.Index, labels: List[Optional[str]], metric: str, normalize: bool):
+        self.index = index
+        self.labels = labels
+        self.metric = metric
+        self.normalize = normalize
+
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[List[Tuple[str, float]]]:
+        return search_index(self.index, query_embeddings, self.labels, top_k, self.metric, self.normalize)
+
+
+def mean_chunk_score(chunk_vectors: np.ndarray, query: np.ndarray, metric: str) -> float:
+    """Document score under ``mean`` aggregation: the query's average score over its chunks."""
+    if metric == "euclidean":
+        scores = 1.0 / (1.0 + ((chunk_vectors - query) ** 2).sum(axis=1))
+    else:
+        scores = chunk_vectors @ query
+    return float(scores.mean())
+
+
+class ChunkedIndex:
+    """Document-level search over an ``IncrementalIndex`` of document chunks.
+
+    A search retrieves the top ``top_k · max_chunks`` chunks, which always
+    covers ``top_k`` distinct documents, and groups them by parent. With
+    ``max`` aggregation a document scores as its best chunk; with ``mean``
+    each candidate is rescored over all of its chunks from the chunk matrix.
+    """
+
+    def __init__(self, chunk_index: IncrementalIndex, chunk_embeddings: np.ndarray, chunk_ids: List[str],
+                 parent_ids: List[str], aggregation: str = "max"):
+        self.chunk_index = chunk_index
+        self.index = chunk_index.index
+        self.metric = chunk_index.metric
+        self.aggregation = aggregation
+        self.parent_of = dict(zip(chunk_ids, parent_ids))
+        self.rows_by_doc: Dict[str, List[int]] = {}
+        for row, doc_id in enumerate(parent_ids):
+            self.rows_by_doc.setdefault(doc_id, []).append(row)
+        self.max_chunks = max((len(r) for r in self.rows_by_doc.values()), default=1)
+        self.vectors = None
+        if aggregation == "mean":
+            self.vectors = np.ascontiguousarray(chunk_embeddings, dtype=np.float32).copy()
+            if needs_normalization(self.metric, chunk_index.normalize):
+                faiss.normalize_L2(self.vectors)
+
+    def nbytes(self) -> int:
+        return self.chunk_index.nbytes()
+
+    def snapshot(self) -> "ChunkedIndex":
+        """Copy searching a snapshot of the chunk index (see ``IncrementalIndex.snapshot``)."""
+        snap = copy.copy(self)
+        snap.chunk_index = self.chunk_index.snapshot()
+        snap.index = snap.chunk_index.index
+        return snap
+
+    def search(self, query_embeddings: np.ndarray, top_k: int) -> List[List[Tuple[str, float]]]:
+        # Chunk search normalizes the queries in place, as mean rescoring expects
+        chunk_hits = self.chunk_index.search(query_embeddings, top_k * self.max_chunks)
+        with span("chunk_aggregation"):
+            results = []
+            for query, hits in zip(query_embeddings, chunk_hits):
+                best: Dict[str, float] = {}
+                for chunk_id, score in hits:  # best-first, so the first hit per document is its max
+                    best.setdefault(self.parent_of[chunk_id], score)
+                if self.aggregation == "mean":
+                    best = {
+                        doc_id: mean_chunk_score(self.vectors[self.rows_by_doc[doc_id]], query, self.metric)
+                        for doc_id in best
+                    }
+                results.append(sorted(best.items(), key=lambda h: h[1], reverse=True)[:top_k])
+        return results
@@ -2,34 +2,86 @@
 
 import uuid
 import time
+import random
+import cProfile
 import numpy as np
-from typing import Dict, List, Optional
-from threading import Thread
+from typing import Callable, Dict, List, Optional, Tuple
+from threading import Lock, Thread
 
 from app.models.schemas import (
     BenchmarkStatus, BenchmarkProgress, ModelBenchmarkResult,
-    IRMetrics, PerformanceMetrics, BenchmarkResults,
+    IRMetrics, PerformanceMetrics, BenchmarkResults, LoadTestLevelResult, StageTiming, BatchSizeProbe,
+    DistributedEmbedStats, ChunkingStats,
 )
 from app.embeddings.registry import get_embedder
-from app.benchmark.cache import embedding_cache
-from app.benchmark.retrieval import build_faiss_index, search_index
-from app.evaluation.ir_metrics import compute_all_metrics
+from app.datasets.loader import content_hash, document_hashes
+from app.datasets.chunking import ChunkSet, chunk_cache_key, chunk_documents, chunk_window
+from app.benchmark.cache import embedding_cache, query_embedding_cache, result_cache, index_cache
+from app.benchmark.retrieval import ChunkedIndex, index_size_bytes
+from app.benchmark.batching import (
+    length_sorted_batches, sequential_batches, scatter_batches, cap_batches_by_tokens,
+)
+from app.benchmark.autotune import get_tuned, tune_batch_size, provider_limits
+from app.benchmark.loadtest import run_load_test
+from app.benchmark.sequential import SequentialStopper
+from app.benchmark.columnar import PerQueryStore, RelevanceCSR
+from app.benchmark.checkpoint import RunCheckpoint, list_checkpoints
+from app.benchmark.distributed import embed_distributed
+from app.evaluation.ir_metrics import compute_all_metrics, compute_per_query_metrics
 from app.evaluation.performance import LatencyTracker, compute_performance_metrics, estimate_token_count
-from app.config import MODEL_REGISTRY
+from app.evaluation.profiling import StageTimer, activate_timer, span
+from app.evaluation.memory import MemoryProbe
+from app.monitoring.metrics import registry, runs_total, Gauge
+from app.config import (
+    MODEL_REGISTRY, LENGTH_SORTED_BATCHING, WARMUP_BATCHES, WARMUP_BATCH_SIZE, DEFAULT_BATCH_SIZE,
+    CHECKPOINTS_ENABLED, RESUME_ON_STARTUP, RUN_STALE_AFTER_SEC,
+)
 
 
 # In-memory store for benchmark runs
 _runs: Dict[str, dict] = {}
 
 
+def _count_runs_by_status() -> Dict[tuple, float]:
+    counts = {(status.value,): 0.0 for status in BenchmarkStatus}
+    for run in list(_runs.values()):
+        counts[(BenchmarkStatus(run["status"]).value,)] += 1
+    return counts
+
+
+registry.register(Gauge(
+    "benchmark_runs", "Benchmark runs currently held, by status (running = active, pending = queued).",
+    ("status",), callback=_count_runs_by_status,
+))
+
+
 def get_run(run_id: str) -> Optional[dict]:
     return _runs.get(run_id)
 
 
+def register_run(run: dict):
+    """Add a run (benchmark, sweep or scaling) to the shared run store."""
+    _runs[run["run_id"]] = run
+
+
+def unit_cache_key(run: dict, model_id: str) -> str:
+    """Embedding/index cache key a run used for a model: its dataset, or the dataset's chunks."""
+    chunking = run.get("chunking")
+    if not chunking:
+        return run["dataset_id"]
+    window = chunk_window(chunking["max_tokens"], MODEL_REGISTRY.get(model_id, {}).get("max_tokens", 512))
+    return chunk_cache_key(run["dataset_id"], chunking["strategy"], window, chunking["overlap_tokens"])
+
+
 def list_runs() -> List[dict]:
     return list(_runs.values())
 
 
+def delete_run(run_id: str) -> bool:
+    RunCheckpoint(run_id).delete()
+    return _runs.pop(run_id, None) is not None
+
+
 def start_benchmark(
     run_id: str,
     dataset_id: str,
@@ -39,36 +91,165 @@ def start_benchmark(
     top_k_values: List[int],
     similarity_metric: str,
     normalize: bool,
+    load_test: Optional[dict] = None,
+    profile: bool = False,
+    early_stopping: Optional[dict] = None,
+    force: bool = False,
+    autotune_batch_size: bool = False,
+    distributed: bool = False,
+    chunking: Optional[dict] = None,
+    trace_allocations: bool = False,
 ):
     """Initialize and start a benchmark run in a background thread."""
-    _runs[run_id] = {
+    spec = {
         "run_id": run_id,
         "dataset_id": dataset_id,
+        "documents": documents,
+        "queries": queries,
+        "model_ids": model_ids,
+        "top_k_values": top_k_values,
+        "similarity_metric": similarity_metric,
+        "normalize": normalize,
+        "load_test": load_test,
+        "profile": profile,
+        "early_stopping": early_stopping,
+        "force": force,
+        "autotune_batch_size": autotune_batch_size,
+        "distributed": distributed,
+        "chunking": chunking,
+        "trace_allocations": trace_allocations,
+    }
+    checkpoint = None
+    if CHECKPOINTS_ENABLED:
+        checkpoint = RunCheckpoint(run_id)
+        checkpoint.save_spec(spec)
+    register_run(_new_run(spec))
+    _launch(spec, checkpoint)
+
+
+def _new_run(spec: dict) -> dict:
+    return {
+        "run_id": spec["run_id"],
+        "dataset_id": spec["dataset_id"],
         "status": BenchmarkStatus.running,
         "current_model": None,
         "models_completed": 0,
-        "total_models": len(model_ids),
+        "total_models": len(spec["model_ids"]),
         "documents_embedded": 0,
-        "total_documents": len(documents),
+        "total_documents": len(spec["documents"]),
         "queries_processed": 0,
-        "total_queries": len(queries),
+        "total_queries": len(spec["queries"]),
         "elapsed_seconds": 0,
         "eta_seconds": None,
         "model_results": [],
-        "model_ids": model_ids,
-        "top_k_values": top_k_values,
-        "similarity_metric": similarity_metric,
+        "per_query_metrics": {},
+        "per_query_store": {},
+        "stopping_curves": {},
+        "model_ids": spec["model_ids"],
+        "top_k_values": spec["top_k_values"],
+        "similarity_metric": spec["similarity_metric"],
+        "normalize": spec["normalize"],
+        "chunking": spec.get("chunking"),
+        "heartbeat_at": time.time(),
         "cancelled": False,
     }
 
+
+def _launch(spec: dict, checkpoint: Optional[RunCheckpoint]):
     thread = Thread(
         target=_run_benchmark,
-        args=(run_id, dataset_id, documents, queries, model_ids, top_k_values, similarity_metric, normalize),
+        args=(spec["run_id"], spec["dataset_id"], spec["documents"], spec["queries"], spec["model_ids"],
+              spec["top_k_values"], spec["similarity_metric"], spec["normalize"]),
+        kwargs={"load_test": spec["load_test"], "profile": spec["profile"],
+                "early_stopping": spec["early_stopping"], "force": spec["force"],
+                "autotune_batch_size": spec["autotune_batch_size"],
+                "distributed": spec.get("distributed", False), "chunking": spec.get("chunking"),
+                "trace_allocations": spec.get("trace_allocations", False), "checkpoint": checkpoint},
         daemon=True,
     )
+    _runs[spec["run_id"]]["thread"] = thread
     thread.start()
 
 
+def _restore_run(checkpoint: RunCheckpoint, spec: dict) -> dict:
+    """Rebuild a run dict from its checkpoint, including finished models."""
+    run = _new_run(spec)
+    _init_lookup_tables(run, spec["documents"], spec["queries"])
+    for model in checkpoint.load_models():
+        model_id = model["result"].model_id
+        run["model_results"].append(model["result"])
+        run["per_query_metrics"][model_id] = model["per_query_metrics"]
+        run["per_query_store"][model_id] = model["per_query_store"]
+        if model["stopping_curve"] is not None:
+            run["stopping_curves"][model_id] = model["stopping_curve"]
+    run["models_completed"] = len(run["model_results"])
+    return run
+
+
+def is_stale(run: dict) -> bool:
+    """A running run whose worker died or has made no progress for RUN_STALE_AFTER_SEC."""
+    if run["status"] != BenchmarkStatus.running or run.get("kind"):
+        return False
+    thread = run.get("thread")
+    if thread is not None and not thread.is_alive():
+        return True
+    return time.time() - run.get("heartbeat_at", time.time()) > RUN_STALE_AFTER_SEC
+
+
+def resume_benchmark(run_id: str) -> bool:
+    """Continue a run from its checkpoint: finished models are kept and
+    checkpointed document batches are not re-embedded.
+
+    Returns False if there is no checkpoint, the run already completed, or
+    it is still actively running.
+    """
+    run = _runs.get(run_id)
+    if run and run["status"] == BenchmarkStatus.running and not is_stale(run):
+        return False
+    checkpoint = RunCheckpoint(run_id)
+    spec = checkpoint.load_spec() if checkpoint.exists() else None
+    if not spec or checkpoint.read_state().get("status") == BenchmarkStatus.completed.value:
+        return False
+    if run:
+        run["cancelled"] = True  # a stuck worker stops at its next check
+    _runs[run_id] = _restore_run(checkpoint, spec)
+    checkpoint.write_state("running")
+    _launch(spec, checkpoint)
+    return True
+
+
+def recover_runs(auto_resume: bool = RESUME_ON_STARTUP) -> List[str]:
+    """Load checkpointed runs after a restart.
+
+    Completed runs come back as results. Runs that were still running when the
+    process died are marked interrupted, and resumed if ``auto_resume``.
+    Returns the ids of resumed runs.
+    """
+    resumed = []
+    for run_id in list_checkpoints():
+        if run_id in _runs:
+            continue
+        checkpoint = RunCheckpoint(run_id)
+        spec = checkpoint.load_spec()
+        state = checkpoint.read_state()
+        status = state.get("status", BenchmarkStatus.failed.value)
+        if status == BenchmarkStatus.running.value:
+            if auto_resume:
+                _runs[run_id] = _restore_run(checkpoint, spec)
+                checkpoint.write_state("running")
+                _launch(spec, checkpoint)
+                resumed.append(run_id)
+                continue
+            status = BenchmarkStatus.interrupted.value
+            checkpoint.write_state(status)
+        run = _restore_run(checkpoint, spec)
+        run["status"] = BenchmarkStatus(status)
+        run["error"] = state.get("error")
+        run["elapsed_seconds"] = state.get("elapsed_seconds", 0)
+        _runs[run_id] = run
+    return resumed
+
+
 def cancel_benchmark(run_id: str) -> bool:
     run = _runs.get(run_id)
     if not run or run["status"] != BenchmarkStatus.running:
@@ -87,106 +268,278 @@ def _run_benchmark(
     top_k_values: List[int],
     similarity_metric: str,
     normalize: bool,
+    load_test: Optional[dict] = None,
+    profile: bool = False,
+    early_stopping: Optional[dict] = None,
+    force: bool = False,
+    autotune_batch_size: bool = False,
+    distributed: bool = False,
+    chunking: Optional[dict] = None,
+    trace_allocations: bool = False,
+    checkpoint: Optional[RunCheckpoint] = None,
 ):
-    """Background worker that runs the full benchmark."""
+    """Background worker that runs the full benchmark.
+
+    With ``early_stopping`` set, queries are evaluated in one shared random
+    order and each model stops once ``SequentialStopper`` is satisfied.
+    Models whose configuration fingerprint is in ``result_cache`` are served
+    from it unless ``force`` is set; runs with a load test always execute.
+    Documents are embedded at the batch size tuned for (model, hardware),
+    re-probed first when ``autotune_batch_size`` is set. With a
+    ``checkpoint``, embedded batches and finished models are written to disk
+    and models already in ``run["model_results"]`` (restored on resume) are
+    skipped. With ``distributed``, every model's uncached documents are first
+    embedded on the configured workers, then evaluated here from the cache.
+    With ``chunking``, each model embeds and indexes chunks sized to its
+    ``max_tokens`` and documents are ranked by aggregated chunk scores.
+    The timed embedding loop samples RSS only; ``trace_allocations`` adds an
+    untimed re-embed of the first batch under tracemalloc for the
+    allocation peak.
+    """
     run = _runs[run_id]
     start_time = time.time()
     doc_texts = [d["text"] for d in documents]
     doc_ids = [d["doc_id"] for d in documents]
     max_k = max(top_k_values)
 
+    all_grades = []
+    for q in queries:
+        grades = q.get("relevance_grades") or {}
+        if not grades:
+            grades = {d: 3 for d in q["relevant_doc_ids"]}
+        all_grades.append(grades)
+
+    query_order = list(range(len(queries)))
+    if early_stopping:
+        random.Random(early_stopping["seed"]).shuffle(query_order)
+    stopping_curves: Dict[str, np.ndarray] = run["stopping_curves"]
+    finished = {r.model_id for r in run["model_results"]}
+
+    _init_lookup_tables(run, documents, queries)
+    doc_index = {d: i for i, d in enumerate(run["doc_vocab"])}
+    dataset_hash = content_hash(documents, queries)
+    doc_hashes = document_hashes(documents)
+
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+
     try:
+        distributed_stats: Dict[str, dict] = {}
+        if distributed:
+            distributed_stats = _embed_on_workers(run, model_ids, finished, dataset_id, doc_ids, doc_texts,
+                                                  doc_hashes, checkpoint)
+            if run.get("cancelled"):
+                return
+
         for model_idx, model_id in enumerate(model_ids):
             if run.get("cancelled"):
                 return
+            if model_id in finished:
+                continue
 
             run["current_model"] = model_id
             embedder = get_embedder(model_id)
             model_entry = MODEL_REGISTRY.get(model_id, {})
-            embed_latency = LatencyTracker()
+
+            memo_key = None
+            if not load_test:
+                memo_key = result_cache.fingerprint(
+                    dataset_hash, embedder, similarity_metric, normalize, top_k_values, early_stopping, chunking,
+                )
+                memo = None if force else result_cache.get(memo_key)
+                if memo:
+                    run["model_results"].append(memo["result"].model_copy(update={"from_cache": True}))
+                    run["per_query_metrics"][model_id] = memo["per_query_metrics"]
+                    run["per_query_store"][model_id] = memo["per_query_store"]
+                    if memo["stopping_curve"] is not None:
+                        stopping_curves[model_id] = memo["stopping_curve"]
+                    if checkpoint:
+                        checkpoint.save_model(
+                            model_idx, run["model_results"][-1], memo["per_query_metrics"],
+                            memo["per_query_store"], memo["stopping_curve"],
+                        )
+                    run["models_completed"] = model_idx + 1
+                    continue
+
             query_latency = LatencyTracker()
+            query_cache_hits = 0
+            timer = StageTimer()
+            activate_timer(timer)
+
+            # ── Units to embed: whole documents, or their chunks ─────────
+            chunks = None
+            unit_key = unit_cache_key(run, model_id)
+            unit_ids, unit_texts, unit_hashes = doc_ids, doc_texts, doc_hashes
+            if chunking:
+                window = chunk_window(chunking["max_tokens"], model_entry.get("max_tokens", 512))
+                with span("chunking"):
+                    chunks = chunk_documents(documents, window, chunking["overlap_tokens"], chunking["strategy"])
+                unit_ids, unit_texts, unit_hashes = chunks.chunk_ids, chunks.texts, chunks.hashes
+                run["total_documents"] = len(unit_ids)
+
+            # ── Embed documents new or changed since the cached version ──
+            embedded = embed_corpus(
+                run, embedder, model_id, unit_key, unit_ids, unit_texts, unit_hashes,
+                model_idx=model_idx, checkpoint=checkpoint,
+                autotune=autotune_batch_size, trace_allocations=trace_allocations,
+            )
+            if embedded is None:
+                return
+            doc_embeddings, pending, reuse = embedded["embeddings"], embedded["pending"], embedded["reuse"]
+            embed_latency, batch_latency = embedded["embed_latency"], embedded["batch_latency"]
+            tuning, load_ms = embedded["tuning"], embedded["load_ms"]
+            if model_id in distributed_stats:
+                # Documents were embedded remotely; their shard timings stand in for the local loop's
+                for embed_ms, n_docs, n_batches in distributed_stats[model_id].pop("shard_timings", []):
+                    embed_latency.record(embed_ms / n_docs, count=n_docs)
+                    batch_latency.record(embed_ms / n_batches, count=n_batches)
+
+            total_embed_time = batch_latency.total_ms / 1000 if batch_latency.count else 0.01
+
+            # ── Sync the cached FAISS index with this dataset version ────
+            with MemoryProbe() as index_mem:
+                index = index_cache.get_or_create(
+                    model_id, unit_key, similarity_metric, normalize, doc_embeddings.shape[1],
+                )
+                index.sync(doc_embeddings, unit_ids, {unit_ids[i] for i in pending})
+                if chunks:
+                    index = ChunkedIndex(index, doc_embeddings, unit_ids, chunks.doc_ids, chunking["aggregation"])
+
+            memory_stats = {
+                "model_load_rss_mb": embedded["load_rss_mb"],
+                "embeddings_matrix_mb": doc_embeddings.nbytes / (1024 * 1024),
+                "index_size_mb": index_size_bytes(index.index) / (1024 * 1024),
+                "index_build_peak_rss_delta_mb": index_mem.peak_rss_delta_mb,
+                "index_build_alloc_peak_mb": index_mem.alloc_peak_mb,
+            }
+            if pending:
+                memory_stats["embed_peak_rss_delta_mb"] = embedded["embed_peak_rss_delta_mb"]
+                memory_stats["embed_alloc_peak_mb"] = embedded["embed_alloc_peak_mb"]
 
-            # ── Embed documents ──────────────────────────────────────────
-            cached = embedding_cache.get_doc_embeddings(model_id, dataset_id)
-            if cached:
-                doc_embeddings, cached_ids = cached
-            else:
-                batch_size = 32
-                all_vecs = []
-                for i in range(0, len(doc_texts), batch_size):
+            # ── Run queries ──────────────────────────────────────────────
+            all_retrieved = []
+            per_query_store = PerQueryStore(len(queries))
+            search_latency = LatencyTracker()
+            stopper = SequentialStopper(early_stopping, stopping_curves) if early_stopping else None
+            stop_reason = None
+
+            with span("queries"):
+                for qi, q_idx in enumerate(query_order):
                     if run.get("cancelled"):
                         return
-                    batch = doc_texts[i:i + batch_size]
-                    t0 = time.perf_counter()
-                    vecs = embedder.embed_documents(batch)
-                    elapsed_ms = (time.perf_counter() - t0) * 1000
-                    for _ in batch:
-                        embed_latency.record(elapsed_ms / len(batch))
-                    all_vecs.append(vecs)
-                    run["documents_embedded"] = min(i + batch_size, len(doc_texts))
-
-                doc_embeddings = np.vstack(all_vecs)
-                if normalize:
-                    norms = np.linalg.norm(doc_embeddings, axis=1, keepdims=True)
-                    doc_embeddings = doc_embeddings / np.maximum(norms, 1e-10)
-                embedding_cache.set_doc_embeddings(model_id, dataset_id, doc_embeddings.copy(), doc_ids)
+                    q = queries[q_idx]
 
-            total_embed_time = sum(embed_latency.samples) / 1000 if embed_latency.samples else 0.01
-
-            # ── Build FAISS index ────────────────────────────────────────
-            index_embeddings = doc_embeddings.copy()
-            index = build_faiss_index(index_embeddings, similarity_metric)
+                    t0 = time.perf_counter()
+                    with span("embed_query"):
+                        q_vec, n_hits = query_embedding_cache.embed(embedder, [q["query"]])
+                    if n_hits:
+                        query_cache_hits += n_hits
+                    else:
+                        query_latency.record((time.perf_counter() - t0) * 1000)
 
-            # ── Run queries ──────────────────────────────────────────────
-            all_retrieved = []
-            per_query_results = []
-
-            for qi, q in enumerate(queries):
-                if run.get("cancelled"):
-                    return
-
-                t0 = time.perf_counter()
-                q_vec = embedder.embed_queries([q["query"]])
-                if normalize:
-                    norms = np.linalg.norm(q_vec, axis=1, keepdims=True)
-                    q_vec = q_vec / np.maximum(norms, 1e-10)
-                query_latency.record((time.perf_counter() - t0) * 1000)
-
-                hits = search_index(index, q_vec, doc_ids, max_k, similarity_metric)
-                retrieved_ids = [h[0] for h in hits[0]]
-                all_retrieved.append(retrieved_ids)
-
-                per_query_results.append({
-                    "query": q["query"],
-                    "retrieved": [{"doc_id": h[0], "score": round(h[1], 4)} for h in hits[0][:10]],
-                    "relevant": q["relevant_doc_ids"],
-                })
-                run["queries_processed"] = qi + 1
+                    t0 = time.perf_counter()
+                    hits = index.search(q_vec, max_k)
+                    search_latency.record((time.perf_counter() - t0) * 1000)
+                    with span("result_assembly"):
+                        retrieved_ids = [h[0] for h in hits[0]]
+                        all_retrieved.append(retrieved_ids)
+
+                        per_query_store.append(
+                            q_idx, [doc_index[h[0]] for h in hits[0]], [h[1] for h in hits[0]],
+                        )
+                    run["queries_processed"] = qi + 1
+                    _heartbeat(run, checkpoint)
+
+                    if stopper:
+                        stopper.record(retrieved_ids, set(q["relevant_doc_ids"]), all_grades[q_idx])
+                        stop_reason = stopper.check()
+                        if stop_reason:
+                            break
+
+            if stopper:
+                stopping_curves[model_id] = np.asarray(stopper.values)
+            run["per_query_store"][model_id] = per_query_store.trim()
 
             # ── Compute metrics ──────────────────────────────────────────
-            all_relevant = [set(q["relevant_doc_ids"]) for q in queries]
-            all_grades = []
-            for q in queries:
-                grades = q.get("relevance_grades") or {}
-                if not grades:
-                    grades = {d: 3 for d in q["relevant_doc_ids"]}
-                all_grades.append(grades)
-
-            ir = compute_all_metrics(all_retrieved, all_relevant, all_grades, top_k_values)
-
-            total_tokens = sum(estimate_token_count(t) for t in doc_texts)
-            perf = compute_performance_metrics(
-                embed_latency, query_latency, total_embed_time,
-                len(doc_texts), model_entry.get("dimension", 384),
-                total_tokens, model_entry.get("cost_per_1k_tokens", 0),
-            )
-
-            run["model_results"].append(ModelBenchmarkResult(
+            evaluated = query_order[:len(all_retrieved)]
+            all_relevant = [set(queries[i]["relevant_doc_ids"]) for i in evaluated]
+            evaluated_grades = [all_grades[i] for i in evaluated]
+
+            ir = compute_all_metrics(all_retrieved, all_relevant, evaluated_grades, top_k_values)
+            per_query_metrics = compute_per_query_metrics(all_retrieved, all_relevant, evaluated_grades, top_k_values)
+            run["per_query_metrics"][model_id] = {
+                name: np.asarray(values, dtype=np.float32) for name, values in per_query_metrics.items()
+            }
+
+            with span("performance_metrics"):
+                total_tokens = sum(estimate_token_count(t) for t in unit_texts)
+                perf = compute_performance_metrics(
+                    embed_latency, query_latency, total_embed_time,
+                    len(pending) or len(unit_texts), model_entry.get("dimension", 384),
+                    total_tokens, model_entry.get("cost_per_1k_tokens", 0),
+                    batch_token_lengths=embedded["batch_token_lengths"],
+                    model_load_time_ms=load_ms,
+                    cold_start_ms=embedded["cold_start_ms"],
+                    warmup_batches=embedded["warmup_batches"],
+                    batch_latencies=batch_latency,
+                    memory_stats=memory_stats,
+                    query_tokens_avg=float(np.mean([estimate_token_count(q["query"]) for q in queries])) if queries else 0.0,
+                    query_cache_hits=query_cache_hits,
+                )
+                perf["documents_embedded"] = len(pending)
+                perf["documents_reused"] = len(reuse)
+                chunk_stats = None
+                if chunks:
+                    chunk_stats = _chunking_stats(
+                        chunks, doc_texts, model_entry, total_tokens, total_embed_time if pending else 0.0,
+                        search_latency, chunking["aggregation"],
+                    )
+                perf["batch_size"] = tuning["batch_size"] if tuning else DEFAULT_BATCH_SIZE
+                if model_id in distributed_stats:
+                    remote = distributed_stats[model_id]
+                    perf["documents_embedded"] = remote["documents"]
+                    perf["documents_reused"] = len(doc_ids) - remote["documents"]
+                    perf["total_embedding_time_sec"] = remote["wall_sec"]
+                    perf["throughput_docs_per_sec"] = round(remote["documents"] / max(remote["wall_sec"], 1e-9), 2)
+
+            # ── Load test (optional) ─────────────────────────────────────
+            load_test_results = None
+            if load_test:
+                with span("load_test"):
+                    load_test_results = [
+                        LoadTestLevelResult(**level) for level in _run_model_load_test(
+                            run, embedder, index, [q["query"] for q in queries], load_test, max_k, checkpoint,
+                        )
+                    ]
+
+            activate_timer(None)
+            model_result = ModelBenchmarkResult(
                 model_id=model_id,
                 ir_metrics=IRMetrics(**ir),
                 performance=PerformanceMetrics(**perf),
-                per_query_results=per_query_results,
-            ))
+                per_query_results=None,  # materialized from run["per_query_store"] on request
+                load_test=load_test_results,
+                stage_timings={path: StageTiming(**t) for path, t in timer.summary().items()},
+                queries_evaluated=len(all_retrieved),
+                early_stop_reason=stop_reason,
+                batch_size_curve=[BatchSizeProbe(**p) for p in tuning["curve"]] if tuning else None,
+                distributed=DistributedEmbedStats(**distributed_stats[model_id]) if model_id in distributed_stats else None,
+                chunking=ChunkingStats(**chunk_stats) if chunk_stats else None,
+            )
+            run["model_results"].append(model_result)
+            if checkpoint:
+                checkpoint.save_model(
+                    model_idx, model_result, run["per_query_metrics"][model_id],
+                    run["per_query_store"][model_id], stopping_curves.get(model_id),
+                )
+            if memo_key:
+                result_cache.set(memo_key, {
+                    "result": model_result,
+                    "per_query_metrics": run["per_query_metrics"][model_id],
+                    "per_query_store": run["per_query_store"][model_id],
+                    "stopping_curve": stopping_curves.get(model_id),
+                })
 
             run["models_completed"] = model_idx + 1
             run["documents_embedded"] = 0
@@ -206,3 +559,257 @@ def _run_benchmark(
     except Exception as e:
         run["status"] = BenchmarkStatus.failed
         run["error"] = str(e)
+
+    finally:
+        runs_total.inc(status=BenchmarkStatus(run["status"]).value)
+        activate_timer(None)
+        if checkpoint and _runs.get(run_id) is run:
+            status = BenchmarkStatus(run["status"]).value
+            checkpoint.write_state(status, error=run.get("error"), elapsed_seconds=run["elapsed_seconds"])
+            if status == BenchmarkStatus.completed.value:
+                checkpoint.drop_batches()
+        if profiler:
+            profiler.disable()
+            run["profiler"] = profiler
+
+
+def embed_corpus(run: dict, embedder, model_id: str, cache_key: str, unit_ids: List[str],
+                 unit_texts: List[str], unit_hashes: List[str], model_idx: int = 0,
+                 checkpoint: Optional[RunCheckpoint] = None, autotune: bool = False,
+                 trace_allocations: bool = False) -> Optional[dict]:
+    """Embed the units missing from the embedding cache and cache the merged raw matrix.
+
+    Unchanged rows are reused; the model is loaded and warmed up before the
+    timed loop, which runs token-capped batches and checkpoints each one.
+    Returns the matrix with its timings, or None if the run was cancelled.
+    """
+    if checkpoint:
+        _restore_batches(checkpoint, model_idx, model_id, cache_key)
+    embeddings, reuse = _reusable_rows(model_id, cache_key, unit_ids, unit_hashes)
+    pending = [i for i in range(len(unit_ids)) if i not in reuse]
+    out = {
+        "pending": pending,
+        "reuse": reuse,
+        "embed_latency": LatencyTracker(),
+        "batch_latency": LatencyTracker(),
+        "batch_token_lengths": [],
+        "tuning": get_tuned(model_id),
+    }
+
+    # ── Load & warm up (excluded from latency stats) ─────────────────
+    _heartbeat(run, checkpoint)
+    with span("load_warmup"):
+        with MemoryProbe(trace_allocations=False) as load_mem:
+            load_ms = embedder.load()
+        cold_start_ms = load_ms
+        # Warm-up only matters when units will be embedded; skip paying for it otherwise
+        warmup_texts = unit_texts[:WARMUP_BATCH_SIZE] if pending else []
+        if WARMUP_BATCHES > 0 and warmup_texts:
+            t0 = time.perf_counter()
+            embedder.warm_up(warmup_texts, batches=1)
+            cold_start_ms += (time.perf_counter() - t0) * 1000
+            if WARMUP_BATCHES > 1:
+                embedder.warm_up(warmup_texts, batches=WARMUP_BATCHES - 1)
+    _heartbeat(run, checkpoint)
+    out.update(
+        load_ms=load_ms,
+        load_rss_mb=load_mem.rss_delta_mb if load_ms else 0.0,
+        cold_start_ms=cold_start_ms,
+        warmup_batches=WARMUP_BATCHES if warmup_texts else 0,
+    )
+
+    if not pending:
+        # Nothing to embed, but removals may have shifted rows
+        order = [reuse[i] for i in range(len(unit_ids))]
+        if order != list(range(len(embeddings))):
+            embeddings = embeddings[order]
+            embedding_cache.set_doc_embeddings(model_id, cache_key, embeddings, unit_ids, unit_hashes)
+        out["embeddings"] = embeddings
+        return out
+
+    pending_texts = [unit_texts[i] for i in pending]
+    if autotune:
+        run["current_phase"] = "autotune"
+        with span("autotune"):
+            # Sample the whole corpus, not just the pending rows an incremental update left
+            out["tuning"] = tune_batch_size(embedder, unit_texts, should_stop=_keepalive(run, checkpoint))
+        run["current_phase"] = None
+    batch_size = out["tuning"]["batch_size"] if out["tuning"] else DEFAULT_BATCH_SIZE
+    with span("embed_documents"), MemoryProbe(trace_allocations=False) as embed_mem:
+        make_batches = length_sorted_batches if LENGTH_SORTED_BATCHING else sequential_batches
+        batches = cap_batches_by_tokens(
+            make_batches(pending_texts, batch_size), pending_texts, provider_limits(model_id)["max_tokens"],
+        )
+        all_vecs = []
+        for batch_idx in batches:
+            if run.get("cancelled"):
+                return None
+            batch = [pending_texts[j] for j in batch_idx]
+            t0 = time.perf_counter()
+            with span("provider_call"):
+                vecs = embedder.embed_documents(batch)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            out["batch_latency"].record(elapsed_ms)
+            out["embed_latency"].record(elapsed_ms / len(batch), count=len(batch))
+            all_vecs.append(vecs)
+            out["batch_token_lengths"].append([estimate_token_count(t) for t in batch])
+            run["documents_embedded"] += len(batch)
+            if checkpoint:
+                rows = [pending[j] for j in batch_idx]
+                checkpoint.save_batch(
+                    model_idx, [unit_ids[r] for r in rows], [unit_hashes[r] for r in rows], vecs,
+                )
+            _heartbeat(run, checkpoint)
+
+        # Cache raw vectors in dataset order; normalization happens at index time
+        fresh = scatter_batches(batches, all_vecs)
+        merged = np.empty((len(unit_ids), fresh.shape[1]), dtype=np.float32)
+        merged[pending] = fresh
+        if reuse:
+            merged[list(reuse)] = embeddings[list(reuse.values())]
+        embedding_cache.set_doc_embeddings(model_id, cache_key, merged, unit_ids, unit_hashes)
+    out["embeddings"] = merged
+    out["embed_peak_rss_delta_mb"] = embed_mem.peak_rss_delta_mb
+    out["embed_alloc_peak_mb"] = 0.0
+
+    if trace_allocations:
+        # Separate pass: tracemalloc slows every allocation, so it stays out of the timed loop
+        with span("trace_allocations"), MemoryProbe() as alloc_probe:
+            embedder.embed_documents([pending_texts[j] for j in batches[0]])
+        out["embed_alloc_peak_mb"] = alloc_probe.alloc_peak_mb
+    return out
+
+
+def embed_query_set(run: dict, embedder, query_texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """Raw query matrix, served from the query-embedding cache where possible."""
+    vecs = []
+    for i in range(0, len(query_texts), batch_size):
+        chunk, _ = query_embedding_cache.embed(embedder, query_texts[i:i + batch_size])
+        vecs.append(chunk)
+        run["queries_processed"] = min(i + batch_size, len(query_texts))
+    return np.vstack(vecs)
+
+
+def _heartbeat(run: dict, checkpoint: Optional[RunCheckpoint] = None):
+    run["heartbeat_at"] = time.time()
+    if checkpoint:
+        checkpoint.heartbeat()
+
+
+def _keepalive(run: dict, checkpoint: Optional[RunCheckpoint] = None) -> Callable[[], bool]:
+    """``should_stop`` callback that also records a heartbeat; safe to poll from worker threads."""
+    lock = Lock()
+
+    def should_stop() -> bool:
+        with lock:
+            _heartbeat(run, checkpoint)
+        return bool(run.get("cancelled"))
+
+    return should_stop
+
+
+def _restore_batches(checkpoint: RunCheckpoint, model_idx: int, model_id: str, dataset_id: str):
+    """Seed the embedding cache with a model's checkpointed batches (after a restart)."""
+    if embedding_cache.has(model_id, dataset_id):
+        return
+    restored = checkpoint.load_batches(model_idx)
+    if restored:
+        ids, hashes, vecs = restored
+        embedding_cache.set_doc_embeddings(model_id, dataset_id, vecs, ids, hashes)
+
+
+def _embed_on_workers(run: dict, model_ids: List[str], finished: set, dataset_id: str, doc_ids: List[str],
+                      doc_texts: List[str], doc_hashes: List[str],
+                      checkpoint: Optional[RunCheckpoint]) -> Dict[str, dict]:
+    """Embed every unfinished model's uncached documents on the worker pool."""
+    pending_rows = {}
+    for model_idx, model_id in enumerate(model_ids):
+        if model_id in finished:
+            continue
+        if checkpoint:
+            _restore_batches(checkpoint, model_idx, model_id, dataset_id)
+        _, reuse = _reusable_rows(model_id, dataset_id, doc_ids, doc_hashes)
+        pending_rows[model_id] = [i for i in range(len(doc_ids)) if i not in reuse]
+
+    def _checkpoint_shard(model_id: str, rows: List[int], vectors: np.ndarray):
+        checkpoint.save_batch(
+            model_ids.index(model_id), [doc_ids[r] for r in rows], [doc_hashes[r] for r in rows], vectors,
+        )
+        checkpoint.heartbeat()
+
+    run["current_phase"] = "distributed_embed"
+    try:
+        return embed_distributed(
+            run, model_ids, dataset_id, doc_ids, doc_texts, doc_hashes, pending_rows,
+            on_shard=_checkpoint_shard if checkpoint else None,
+        )
+    finally:
+        run["current_phase"] = None
+
+
+def _chunking_stats(chunks: ChunkSet, doc_texts: List[str], model_entry: dict, chunk_tokens: int,
+                    embed_time_sec: float, search_latency: LatencyTracker, aggregation: str) -> dict:
+    """Chunk counts and the cost/latency of chunking relative to one truncated pass per document."""
+    per_doc = chunks.chunks_per_doc()
+    max_tokens = model_entry.get("max_tokens", 512)
+    baseline_tokens = sum(min(estimate_token_count(t), max_tokens) for t in doc_texts)
+    extra_tokens = max(chunk_tokens - baseline_tokens, 0)
+    return {
+        "window_tokens": chunks.window,
+        "chunks": len(chunks.chunk_ids),
+        "documents_chunked": sum(1 for n in per_doc.values() if n > 1),
+        "avg_chunks_per_doc": round(len(chunks.chunk_ids) / max(len(per_doc), 1), 2),
+        "extra_tokens": extra_tokens,
+        "extra_cost_usd": round(extra_tokens / 1000 * model_entry.get("cost_per_1k_tokens", 0), 6),
+        "extra_embedding_time_sec": round(embed_time_sec * extra_tokens / max(chunk_tokens, 1), 3),
+        "search_latency_avg_ms": round(search_latency.avg, 3),
+        "aggregation": aggregation,
+    }
+
+
+def _init_lookup_tables(run: dict, documents: list, queries: list):
+    """Shared lookup tables for columnar per-query results."""
+    vocab = [d["doc_id"] for d in documents]
+    run["query_texts"] = [q["query"] for q in queries]
+    run["relevance"] = RelevanceCSR.from_queries(queries, vocab)
+    run["doc_vocab"] = vocab
+
+
+def _reusable_rows(model_id: str, dataset_id: str, doc_ids: List[str],
+                   doc_hashes: List[str]) -> Tuple[Optional[np.ndarray], Dict[int, int]]:
+    """Cached matrix and {dataset row: cached row} for documents whose text is unchanged."""
+    cached = embedding_cache.get_doc_embeddings(model_id, dataset_id)
+    cached_hashes = embedding_cache.get_doc_hashes(model_id, dataset_id)
+    if not cached or cached_hashes is None:
+        return None, {}
+    embeddings, cached_ids = cached
+    cached_rows = {d: (i, h) for i, (d, h) in enumerate(zip(cached_ids, cached_hashes))}
+    reuse = {}
+    for i, (doc_id, h) in enumerate(zip(doc_ids, doc_hashes)):
+        row = cached_rows.get(doc_id)
+        if row and row[1] == h:
+            reuse[i] = row[0]
+    return embeddings, reuse
+
+
+def _run_model_load_test(run, embedder, index, query_texts, config, top_k,
+                         checkpoint: Optional[RunCheckpoint] = None) -> List[dict]:
+    """Drive embed_queries + index search at each configured load level.
+
+    Bypasses the query-embedding cache so every request reaches the provider,
+    and searches a snapshot of the index so concurrent requests don't queue on its lock.
+    """
+    snapshot = index.snapshot()
+
+    def request_fn(text: str):
+        q_vec = embedder.embed_queries([text])
+        snapshot.search(q_vec, top_k)
+
+    run["current_phase"] = "load_test"
+    try:
+        return run_load_test(
+            request_fn, query_texts, config["mode"], config["levels"],
+            config["requests_per_level"], should_stop=_keepalive(run, checkpoint),
+        )
+    finally:
+        run["current_phase"] = None
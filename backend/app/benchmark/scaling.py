@@ -0,0 +1,260 @@
+"""Corpus-scaling runs — real embeddings plus synthetic distractors, searched locally.
+
+Each dataset's real document vectors are padded with generated distractors
+up to the requested corpus sizes. Distractors are never relevant, so IR
+metrics measure how retrieval degrades as the haystack grows; build time,
+search latency and memory are measured per size and index type. Nothing is
+re-embedded beyond the dataset's own documents and queries.
+"""
+
+import time
+from threading import Thread
+from typing import Dict, Iterator, List, Optional
+
+import faiss
+import numpy as np
+
+from app.models.schemas import BenchmarkStatus, IRMetrics, ScalingPointResult
+from app.embeddings.registry import get_embedder
+from app.datasets.loader import document_hashes
+from app.benchmark.runner import embed_corpus, embed_query_set, get_run, register_run
+from app.benchmark.retrieval import make_index, needs_normalization
+from app.evaluation.ir_metrics import compute_all_metrics
+from app.evaluation.performance import LatencyTracker
+from app.evaluation.memory import MemoryProbe
+from app.monitoring.metrics import runs_total
+from app.config import HNSW_M, SCALING_CHUNK_SIZE, SCALING_MAX_INDEX_MB
+
+_MB = 1024 * 1024
+
+
+class DistractorSampler:
+    """Generates vectors that resemble a reference embedding set.
+
+    Without ``jitter`` it draws from a diagonal Gaussian fitted to the
+    reference and rescales each vector to a norm drawn from the reference
+    norms. With ``jitter`` it resamples reference rows and adds Gaussian
+    noise of ``jitter`` times the per-dimension spread, which keeps another
+    corpus's topical structure.
+    """
+
+    def __init__(self, reference: np.ndarray, seed: int = 42, jitter: Optional[float] = None):
+        self.reference = reference.astype(np.float32)
+        self.mean = self.reference.mean(axis=0)
+        self.std = self.reference.std(axis=0) + 1e-6
+        self.norms = np.linalg.norm(self.reference, axis=1)
+        self.seed = seed
+        self.jitter = jitter
+
+    def chunks(self, n: int, chunk_size: int = SCALING_CHUNK_SIZE) -> Iterator[np.ndarray]:
+        """Yield ``n`` vectors in chunks; the same seed always yields the same vectors."""
+        rng = np.random.default_rng(self.seed)
+        dim = self.reference.shape[1]
+        for start in range(0, n, chunk_size):
+            size = min(chunk_size, n - start)
+            if self.jitter is None:
+                vecs = rng.standard_normal((size, dim), dtype=np.float32) * self.std + self.mean
+                target = rng.choice(self.norms, size=size)
+                vecs *= (target / np.maximum(np.linalg.norm(vecs, axis=1), 1e-10))[:, None]
+            else:
+                rows = rng.integers(0, len(self.reference), size=size)
+                vecs = self.reference[rows] + rng.standard_normal((size, dim), dtype=np.float32) * (self.std * self.jitter)
+            yield vecs.astype(np.float32)
+
+
+def estimate_index_bytes(index_type: str, n: int, dim: int) -> int:
+    """Approximate resident size of a FAISS index over ``n`` vectors."""
+    vectors = n * dim * 4
+    if index_type == "hnsw":
+        return vectors + n * HNSW_M * 2 * 4  # level-0 links dominate the graph
+    if index_type == "ivf":
+        nlist = max(1, min(int(np.sqrt(n)), n // 39))
+        return vectors + n * 8 + nlist * dim * 4
+    return vectors
+
+
+def start_scaling(
+    run_id: str,
+    dataset_id: str,
+    documents: list,
+    queries: list,
+    model_ids: List[str],
+    corpus_sizes: List[int],
+    index_types: List[str],
+    similarity_metric: str,
+    normalize: bool,
+    top_k_values: List[int],
+    distractor_source: Optional[dict] = None,
+    seed: int = 42,
+):
+    """Register a scaling run in the shared run store and start it in a background thread."""
+    register_run({
+        "run_id": run_id,
+        "kind": "scaling",
+        "dataset_id": dataset_id,
+        "status": BenchmarkStatus.running,
+        "current_model": None,
+        "models_completed": 0,
+        "total_models": len(model_ids),
+        "documents_embedded": 0,
+        "total_documents": len(documents),
+        "queries_processed": 0,
+        "total_queries": len(queries),
+        "elapsed_seconds": 0,
+        "eta_seconds": None,
+        "model_ids": model_ids,
+        "top_k_values": top_k_values,
+        "similarity_metric": similarity_metric,
+        "scaling_baseline": {},
+        "scaling_points": [],
+        "model_results": [],
+        "cancelled": False,
+    })
+    thread = Thread(
+        target=_run_scaling,
+        args=(run_id, dataset_id, documents, queries, model_ids, sorted(set(corpus_sizes)), index_types,
+              similarity_metric, normalize, top_k_values, distractor_source, seed),
+        daemon=True,
+    )
+    thread.start()
+
+
+def _search_all(index: faiss.Index, query_embeddings: np.ndarray, doc_ids: List[str],
+                top_k: int, tracker: LatencyTracker) -> List[List[str]]:
+    """Search queries one at a time (for latency); distractor hits map to placeholder ids."""
+    n_real = len(doc_ids)
+    retrieved = []
+    for q in query_embeddings:
+        t0 = time.perf_counter()
+        _, indices = index.search(q[None, :], top_k)
+        tracker.record((time.perf_counter() - t0) * 1000)
+        retrieved.append([doc_ids[i] if i < n_real else f"~distractor_{i}" for i in indices[0] if i >= 0])
+    return retrieved
+
+
+def _degradation(baseline: dict, ir: dict, k: int) -> Dict[str, float]:
+    pairs = {
+        "mrr": (baseline["mrr"], ir["mrr"]),
+        "map": (baseline["map_score"], ir["map_score"]),
+        f"ndcg@{k}": (baseline["ndcg_at_k"][k], ir["ndcg_at_k"][k]),
+        f"recall@{k}": (baseline["recall_at_k"][k], ir["recall_at_k"][k]),
+    }
+    return {name: round((base - value) / base, 4) if base else 0.0 for name, (base, value) in pairs.items()}
+
+
+def _run_scaling(run_id: str, dataset_id: str, documents: list, queries: list, model_ids: List[str],
+                 corpus_sizes: List[int], index_types: List[str], metric: str, normalize: bool,
+                 top_k_values: List[int], distractor_source: Optional[dict], seed: int):
+    run = get_run(run_id)
+    start_time = time.time()
+    doc_texts = [d["text"] for d in documents]
+    doc_ids = [d["doc_id"] for d in documents]
+    doc_hashes = document_hashes(documents)
+    query_texts = [q["query"] for q in queries]
+    max_k = max(top_k_values)
+    all_relevant = [set(q["relevant_doc_ids"]) for q in queries]
+    all_grades = [q.get("relevance_grades") or {d: 3 for d in q["relevant_doc_ids"]} for q in queries]
+    normalized = needs_normalization(metric, normalize)
+
+    try:
+        for model_idx, model_id in enumerate(model_ids):
+            if run.get("cancelled"):
+                return
+            run["current_model"] = model_id
+            embedder = get_embedder(model_id)
+
+            embedded = embed_corpus(run, embedder, model_id, dataset_id, doc_ids, doc_texts, doc_hashes)
+            if embedded is None:
+                return
+            real = embedded["embeddings"].copy()
+            query_embeddings = embed_query_set(run, embedder, query_texts).copy()
+            if distractor_source:
+                source = distractor_source["documents"]
+                reference = embed_corpus(
+                    run, embedder, model_id, distractor_source["id"], [d["doc_id"] for d in source],
+                    [d["text"] for d in source], document_hashes(source),
+                )
+                if reference is None:
+                    return
+                sampler = DistractorSampler(reference["embeddings"], seed, jitter=0.1)
+            else:
+                sampler = DistractorSampler(real, seed)
+            if normalized:
+                faiss.normalize_L2(real)
+                faiss.normalize_L2(query_embeddings)
+            dim = real.shape[1]
+
+            # Exact search over the real corpus is the no-distractor reference point
+            exact = make_index(dim, len(real), metric, "flat")
+            exact.add(real)
+            baseline = compute_all_metrics(
+                _search_all(exact, query_embeddings, doc_ids, max_k, LatencyTracker()),
+                all_relevant, all_grades, top_k_values,
+            )
+            run["scaling_baseline"][model_id] = IRMetrics(**baseline)
+
+            for size in corpus_sizes:
+                n_distractors = max(0, size - len(real))
+                for index_type in index_types:
+                    if run.get("cancelled"):
+                        return
+                    run["current_phase"] = f"{size}/{index_type}"
+                    point = {
+                        "model_id": model_id, "corpus_size": len(real) + n_distractors,
+                        "distractors": n_distractors, "index_type": index_type,
+                    }
+                    est_bytes = estimate_index_bytes(index_type, point["corpus_size"], dim)
+                    point["index_memory_mb"] = round(est_bytes / _MB, 2)
+                    if est_bytes > SCALING_MAX_INDEX_MB * _MB:
+                        point["skipped"] = f"estimated index size exceeds SCALING_MAX_INDEX_MB ({SCALING_MAX_INDEX_MB:g})"
+                        run["scaling_points"].append(ScalingPointResult(**point))
+                        continue
+
+                    with MemoryProbe(trace_allocations=False) as mem:
+                        t0 = time.perf_counter()
+                        index = make_index(dim, point["corpus_size"], metric, index_type)
+                        for i, chunk in enumerate(sampler.chunks(n_distractors) if n_distractors else [None]):
+                            if normalized and chunk is not None:
+                                faiss.normalize_L2(chunk)
+                            if i == 0:
+                                if not index.is_trained:
+                                    index.train(real if chunk is None else np.vstack([real, chunk]))
+                                index.add(real)
+                            if chunk is not None:
+                                index.add(chunk)
+                        build_ms = (time.perf_counter() - t0) * 1000
+
+                    tracker = LatencyTracker()
+                    retrieved = _search_all(index, query_embeddings, doc_ids, max_k, tracker)
+                    ir = compute_all_metrics(retrieved, all_relevant, all_grades, top_k_values)
+                    del index
+
+                    run["scaling_points"].append(ScalingPointResult(
+                        **point,
+                        ir_metrics=IRMetrics(**ir),
+                        degradation=_degradation(baseline, ir, max_k),
+                        index_build_ms=round(build_ms, 2),
+                        search_latency_avg_ms=round(tracker.avg, 4),
+                        search_latency_p50_ms=round(tracker.p50, 4),
+                        search_latency_p95_ms=round(tracker.p95, 4),
+                        search_latency_p99_ms=round(tracker.p99, 4),
+                        build_rss_delta_mb=round(mem.peak_rss_delta_mb, 2),
+                    ))
+
+            run["models_completed"] = model_idx + 1
+            run["documents_embedded"] = 0
+            run["queries_processed"] = 0
+            run["elapsed_seconds"] = time.time() - start_time
+
+        run["status"] = BenchmarkStatus.completed
+        run["elapsed_seconds"] = time.time() - start_time
+        run["eta_seconds"] = 0
+        run["current_model"] = None
+        run["current_phase"] = None
+
+    except Exception as e:
+        run["status"] = BenchmarkStatus.failed
+        run["error"] = str(e)
+
+    finally:
+        runs_total.inc(status=BenchmarkStatus(run["status"]).value)
@@ -0,0 +1,57 @@
+"""Sequential evaluation — stop querying a model once its metric estimate is precise enough."""
+
+import math
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.evaluation.ir_metrics import query_metric
+
+
+class SequentialStopper:
+    """Tracks one per-query metric for a model and decides when to stop.
+
+    Stops when the running CI half-width drops to ``ci_half_width`` or, if
+    ``stop_on_separation`` is set, when the paired-difference CI against every
+    previously evaluated model excludes zero. Queries are consumed in the same
+    shuffled order for every model, so prefixes are paired.
+    """
+
+    def __init__(self, config: dict, previous: Dict[str, np.ndarray]):
+        self.metric = config["metric"]
+        self.batch_size = config["batch_size"]
+        self.min_queries = config["min_queries"]
+        self.ci_half_width = config.get("ci_half_width")
+        self.stop_on_separation = config.get("stop_on_separation", True)
+        # Two-sided normal quantile for the configured confidence
+        self.z = NormalDist().inv_cdf(0.5 + config.get("confidence", 0.95) / 2)
+        self.previous = previous
+        self.values: List[float] = []
+
+    def record(self, retrieved: List[str], relevant: set, grades: Dict[str, int]):
+        self.values.append(query_metric(self.metric, retrieved, relevant, grades))
+
+    def _half_width(self, values: np.ndarray) -> float:
+        if len(values) < 2:
+            return math.inf
+        return self.z * float(values.std(ddof=1)) / math.sqrt(len(values))
+
+    def check(self) -> Optional[str]:
+        """Return a stop reason at batch boundaries once enough queries are in, else None."""
+        n = len(self.values)
+        if n < self.min_queries or n % self.batch_size:
+            return None
+        current = np.asarray(self.values)
+        if self.ci_half_width is not None and self._half_width(current) <= self.ci_half_width:
+            return "precision"
+        if self.stop_on_separation and self.previous:
+            for other in self.previous.values():
+                m = min(n, len(other))
+                if m < self.min_queries:
+                    return None
+                diff = current[:m] - other[:m]
+                if abs(float(diff.mean())) <= self._half_width(diff):
+                    return None
+            return "separation"
+        return None
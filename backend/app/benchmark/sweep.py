@@ -0,0 +1,134 @@
+"""Configuration sweeps — embed each text once, evaluate many retrieval setups.
+
+Raw document and query vectors come from (or fill) the shared caches; every
+metric × normalize × index-type combination then only rebuilds the FAISS
+index and re-runs a batched search.
+"""
+
+import time
+import itertools
+from threading import Thread
+from typing import List
+
+from app.models.schemas import BenchmarkStatus, IRMetrics, SweepConfigResult
+from app.embeddings.registry import get_embedder
+from app.datasets.loader import document_hashes
+from app.benchmark.runner import embed_corpus, embed_query_set, get_run, register_run
+from app.benchmark.retrieval import build_faiss_index, search_index, index_size_bytes
+from app.evaluation.ir_metrics import compute_all_metrics
+from app.monitoring.metrics import runs_total
+
+
+def start_sweep(
+    run_id: str,
+    dataset_id: str,
+    documents: list,
+    queries: list,
+    model_ids: List[str],
+    top_k_values: List[int],
+    metrics: List[str],
+    normalize_options: List[bool],
+    index_types: List[str],
+):
+    """Register a sweep in the shared run store and start it in a background thread."""
+    configs = list(itertools.product(metrics, normalize_options, index_types))
+    register_run({
+        "run_id": run_id,
+        "kind": "sweep",
+        "dataset_id": dataset_id,
+        "status": BenchmarkStatus.running,
+        "current_model": None,
+        "models_completed": 0,
+        "total_models": len(model_ids),
+        "documents_embedded": 0,
+        "total_documents": len(documents),
+        "queries_processed": 0,
+        "total_queries": len(queries),
+        "elapsed_seconds": 0,
+        "eta_seconds": None,
+        "model_ids": model_ids,
+        "top_k_values": top_k_values,
+        "sweep_configs": configs,
+        "sweep_results": [],
+        "embedding_time_sec": {},
+        "model_results": [],
+        "cancelled": False,
+    })
+    thread = Thread(
+        target=_run_sweep,
+        args=(run_id, dataset_id, documents, queries, model_ids, top_k_values, configs),
+        daemon=True,
+    )
+    thread.start()
+
+
+def _run_sweep(run_id: str, dataset_id: str, documents: list, queries: list,
+               model_ids: List[str], top_k_values: List[int], configs: List[tuple]):
+    run = get_run(run_id)
+    start_time = time.time()
+    doc_texts = [d["text"] for d in documents]
+    doc_ids = [d["doc_id"] for d in documents]
+    doc_hashes = document_hashes(documents)
+    query_texts = [q["query"] for q in queries]
+    max_k = max(top_k_values)
+    all_relevant = [set(q["relevant_doc_ids"]) for q in queries]
+    all_grades = [q.get("relevance_grades") or {d: 3 for d in q["relevant_doc_ids"]} for q in queries]
+
+    try:
+        for model_idx, model_id in enumerate(model_ids):
+            if run.get("cancelled"):
+                return
+            run["current_model"] = model_id
+            embedder = get_embedder(model_id)
+
+            t0 = time.perf_counter()
+            embedded = embed_corpus(run, embedder, model_id, dataset_id, doc_ids, doc_texts, doc_hashes)
+            if embedded is None:
+                return
+            doc_embeddings = embedded["embeddings"]
+            query_embeddings = embed_query_set(run, embedder, query_texts)
+            run["embedding_time_sec"][model_id] = round(time.perf_counter() - t0, 3)
+
+            for metric, normalize, index_type in configs:
+                if run.get("cancelled"):
+                    return
+                run["current_phase"] = f"{metric}/{'norm' if normalize else 'raw'}/{index_type}"
+
+                t0 = time.perf_counter()
+                index = build_faiss_index(doc_embeddings.copy(), metric, normalize, index_type)
+                build_ms = (time.perf_counter() - t0) * 1000
+
+                t0 = time.perf_counter()
+                hits = search_index(index, query_embeddings.copy(), doc_ids, max_k, metric, normalize)
+                search_ms = (time.perf_counter() - t0) * 1000
+
+                retrieved = [[doc_id for doc_id, _ in query_hits] for query_hits in hits]
+                ir = compute_all_metrics(retrieved, all_relevant, all_grades, top_k_values)
+                run["sweep_results"].append(SweepConfigResult(
+                    model_id=model_id,
+                    similarity_metric=metric,
+                    normalize=normalize,
+                    index_type=index_type,
+                    ir_metrics=IRMetrics(**ir),
+                    index_build_ms=round(build_ms, 3),
+                    search_latency_avg_ms=round(search_ms / max(len(queries), 1), 4),
+                    index_size_mb=round(index_size_bytes(index) / (1024 * 1024), 3),
+                ))
+
+            run["models_completed"] = model_idx + 1
+            run["documents_embedded"] = 0
+            run["queries_processed"] = 0
+            run["elapsed_seconds"] = time.time() - start_time
+
+        run["status"] = BenchmarkStatus.completed
+        run["elapsed_seconds"] = time.time() - start_time
+        run["eta_seconds"] = 0
+        run["current_model"] = None
+        run["current_phase"] = None
+
+    except Exception as e:
+        run["status"] = BenchmarkStatus.failed
+        run["error"] = str(e)
+
+    finally:
+        runs_total.inc(status=BenchmarkStatus(run["status"]).value)
@@ -5,8 +5,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-COHERE_API_KEY = os.getenv("COHERE_API_KEY", "")
+# Point both provider clients at a local mock server (app.embeddings.mock_server)
+# for offline benchmarking. A placeholder key is used when none is set.
+MOCK_PROVIDER_URL = os.getenv("MOCK_PROVIDER_URL", "").rstrip("/")
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "mock-key" if MOCK_PROVIDER_URL else "")
+COHERE_API_KEY = os.getenv("COHERE_API_KEY", "mock-key" if MOCK_PROVIDER_URL else "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", f"{MOCK_PROVIDER_URL}/v1" if MOCK_PROVIDER_URL else "") or None
+COHERE_BASE_URL = os.getenv("COHERE_BASE_URL", MOCK_PROVIDER_URL) or None
 
 CORS_ORIGINS = ["http://localhost:5173", "http://localhost:3000"]
 
@@ -118,3 +124,89 @@ DEFAULT_TOP_K_VALUES = [1, 3, 5, 10, 20]
 DEFAULT_SIMILARITY_METRIC = "cosine"
 MAX_DATASET_DOCUMENTS = 1000
 MAX_DATASET_QUERIES = 500
+
+# Sort documents by length before batching so each batch pads to a similar
+# length; embeddings are restored to dataset order afterwards.
+LENGTH_SORTED_BATCHING = os.getenv("LENGTH_SORTED_BATCHING", "true").lower() == "true"
+
+# Comma-separated model ids loaded in the background at app startup.
+PRELOAD_MODELS = [m.strip() for m in os.getenv("PRELOAD_MODELS", "").split(",") if m.strip()]
+
+# Local state (tuned batch sizes, checkpoints) lives here.
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+# Distributed document embedding: comma-separated worker base URLs (each
+# running app.embeddings.worker_server), an optional shared token, and how
+# runs are split into (model, shard) tasks.
+WORKER_URLS = [u.strip().rstrip("/") for u in os.getenv("WORKER_URLS", "").split(",") if u.strip()]
+WORKER_TOKEN = os.getenv("WORKER_TOKEN", "")
+WORKER_TIMEOUT_SEC = float(os.getenv("WORKER_TIMEOUT_SEC", "300"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "1"))  # in-flight tasks per worker
+DISTRIBUTED_SHARD_SIZE = int(os.getenv("DISTRIBUTED_SHARD_SIZE", "512"))
+DISTRIBUTED_MAX_ATTEMPTS = 3
+
+# Checkpoint runs under DATA_DIR/checkpoints so they can be resumed after a crash.
+CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS_ENABLED", "true").lower() == "true"
+CHECKPOINT_HEARTBEAT_SEC = float(os.getenv("CHECKPOINT_HEARTBEAT_SEC", "5"))
+# Resume interrupted runs automatically when the app starts.
+RESUME_ON_STARTUP = os.getenv("RESUME_ON_STARTUP", "true").lower() == "true"
+# A running run with no progress for this long is reported as stale.
+RUN_STALE_AFTER_SEC = float(os.getenv("RUN_STALE_AFTER_SEC", "600"))
+
+# Document batch size when no tuned value is stored for (model, hardware).
+DEFAULT_BATCH_SIZE = 32
+# Texts embedded at each candidate size during a batch-size tuning pass.
+AUTOTUNE_SAMPLE_SIZE = int(os.getenv("AUTOTUNE_SAMPLE_SIZE", "256"))
+
+# Per-request provider limits: max inputs and max estimated tokens (0 = no limit).
+PROVIDER_BATCH_LIMITS = {
+    "openai": {"max_items": 2048, "max_tokens": 300000},
+    "cohere": {"max_items": 96, "max_tokens": 0},
+    "local": {"max_items": 1024, "max_tokens": 0},
+}
+
+# Throwaway batches run before measuring latency for each model.
+WARMUP_BATCHES = int(os.getenv("WARMUP_BATCHES", "1"))
+WARMUP_BATCH_SIZE = 8
+
+# Max query/text embeddings kept in the LRU cache shared by explore and runner.
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "10000"))
+
+# Max memoized per-model results (each holds its per-query arrays), evicted LRU.
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "64"))
+
+# Per-model deadline for the explore endpoints' concurrent fan-out.
+EXPLORE_MODEL_TIMEOUT_SEC = float(os.getenv("EXPLORE_MODEL_TIMEOUT_SEC", "10"))
+
+# Bytes of matrix converted and written per chunk by the embedding export.
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", str(4 * 1024 * 1024)))
+
+# Live-query coalescing: queries for the same model arriving within the
+# window are embedded and searched as one batch.
+QUERY_BATCH_WINDOW_MS = float(os.getenv("QUERY_BATCH_WINDOW_MS", "5"))
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+
+# Approximate index parameters used by configuration sweeps.
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+
+# Corpus-scaling runs: distractors are generated and indexed in chunks, and
+# (size, index type) points whose estimated index exceeds the budget are skipped.
+SCALING_CHUNK_SIZE = int(os.getenv("SCALING_CHUNK_SIZE", "50000"))
+SCALING_MAX_INDEX_MB = float(os.getenv("SCALING_MAX_INDEX_MB", "4096"))
+
+# Mock provider behaviour: lognormal latency, token-bucket rate limit (429s)
+# and random failures (500s). A rate limit of 0 disables throttling.
+MOCK_LATENCY_MEDIAN_MS = float(os.getenv("MOCK_LATENCY_MEDIAN_MS", "50"))
+MOCK_LATENCY_SIGMA = float(os.getenv("MOCK_LATENCY_SIGMA", "0.5"))
+MOCK_LATENCY_PER_ITEM_MS = float(os.getenv("MOCK_LATENCY_PER_ITEM_MS", "0.5"))
+MOCK_RATE_LIMIT_RPS = float(os.getenv("MOCK_RATE_LIMIT_RPS", "0"))
+MOCK_FAILURE_RATE = float(os.getenv("MOCK_FAILURE_RATE", "0"))
+
+# Resamples for bootstrap CIs and paired randomization tests between models.
+STATS_RESAMPLES = int(os.getenv("STATS_RESAMPLES", "10000"))
+STATS_CONFIDENCE = 0.95
+
+# Cap on documents whose neighbor lists are compared in the model agreement matrix.
+AGREEMENT_MAX_ANCHORS = int(os.getenv("AGREEMENT_MAX_ANCHORS", "5000"))
@@ -0,0 +1,119 @@
+"""Split long documents into overlapping token windows for chunk-level indexing.
+
+Token counts use the same ~4 chars/token estimate as cost accounting. The
+``tokens`` strategy packs whole words into windows; ``sentences`` packs
+whole sentences, falling back to words for a sentence longer than the
+window. Consecutive windows share up to ``overlap`` tokens of trailing
+words or sentences.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.evaluation.performance import estimate_token_count
+
+CHUNK_STRATEGIES = ("tokens", "sentences")
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class ChunkSet:
+    chunk_ids: List[str]  # "<doc_id>#<n>"
+    texts: List[str]
+    hashes: List[str]
+    doc_ids: List[str]  # parent document of each chunk
+    window: int
+
+    def chunks_per_doc(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for doc_id in self.doc_ids:
+            counts[doc_id] = counts.get(doc_id, 0) + 1
+        return counts
+
+
+def chunk_window(requested: Optional[int], model_max_tokens: int) -> int:
+    """Window size for a model: the requested size, capped at what the model accepts."""
+    return min(requested or model_max_tokens, model_max_tokens)
+
+
+def chunk_cache_key(dataset_id: str, strategy: str, window: int, overlap: int) -> str:
+    """Embedding/index cache namespace for a dataset's chunks under one configuration."""
+    return f"{dataset_id}@chunks:{strategy}:{window}:{overlap}"
+
+
+def parent_doc_id(chunk_id: str) -> str:
+    """Document a ``"<doc_id>#<n>"`` chunk id belongs to."""
+    return chunk_id.rsplit("#", 1)[0]
+
+
+def pool_chunks(embeddings: np.ndarray, chunk_ids: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """Document vectors as the mean of each document's unit-length chunk vectors."""
+    parents = [parent_doc_id(c) for c in chunk_ids]
+    doc_ids = list(dict.fromkeys(parents))
+    row_of = {d: i for i, d in enumerate(doc_ids)}
+    groups = np.fromiter((row_of[p] for p in parents), dtype=np.int64, count=len(parents))
+    unit = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-10)
+    pooled = np.zeros((len(doc_ids), embeddings.shape[1]), dtype=np.float32)
+    np.add.at(pooled, groups, unit)
+    pooled /= np.bincount(groups, minlength=len(doc_ids))[:, None]
+    return pooled, doc_ids
+
+
+def _pack(pieces: List[str], window: int, overlap: int) -> List[str]:
+    """Greedily join pieces into windows of at most ``window`` tokens.
+
+    Each window after the first restarts at the trailing pieces of the
+    previous one worth at most ``overlap`` tokens, always moving forward.
+    """
+    cost = [(len(p) + 1) / 4 for p in pieces]
+    chunks, start = [], 0
+    while start < len(pieces):
+        end, used = start, 0.0
+        while end < len(pieces) and (end == start or used + cost[end] <= window):
+            used += cost[end]
+            end += 1
+        chunks.append(" ".join(pieces[start:end]))
+        if end >= len(pieces):
+            break
+        back, carried = end, 0.0
+        while back - 1 > start and carried + cost[back - 1] <= overlap:
+            back -= 1
+            carried += cost[back]
+        start = back
+    return chunks
+
+
+def chunk_text(text: str, window: int, overlap: int = 0, strategy: str = "sentences") -> List[str]:
+    """Split one text into windows; texts that already fit are returned unchanged."""
+    if estimate_token_count(text) <= window:
+        return [text]
+    if strategy == "sentences":
+        pieces = []
+        for sentence in _SENTENCE_END.split(text.strip()):
+            if estimate_token_count(sentence) > window:
+                pieces.extend(sentence.split())
+            elif sentence:
+                pieces.append(sentence)
+    else:
+        pieces = text.split()
+    # Unbroken runs longer than a window (URLs, base64, ...) are cut by characters
+    span = window * 4
+    pieces = [p[i:i + span] for p in pieces for i in range(0, len(p), span)]
+    return _pack(pieces, window, overlap)
+
+
+def chunk_documents(documents: list, window: int, overlap: int = 0, strategy: str = "sentences") -> ChunkSet:
+    """Chunk every document, keeping dataset order and a chunk → document map."""
+    chunk_ids, texts, hashes, parents = [], [], [], []
+    for d in documents:
+        for n, text in enumerate(chunk_text(d["text"], window, overlap, strategy)):
+            chunk_ids.append(f"{d['doc_id']}#{n}")
+            texts.append(text)
+            hashes.append(hashlib.sha1(text.encode("utf-8")).hexdigest())
+            parents.append(d["doc_id"])
+    return ChunkSet(chunk_ids=chunk_ids, texts=texts, hashes=hashes, doc_ids=parents, window=window)
@@ -2,6 +2,8 @@
 
 import os
 import json
+import hashlib
+from datetime import datetime, timezone
 from typing import List, Optional, Dict
 
 from app.models.schemas import DatasetInfo, DatasetFull, DatasetDocument, RelevanceJudgment
@@ -11,6 +13,9 @@ _BUILTIN_DIR = os.path.join(os.path.dirname(__file__), "builtin")
 # In-memory store for uploaded datasets
 _uploaded_datasets: Dict[str, dict] = {}
 
+# Version history of uploaded datasets: id -> [version entry, ...]
+_dataset_versions: Dict[str, List[dict]] = {}
+
 
 def _load_builtin(filename: str) -> dict:
     path = os.path.join(_BUILTIN_DIR, filename)
@@ -31,6 +36,7 @@ def _dataset_info(raw: dict, is_builtin: bool = True) -> DatasetInfo:
         avg_doc_length=round(avg_len, 1),
         category=raw.get("category", "general"),
         is_builtin=is_builtin,
+        version=raw.get("version", 1),
     )
 
 
@@ -47,11 +53,55 @@ def _dataset_full(raw: dict, is_builtin: bool = True) -> DatasetFull:
         avg_doc_length=round(avg_len, 1),
         category=raw.get("category", "general"),
         is_builtin=is_builtin,
+        version=raw.get("version", 1),
         documents=docs,
         queries=queries,
     )
 
 
+def content_hash(documents: list, queries: list) -> str:
+    """Stable hash of a dataset's documents and relevance judgments."""
+    payload = json.dumps({"documents": documents, "queries": queries}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def document_hashes(documents: list) -> List[str]:
+    """Per-document hash of the embedded text, aligned with ``documents``."""
+    return [hashlib.sha1(d["text"].encode("utf-8")).hexdigest() for d in documents]
+
+
+def diff_documents(old_docs: list, new_docs: list) -> Dict[str, List[str]]:
+    """Doc ids added, removed, or whose text changed between two versions."""
+    old = {d["doc_id"]: h for d, h in zip(old_docs, document_hashes(old_docs))}
+    new = {d["doc_id"]: h for d, h in zip(new_docs, document_hashes(new_docs))}
+    return {
+        "added": [d for d in new if d not in old],
+        "removed": [d for d in old if d not in new],
+        "changed": [d for d in new if d in old and old[d] != new[d]],
+    }
+
+
+def _record_version(raw: dict, previous: Optional[dict] = None) -> dict:
+    diff = diff_documents(previous["documents"], raw["documents"]) if previous else {
+        "added": [d["doc_id"] for d in raw["documents"]], "removed": [], "changed": [],
+    }
+    raw["version"] = previous.get("version", 1) + 1 if previous else 1
+    entry = {
+        "dataset_id": raw["id"],
+        "version": raw["version"],
+        "content_hash": content_hash(raw["documents"], raw["queries"]),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "document_count": len(raw["documents"]),
+        **diff,
+    }
+    _dataset_versions.setdefault(raw["id"], []).append(entry)
+    return entry
+
+
+def list_dataset_versions(dataset_id: str) -> List[dict]:
+    return list(_dataset_versions.get(dataset_id, []))
+
+
 def list_datasets() -> List[DatasetInfo]:
     results = []
     # Built-in datasets
@@ -100,7 +150,39 @@ def get_dataset_raw(dataset_id: str) -> Optional[dict]:
 
 
 def add_uploaded_dataset(data: dict) -> DatasetInfo:
-    """Add a user-uploaded dataset."""
+    """Add a user-uploaded dataset; re-uploading an id records a new version."""
     ds_id = data["id"]
+    _record_version(data, _uploaded_datasets.get(ds_id))
     _uploaded_datasets[ds_id] = data
     return _dataset_info(data, is_builtin=False)
+
+
+def update_dataset(dataset_id: str, upsert_documents: List[dict], remove_doc_ids: List[str],
+                   queries: Optional[List[dict]] = None) -> dict:
+    """Create the next version of an uploaded dataset and return its version entry.
+
+    Raises KeyError for unknown datasets and ValueError for built-ins or
+    queries that reference missing documents.
+    """
+    previous = _uploaded_datasets.get(dataset_id)
+    if previous is None:
+        if get_dataset_raw(dataset_id):
+            raise ValueError("Built-in datasets are read-only; upload a copy to version it")
+        raise KeyError(dataset_id)
+
+    removed = set(remove_doc_ids)
+    upserts = {d["doc_id"]: d for d in upsert_documents}
+    documents = [upserts.pop(d["doc_id"], d) for d in previous["documents"] if d["doc_id"] not in removed]
+    documents.extend(upserts.values())
+
+    queries = queries if queries is not None else previous["queries"]
+    doc_ids = {d["doc_id"] for d in documents}
+    for q in queries:
+        missing = [rid for rid in q["relevant_doc_ids"] if rid not in doc_ids]
+        if missing:
+            raise ValueError(f"Query '{q['query'][:50]}' references missing doc_ids {missing}")
+
+    raw = {**previous, "documents": documents, "queries": queries}
+    entry = _record_version(raw, previous)
+    _uploaded_datasets[dataset_id] = raw
+    return entry
@@ -26,6 +26,25 @@ class BaseEmbedder(ABC):
         """Embed a list of queries. Returns (n, dimension) array."""
         ...
 
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the vector space this embedder produces."""
+        return f"{self.model_id}|{self.model_name}|{self.dimension}"
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether model weights/clients are ready without further setup."""
+        return True
+
+    def load(self) -> float:
+        """Eagerly load the model. Returns milliseconds spent loading (0 if already loaded)."""
+        return 0.0
+
+    def warm_up(self, texts: List[str], batches: int = 1):
+        """Run throwaway batches so lazy initialization stays out of measured latency."""
+        for _ in range(batches):
+            self.embed_documents(texts)
+
     @abstractmethod
     def is_available(self) -> bool:
         """Check if this model is ready to use."""
@@ -4,7 +4,7 @@ from typing import List
 import numpy as np
 
 from app.embeddings.base import BaseEmbedder
-from app.config import COHERE_API_KEY
+from app.config import COHERE_API_KEY, COHERE_BASE_URL
 
 
 class CohereEmbedder(BaseEmbedder):
@@ -16,7 +16,10 @@ class CohereEmbedder(BaseEmbedder):
     def _get_client(self):
         if self._client is None:
             import cohere
-            self._client = cohere.Client(api_key=COHERE_API_KEY)
+            if COHERE_BASE_URL:
+                self._client = cohere.Client(api_key=COHERE_API_KEY, base_url=COHERE_BASE_URL)
+            else:
+                self._client = cohere.Client(api_key=COHERE_API_KEY)
         return self._client
 
     def embed_documents(self, texts: List[str]) -> np.ndarray:
@@ -1,5 +1,7 @@
 """Local sentence-transformers embedding provider (MiniLM, E5, BGE)."""
 
+import time
+from threading import Lock
 from typing import List
 import numpy as np
 
@@ -12,22 +14,42 @@ class LocalEmbedder(BaseEmbedder):
                  query_prefix: str = "", document_prefix: str = "", **kwargs):
         super().__init__(model_id, model_name, dimension, query_prefix, document_prefix)
         self._model = None
+        self._load_lock = Lock()
+        self.load_time_ms = 0.0
 
     def _get_model(self):
         if self._model is None:
-            from sentence_transformers import SentenceTransformer
-            self._model = SentenceTransformer(self.model_name)
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    t0 = time.perf_counter()
+                    self._model = SentenceTransformer(self.model_name)
+                    self.load_time_ms = (time.perf_counter() - t0) * 1000
         return self._model
 
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> float:
+        if self._model is not None:
+            return 0.0
+        self._get_model()
+        return self.load_time_ms
+
     def embed_documents(self, texts: List[str]) -> np.ndarray:
         model = self._get_model()
         prefixed = self._prepend_prefix(texts, self.document_prefix)
-        return model.encode(prefixed, show_progress_bar=False, convert_to_numpy=True).astype(np.float32)
+        return model.encode(
+            prefixed, batch_size=max(1, len(prefixed)), show_progress_bar=False, convert_to_numpy=True,
+        ).astype(np.float32)
 
     def embed_queries(self, texts: List[str]) -> np.ndarray:
         model = self._get_model()
         prefixed = self._prepend_prefix(texts, self.query_prefix)
-        return model.encode(prefixed, show_progress_bar=False, convert_to_numpy=True).astype(np.float32)
+        return model.encode(
+            prefixed, batch_size=max(1, len(prefixed)), show_progress_bar=False, convert_to_numpy=True,
+        ).astype(np.float32)
 
     def is_available(self) -> bool:
         try:
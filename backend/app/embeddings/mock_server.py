@@ -0,0 +1,121 @@
+"""Local stand-in for the OpenAI and Cohere embedding APIs.
+
+Returns deterministic, hash-seeded unit vectors of each model's registered
+dimension and injects configurable latency, rate limiting and failures so
+provider clients can be benchmarked without keys or network access.
+
+Run with ``uvicorn app.embeddings.mock_server:app --port 9000`` and start the
+main app with ``MOCK_PROVIDER_URL=http://localhost:9000``.
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+import uuid
+from typing import List, Optional
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.config import (
+    MODEL_REGISTRY, MOCK_LATENCY_MEDIAN_MS, MOCK_LATENCY_SIGMA, MOCK_LATENCY_PER_ITEM_MS,
+    MOCK_RATE_LIMIT_RPS, MOCK_FAILURE_RATE,
+)
+from app.evaluation.performance import estimate_token_count
+
+app = FastAPI(title="Mock Embedding Provider", version="1.0.0")
+
+_DIMENSIONS = {entry["model_name"]: entry["dimension"] for entry in MODEL_REGISTRY.values()}
+_DEFAULT_DIMENSION = 384
+
+
+class OpenAIEmbeddingRequest(BaseModel):
+    input: List[str] | str
+    model: str
+    encoding_format: Optional[str] = None
+
+
+class CohereEmbedRequest(BaseModel):
+    texts: List[str]
+    model: str
+    input_type: Optional[str] = None
+
+
+class _TokenBucket:
+    """Allows ``rate`` requests per second with a burst of the same size."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+_bucket = _TokenBucket(MOCK_RATE_LIMIT_RPS)
+
+
+def mock_vector(model: str, text: str, input_type: str = "") -> List[float]:
+    """Deterministic unit vector seeded by a hash of (model, input_type, text)."""
+    digest = hashlib.sha256(f"{model}\0{input_type}\0{text}".encode("utf-8")).digest()
+    rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+    vec = rng.standard_normal(_DIMENSIONS.get(model, _DEFAULT_DIMENSION)).astype(np.float32)
+    vec /= np.linalg.norm(vec)
+    return vec.tolist()
+
+
+async def _simulate(num_items: int) -> Optional[JSONResponse]:
+    """Apply rate limiting, latency and random failures. Returns an error response or None."""
+    if not _bucket.take():
+        return JSONResponse(status_code=429, content={"message": "rate limit exceeded"}, headers={"Retry-After": "1"})
+    latency_ms = random.lognormvariate(np.log(max(MOCK_LATENCY_MEDIAN_MS, 1e-3)), MOCK_LATENCY_SIGMA)
+    await asyncio.sleep((latency_ms + num_items * MOCK_LATENCY_PER_ITEM_MS) / 1000)
+    if random.random() < MOCK_FAILURE_RATE:
+        return JSONResponse(status_code=500, content={"message": "injected failure"})
+    return None
+
+
+@app.post("/v1/embeddings")
+async def openai_embeddings(request: OpenAIEmbeddingRequest):
+    """OpenAI ``embeddings.create`` wire format."""
+    texts = [request.input] if isinstance(request.input, str) else request.input
+    error = await _simulate(len(texts))
+    if error:
+        return error
+    tokens = sum(estimate_token_count(t) for t in texts)
+    return {
+        "object": "list",
+        "model": request.model,
+        "data": [
+            {"object": "embedding", "index": i, "embedding": mock_vector(request.model, t)}
+            for i, t in enumerate(texts)
+        ],
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+@app.post("/v1/embed")
+async def cohere_embed(request: CohereEmbedRequest):
+    """Cohere ``embed`` (v1) wire format."""
+    error = await _simulate(len(request.texts))
+    if error:
+        return error
+    return {
+        "id": str(uuid.uuid4()),
+        "response_type": "embeddings_floats",
+        "texts": request.texts,
+        "embeddings": [mock_vector(request.model, t, request.input_type or "") for t in request.texts],
+        "meta": {"api_version": {"version": "1"}, "billed_units": {"input_tokens": sum(estimate_token_count(t) for t in request.texts)}},
+    }
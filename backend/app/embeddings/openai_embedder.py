@@ -4,7 +4,7 @@ from typing import List
 import numpy as np
 
 from app.embeddings.base import BaseEmbedder
-from app.config import OPENAI_API_KEY
+from app.config import OPENAI_API_KEY, OPENAI_BASE_URL
 
 
 class OpenAIEmbedder(BaseEmbedder):
@@ -16,7 +16,7 @@ class OpenAIEmbedder(BaseEmbedder):
     def _get_client(self):
         if self._client is None:
             from openai import OpenAI
-            self._client = OpenAI(api_key=OPENAI_API_KEY)
+            self._client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
         return self._client
 
     def embed_documents(self, texts: List[str]) -> np.ndarray:
@@ -1,6 +1,9 @@
 """Model registry — factory for creating embedder instances."""
 
-from typing import Dict, Optional
+import time
+from functools import wraps
+from threading import Lock, Thread, local
+from typing import Dict, List, Optional
 
 from app.config import MODEL_REGISTRY, OPENAI_API_KEY, COHERE_API_KEY
 from app.embeddings.base import BaseEmbedder
@@ -8,6 +11,7 @@ from app.embeddings.openai_embedder import OpenAIEmbedder
 from app.embeddings.cohere_embedder import CohereEmbedder
 from app.embeddings.local_embedder import LocalEmbedder
 from app.models.schemas import ModelInfo, ModelStatus
+from app.monitoring.metrics import provider_request_duration, provider_errors, texts_embedded
 
 
 _PROVIDER_MAP = {
@@ -18,10 +22,22 @@ _PROVIDER_MAP = {
 
 # Cache of instantiated embedders
 _embedder_cache: Dict[str, BaseEmbedder] = {}
+_embedder_lock = Lock()
+
+# Model ids currently being loaded in the background
+_loading: set = set()
+
+# Last background-load failure per model id
+_load_errors: Dict[str, str] = {}
 
 
 def get_embedder(model_id: str) -> BaseEmbedder:
     """Get or create an embedder instance by model_id."""
+    with _embedder_lock:
+        return _get_or_create_embedder(model_id)
+
+
+def _get_or_create_embedder(model_id: str) -> BaseEmbedder:
     if model_id in _embedder_cache:
         return _embedder_cache[model_id]
 
@@ -40,10 +56,74 @@ def get_embedder(model_id: str) -> BaseEmbedder:
         query_prefix=entry.get("query_prefix", ""),
         document_prefix=entry.get("document_prefix", ""),
     )
+    _instrument(embedder, entry["provider"])
     _embedder_cache[model_id] = embedder
     return embedder
 
 
+_instrument_state = local()
+
+
+def _instrument(embedder: BaseEmbedder, provider: str):
+    """Wrap the embed methods of an instance to feed provider latency/error/throughput metrics."""
+    for kind, attr in (("document", "embed_documents"), ("query", "embed_queries")):
+        method = getattr(embedder, attr)
+
+        def timed(texts, _method=method, _kind=kind):
+            # embed_queries may delegate to embed_documents; count the outer call only
+            if getattr(_instrument_state, "active", False):
+                return _method(texts)
+            labels = {"model": embedder.model_id, "provider": provider, "kind": _kind}
+            _instrument_state.active = True
+            t0 = time.perf_counter()
+            try:
+                result = _method(texts)
+            except Exception:
+                provider_errors.inc(**labels)
+                raise
+            finally:
+                _instrument_state.active = False
+                provider_request_duration.observe(time.perf_counter() - t0, **labels)
+            texts_embedded.inc(len(texts), model=embedder.model_id, kind=_kind)
+            return result
+
+        setattr(embedder, attr, wraps(method)(timed))
+
+
+def _preload_worker(model_ids: List[str]):
+    for model_id in model_ids:
+        try:
+            get_embedder(model_id).load()
+            _load_errors.pop(model_id, None)
+        except Exception as e:
+            _load_errors[model_id] = f"{type(e).__name__}: {e}"
+        finally:
+            _loading.discard(model_id)
+
+
+def preload_models(model_ids: List[str]):
+    """Load models in a background thread so requests never pay the load cost.
+
+    Clears any recorded load error for the models it retries.
+    """
+    pending = [m for m in model_ids if m in MODEL_REGISTRY and m not in _loading]
+    if not pending:
+        return
+    for model_id in pending:
+        _load_errors.pop(model_id, None)
+    _loading.update(pending)
+    Thread(target=_preload_worker, args=(pending,), daemon=True).start()
+
+
+def is_model_loading(model_id: str) -> bool:
+    return model_id in _loading
+
+
+def model_load_error(model_id: str) -> Optional[str]:
+    """Why the last background load of ``model_id`` failed, if it did."""
+    return _load_errors.get(model_id)
+
+
 def list_models() -> list[ModelInfo]:
     """List all registered models with their metadata and status."""
     results = []
@@ -53,6 +133,10 @@ def list_models() -> list[ModelInfo]:
             status = ModelStatus.api_key_missing
         elif entry["provider"] == "cohere" and not COHERE_API_KEY:
             status = ModelStatus.api_key_missing
+        elif is_model_loading(model_id):
+            status = ModelStatus.loading
+        elif model_load_error(model_id):
+            status = ModelStatus.error
 
         results.append(ModelInfo(
             id=model_id,
@@ -65,6 +149,7 @@ def list_models() -> list[ModelInfo]:
             query_prefix=entry.get("query_prefix", ""),
             document_prefix=entry.get("document_prefix", ""),
             status=status,
+            error=model_load_error(model_id),
         ))
     return results
 
@@ -80,8 +165,17 @@ def validate_model(model_id: str) -> ModelStatus:
     if entry["provider"] == "cohere" and not COHERE_API_KEY:
         return ModelStatus.api_key_missing
 
+    if is_model_loading(model_id):
+        return ModelStatus.loading
+    if model_load_error(model_id):
+        return ModelStatus.error
+
     try:
         embedder = get_embedder(model_id)
+        if not embedder.is_loaded:
+            # Load in the background instead of blocking the request thread
+            preload_models([model_id])
+            return ModelStatus.loading
         if embedder.is_available():
             return ModelStatus.ready
         return ModelStatus.error
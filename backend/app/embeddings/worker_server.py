@@ -0,0 +1,72 @@
+"""Embedding worker — serves document-shard embedding tasks for a coordinator.
+
+Run one or more with ``uvicorn app.embeddings.worker_server:app --port 9101``
+(each with its own provider keys or local models) and point the API process
+at them with ``WORKER_URLS=http://host:9101,...``. Shards arrive as JSON and
+embeddings go back as a raw ``.npy`` body in input order.
+"""
+
+import io
+import os
+import time
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+
+from app.config import MODEL_REGISTRY, WORKER_TOKEN, PRELOAD_MODELS
+from app.embeddings.registry import get_embedder, preload_models
+from app.benchmark.batching import length_sorted_batches, scatter_batches, cap_batches_by_tokens
+from app.benchmark.autotune import provider_limits
+
+app = FastAPI(title="Embedding Worker", version="1.0.0")
+
+
+class ShardRequest(BaseModel):
+    model_id: str
+    texts: List[str] = Field(..., min_length=1)
+    batch_size: int = Field(default=32, ge=1)
+
+
+def _check_token(token: str):
+    if WORKER_TOKEN and token != WORKER_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid worker token")
+
+
+@app.on_event("startup")
+async def startup():
+    if PRELOAD_MODELS:
+        preload_models(PRELOAD_MODELS)
+
+
+@app.get("/health")
+async def health(x_worker_token: str = Header(default="")):
+    _check_token(x_worker_token)
+    return {"status": "ok", "pid": os.getpid(), "models": list(MODEL_REGISTRY)}
+
+
+@app.post("/v1/embed_shard")
+def embed_shard(request: ShardRequest, x_worker_token: str = Header(default="")):
+    """Embed one document shard in length-sorted batches; runs in the threadpool."""
+    _check_token(x_worker_token)
+    if request.model_id not in MODEL_REGISTRY:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {request.model_id}")
+
+    embedder = get_embedder(request.model_id)
+    batches = cap_batches_by_tokens(
+        length_sorted_batches(request.texts, request.batch_size), request.texts,
+        provider_limits(request.model_id)["max_tokens"],
+    )
+    t0 = time.perf_counter()
+    vectors = [embedder.embed_documents([request.texts[i] for i in batch]) for batch in batches]
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    buf = io.BytesIO()
+    np.save(buf, scatter_batches(batches, vectors).astype(np.float32))
+    return Response(
+        content=buf.getvalue(),
+        media_type="application/octet-stream",
+        headers={"X-Embed-Ms": f"{elapsed_ms:.3f}", "X-Batches": str(len(batches))},
+    )
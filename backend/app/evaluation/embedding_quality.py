@@ -1,7 +1,7 @@
 """Embedding quality analysis — isotropy, clustering, neighbor overlap."""
 
 import numpy as np
-from typing import List, Dict
+from typing import List, Optional, Tuple
 from sklearn.metrics.pairwise import cosine_similarity
 
 
@@ -63,6 +63,67 @@ def compute_inter_cluster_separation(
     return round(float(np.mean(separations)) if separations else 0.0, 4)
 
 
+def knn_neighbors(
+    embeddings: np.ndarray,
+    k: int = 10,
+    anchors: Optional[np.ndarray] = None,
+    block_size: int = 4096,
+) -> np.ndarray:
+    """Cosine top-k neighbors (excluding self) of each anchor row via FAISS.
+
+    Returns an (n_anchors, k) int64 array of row indices; anchors default to
+    every row. Memory is O(n·d + n_anchors·k) instead of O(n²).
+    """
+    import faiss
+
+    vecs = np.ascontiguousarray(embeddings, dtype=np.float32).copy()
+    faiss.normalize_L2(vecs)
+    index = faiss.IndexFlatIP(vecs.shape[1])
+    index.add(vecs)
+    anchors = np.arange(len(vecs)) if anchors is None else anchors
+    k = min(k, len(vecs) - 1)
+    out = np.empty((len(anchors), k), dtype=np.int64)
+    for start in range(0, len(anchors), block_size):
+        rows = anchors[start:start + block_size]
+        _, idx = index.search(vecs[rows], k + 1)
+        # Drop self; if ties pushed it out of the top k+1, drop the last hit instead
+        is_self = idx == rows[:, None]
+        is_self[~is_self.any(axis=1), -1] = True
+        out[start:start + len(rows)] = idx[~is_self].reshape(len(rows), k)
+    return out
+
+
+def list_agreement(lists_a: np.ndarray, lists_b: np.ndarray, block_size: Optional[int] = None) -> Tuple[float, float]:
+    """Mean top-k overlap and mean Spearman rank correlation of two sets of ranked lists.
+
+    Row ``i`` of each (n, k) array is one ranked list; negative entries are
+    padding. Overlap is |A ∩ B| / k. Rank correlation is Spearman's rho over
+    the items both lists share, averaged over rows sharing at least two.
+    """
+    k = lists_a.shape[1]
+    # Keep the (block, k, k) match/difference temporaries around 2**22 elements
+    block_size = block_size or max(1, 2 ** 22 // (k * k))
+    overlap_sum, rho_sum, rho_rows = 0.0, 0.0, 0
+    for start in range(0, len(lists_a), block_size):
+        a = lists_a[start:start + block_size]
+        b = lists_b[start:start + block_size]
+        match = (a[:, :, None] == b[:, None, :]) & (a[:, :, None] >= 0)
+        in_a, in_b = match.any(axis=2), match.any(axis=1)
+        shared = in_a.sum(axis=1)
+        overlap_sum += float((shared / k).sum())
+
+        # Ranks within the shared subset, then squared rank differences per matched pair
+        rank_a = np.cumsum(in_a, axis=1)
+        rank_b = np.cumsum(in_b, axis=1)
+        d2 = ((rank_a[:, :, None] - rank_b[:, None, :]) ** 2 * match).sum(axis=(1, 2))
+        ok = shared >= 2
+        m = shared[ok].astype(np.float64)
+        rho_sum += float((1 - 6 * d2[ok] / (m * (m * m - 1))).sum())
+        rho_rows += int(ok.sum())
+    n = max(len(lists_a), 1)
+    return round(overlap_sum / n, 4), round(rho_sum / rho_rows, 4) if rho_rows else 0.0
+
+
 def compute_nearest_neighbor_overlap(
     embeddings_a: np.ndarray,
     embeddings_b: np.ndarray,
@@ -70,16 +131,7 @@ def compute_nearest_neighbor_overlap(
 ) -> float:
     """Fraction of shared k-nearest neighbors between two embedding spaces."""
     n = len(embeddings_a)
-    if n < k + 1:
-        k = max(1, n - 1)
-
-    sim_a = cosine_similarity(embeddings_a)
-    sim_b = cosine_similarity(embeddings_b)
-
-    overlaps = []
-    for i in range(n):
-        nn_a = set(np.argsort(sim_a[i])[-k - 1:-1])
-        nn_b = set(np.argsort(sim_b[i])[-k - 1:-1])
-        overlaps.append(len(nn_a & nn_b) / k)
-
-    return round(float(np.mean(overlaps)), 4)
+    if n < 2:
+        return 0.0
+    overlap, _ = list_agreement(knn_neighbors(embeddings_a, k), knn_neighbors(embeddings_b, k))
+    return overlap
@@ -3,6 +3,8 @@
 import math
 from typing import List, Dict
 
+from app.evaluation.profiling import span
+
 
 def precision_at_k(retrieved: List[str], relevant: set, k: int) -> float:
     """Fraction of top-k retrieved docs that are relevant."""
@@ -82,12 +84,13 @@ def compute_all_metrics(
             "hit_rate_at_k": {k: 0.0 for k in top_k_values},
         }
 
-    prec = {k: sum(precision_at_k(r, rel, k) for r, rel in zip(all_retrieved, all_relevant)) / n for k in top_k_values}
-    rec = {k: sum(recall_at_k(r, rel, k) for r, rel in zip(all_retrieved, all_relevant)) / n for k in top_k_values}
-    mrr_val = sum(reciprocal_rank(r, rel) for r, rel in zip(all_retrieved, all_relevant)) / n
-    ndcg = {k: sum(ndcg_at_k(r, g, k) for r, g in zip(all_retrieved, all_relevance_grades)) / n for k in top_k_values}
-    map_val = sum(average_precision(r, rel) for r, rel in zip(all_retrieved, all_relevant)) / n
-    hr = {k: sum(hit_rate_at_k(r, rel, k) for r, rel in zip(all_retrieved, all_relevant)) / n for k in top_k_values}
+    with span("ir_metrics"):
+        prec = {k: sum(precision_at_k(r, rel, k) for r, rel in zip(all_retrieved, all_relevant)) / n for k in top_k_values}
+        rec = {k: sum(recall_at_k(r, rel, k) for r, rel in zip(all_retrieved, all_relevant)) / n for k in top_k_values}
+        mrr_val = sum(reciprocal_rank(r, rel) for r, rel in zip(all_retrieved, all_relevant)) / n
+        ndcg = {k: sum(ndcg_at_k(r, g, k) for r, g in zip(all_retrieved, all_relevance_grades)) / n for k in top_k_values}
+        map_val = sum(average_precision(r, rel) for r, rel in zip(all_retrieved, all_relevant)) / n
+        hr = {k: sum(hit_rate_at_k(r, rel, k) for r, rel in zip(all_retrieved, all_relevant)) / n for k in top_k_values}
 
     return {
         "precision_at_k": {k: round(v, 4) for k, v in prec.items()},
@@ -97,3 +100,42 @@ def compute_all_metrics(
         "map_score": round(map_val, 4),
         "hit_rate_at_k": {k: round(v, 4) for k, v in hr.items()},
     }
+
+
+def compute_per_query_metrics(
+    all_retrieved: List[List[str]],
+    all_relevant: List[set],
+    all_relevance_grades: List[Dict[str, int]],
+    top_k_values: List[int],
+) -> Dict[str, List[float]]:
+    """Unaveraged metric values, one per query, keyed like ``mrr`` or ``ndcg@10``."""
+    rows = list(zip(all_retrieved, all_relevant, all_relevance_grades))
+    per_query = {
+        "mrr": [reciprocal_rank(r, rel) for r, rel, _ in rows],
+        "map": [average_precision(r, rel) for r, rel, _ in rows],
+    }
+    for k in top_k_values:
+        per_query[f"precision@{k}"] = [precision_at_k(r, rel, k) for r, rel, _ in rows]
+        per_query[f"recall@{k}"] = [recall_at_k(r, rel, k) for r, rel, _ in rows]
+        per_query[f"ndcg@{k}"] = [ndcg_at_k(r, g, k) for r, _, g in rows]
+        per_query[f"hit_rate@{k}"] = [hit_rate_at_k(r, rel, k) for r, rel, _ in rows]
+    return per_query
+
+
+def query_metric(name: str, retrieved: List[str], relevant: set, grades: Dict[str, int]) -> float:
+    """Single-query value of a metric named like the per-query keys (``mrr``, ``ndcg@10`` ...)."""
+    if name == "mrr":
+        return reciprocal_rank(retrieved, relevant)
+    if name == "map":
+        return average_precision(retrieved, relevant)
+    family, _, k = name.partition("@")
+    k = int(k)
+    if family == "precision":
+        return precision_at_k(retrieved, relevant, k)
+    if family == "recall":
+        return recall_at_k(retrieved, relevant, k)
+    if family == "ndcg":
+        return ndcg_at_k(retrieved, grades, k)
+    if family == "hit_rate":
+        return hit_rate_at_k(retrieved, relevant, k)
+    raise ValueError(f"Unknown metric: {name}")
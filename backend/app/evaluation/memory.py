@@ -0,0 +1,78 @@
+"""Measured memory footprint — RSS sampling, traced allocation peaks, index sizes."""
+
+import tracemalloc
+from threading import Event, Lock, Thread
+from typing import Optional
+
+from app.monitoring.metrics import process_rss_bytes
+
+_MB = 1024 * 1024
+
+# tracemalloc is process-global; overlapping probes share one tracing session
+_trace_lock = Lock()
+_trace_users = 0
+
+
+def _acquire_tracing():
+    global _trace_users
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _trace_users += 1
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _release_tracing() -> int:
+    global _trace_users
+    with _trace_lock:
+        _, peak = tracemalloc.get_traced_memory()
+        _trace_users -= 1
+        if _trace_users == 0:
+            tracemalloc.stop()
+        return peak
+
+
+class MemoryProbe:
+    """Measures RSS growth, peak RSS and traced (Python/NumPy) allocation peak over a block.
+
+    RSS is sampled by a background thread every ``interval`` seconds, so short
+    spikes between samples can be missed. Allocation peaks come from
+    tracemalloc, which NumPy reports to; they are process-wide, so concurrent
+    runs inflate each other's numbers.
+    """
+
+    def __init__(self, trace_allocations: bool = True, interval: float = 0.01):
+        self.trace_allocations = trace_allocations
+        self.interval = interval
+        self.rss_delta_mb = 0.0
+        self.peak_rss_delta_mb = 0.0
+        self.alloc_peak_mb = 0.0
+        self._baseline = 0.0
+        self._peak = 0.0
+        self._trace_base = 0
+        self._stop = Event()
+        self._sampler: Optional[Thread] = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, process_rss_bytes())
+
+    def __enter__(self) -> "MemoryProbe":
+        if self.trace_allocations:
+            self._trace_base = _acquire_tracing()
+        self._baseline = self._peak = process_rss_bytes()
+        self._sampler = Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sampler.join()
+        final = process_rss_bytes()
+        self._peak = max(self._peak, final)
+        self.rss_delta_mb = (final - self._baseline) / _MB
+        self.peak_rss_delta_mb = (self._peak - self._baseline) / _MB
+        if self.trace_allocations:
+            self.alloc_peak_mb = max(0, _release_tracing() - self._trace_base) / _MB
+        return False
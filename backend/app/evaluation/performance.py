@@ -1,34 +1,102 @@
 """Performance and cost metrics tracking."""
 
+import math
 import time
 import numpy as np
-from typing import List, Dict
+from threading import Lock
+from typing import List, Dict, Optional
 from dataclasses import dataclass, field
 
+# Log-bucketed histogram layout: 1µs .. 1h with ~1% relative error per bucket.
+_HIST_MIN_MS = 0.001
+_HIST_MAX_MS = 3_600_000.0
+_HIST_GAMMA = 1.02
+_HIST_BUCKETS = int(math.ceil(math.log(_HIST_MAX_MS / _HIST_MIN_MS) / math.log(_HIST_GAMMA))) + 2
+
 
 @dataclass
 class LatencyTracker:
-    """Collects latency samples and computes percentiles."""
-    samples: List[float] = field(default_factory=list)
+    """Constant-memory latency histogram (HDR-style log buckets).
+
+    Percentiles are accurate to ~1% relative error regardless of sample
+    count. Trackers are thread-safe and can be merged across workers.
+    """
+    counts: np.ndarray = field(default_factory=lambda: np.zeros(_HIST_BUCKETS, dtype=np.int64))
+    count: int = 0
+    total_ms: float = 0.0
+    min_ms: float = math.inf
+    max_ms: float = 0.0
+    _lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+
+    @staticmethod
+    def _bucket(duration_ms: float) -> int:
+        if duration_ms <= _HIST_MIN_MS:
+            return 0
+        idx = 1 + int(math.log(duration_ms / _HIST_MIN_MS) / math.log(_HIST_GAMMA))
+        return min(idx, _HIST_BUCKETS - 1)
+
+    @staticmethod
+    def _bounds(idx: int):
+        if idx == 0:
+            return 0.0, _HIST_MIN_MS
+        return _HIST_MIN_MS * _HIST_GAMMA ** (idx - 1), _HIST_MIN_MS * _HIST_GAMMA ** idx
 
-    def record(self, duration_ms: float):
-        self.samples.append(duration_ms)
+    def record(self, duration_ms: float, count: int = 1):
+        """Record ``count`` samples of ``duration_ms`` (e.g. one amortized value per batch item)."""
+        if count <= 0:
+            return
+        with self._lock:
+            self.counts[self._bucket(duration_ms)] += count
+            self.count += count
+            self.total_ms += duration_ms * count
+            self.min_ms = min(self.min_ms, duration_ms)
+            self.max_ms = max(self.max_ms, duration_ms)
+
+    def merge(self, other: "LatencyTracker"):
+        with self._lock:
+            self.counts += other.counts
+            self.count += other.count
+            self.total_ms += other.total_ms
+            self.min_ms = min(self.min_ms, other.min_ms)
+            self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        idx = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.count, side="left"))
+        lower, upper = self._bounds(min(idx, _HIST_BUCKETS - 1))
+        value = math.sqrt(lower * upper) if lower > 0 else upper
+        return float(min(max(value, self.min_ms), self.max_ms))
 
     @property
     def avg(self) -> float:
-        return float(np.mean(self.samples)) if self.samples else 0.0
+        return self.total_ms / self.count if self.count else 0.0
 
     @property
     def p50(self) -> float:
-        return float(np.percentile(self.samples, 50)) if self.samples else 0.0
+        return self.percentile(50)
 
     @property
     def p95(self) -> float:
-        return float(np.percentile(self.samples, 95)) if self.samples else 0.0
+        return self.percentile(95)
 
     @property
     def p99(self) -> float:
-        return float(np.percentile(self.samples, 99)) if self.samples else 0.0
+        return self.percentile(99)
+
+    def histogram(self) -> Dict:
+        """Non-empty buckets for plotting."""
+        nonzero = np.nonzero(self.counts)[0]
+        buckets = []
+        for idx in nonzero:
+            lower, upper = self._bounds(int(idx))
+            buckets.append({"lower_ms": round(lower, 4), "upper_ms": round(upper, 4), "count": int(self.counts[idx])})
+        return {
+            "count": self.count,
+            "min_ms": round(self.min_ms, 4) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 4),
+            "buckets": buckets,
+        }
 
 
 def estimate_token_count(text: str) -> int:
@@ -36,6 +104,21 @@ def estimate_token_count(text: str) -> int:
     return max(1, len(text) // 4)
 
 
+def compute_padding_stats(batch_token_lengths: List[List[int]]) -> Dict:
+    """Token totals per batch and the fraction of padded compute wasted.
+
+    Each batch is padded to its longest member, so the padded cost of a batch
+    is ``len(batch) * max(batch)`` tokens.
+    """
+    batch_tokens = [sum(lengths) for lengths in batch_token_lengths if lengths]
+    padded_tokens = sum(len(lengths) * max(lengths) for lengths in batch_token_lengths if lengths)
+    waste = 1 - sum(batch_tokens) / padded_tokens if padded_tokens > 0 else 0.0
+    return {
+        "batch_token_counts": batch_tokens,
+        "padding_waste_ratio": round(waste, 4),
+    }
+
+
 def compute_performance_metrics(
     embedding_latencies: LatencyTracker,
     query_latencies: LatencyTracker,
@@ -44,23 +127,63 @@ def compute_performance_metrics(
     dimension: int,
     total_tokens: int,
     cost_per_1k_tokens: float,
+    batch_token_lengths: Optional[List[List[int]]] = None,
+    model_load_time_ms: float = 0.0,
+    cold_start_ms: float = 0.0,
+    warmup_batches: int = 0,
+    batch_latencies: Optional[LatencyTracker] = None,
+    memory_stats: Optional[Dict[str, float]] = None,
+    query_tokens_avg: float = 0.0,
+    query_cache_hits: int = 0,
 ) -> Dict:
-    """Compute performance and cost metrics for a model run."""
+    """Compute performance and cost metrics for a model run.
+
+    Latency percentiles are steady-state: warm-up batches and model loading
+    are reported separately as ``cold_start_ms``. ``embedding_latencies`` holds
+    per-document amortized latency; ``batch_latencies`` the true per-request
+    latency of each provider call. When ``memory_stats`` carries measured
+    embedding-matrix and index sizes, ``memory_usage_mb`` is their sum rather
+    than the float32 estimate. ``query_latencies`` holds provider calls only
+    (query-cache misses); with no misses the query latency fields are None
+    rather than 0. ``cost_per_1k_queries_usd`` is priced from query tokens.
+    """
+    batch_latencies = batch_latencies or LatencyTracker()
+    memory_stats = {k: round(v, 2) for k, v in (memory_stats or {}).items()}
     throughput = num_documents / total_embedding_time_sec if total_embedding_time_sec > 0 else 0
-    memory_mb = (num_documents * dimension * 4) / (1024 * 1024)  # float32
+    memory_mb = (num_documents * dimension * 4) / (1024 * 1024)  # float32 estimate
+    if "embeddings_matrix_mb" in memory_stats and "index_size_mb" in memory_stats:
+        memory_mb = memory_stats["embeddings_matrix_mb"] + memory_stats["index_size_mb"]
     api_cost = (total_tokens / 1000) * cost_per_1k_tokens
-    cost_per_1k_queries = (1000 * query_latencies.avg / 1000) * cost_per_1k_tokens if cost_per_1k_tokens > 0 else 0
+    cost_per_1k_queries = query_tokens_avg * cost_per_1k_tokens  # 1000 queries x avg tokens / 1000
+    measured = query_latencies.count > 0
 
     return {
         "embedding_latency_avg_ms": round(embedding_latencies.avg, 2),
         "embedding_latency_p50_ms": round(embedding_latencies.p50, 2),
         "embedding_latency_p95_ms": round(embedding_latencies.p95, 2),
         "embedding_latency_p99_ms": round(embedding_latencies.p99, 2),
-        "query_latency_avg_ms": round(query_latencies.avg, 2),
+        "embedding_batch_latency_avg_ms": round(batch_latencies.avg, 2),
+        "embedding_batch_latency_p50_ms": round(batch_latencies.p50, 2),
+        "embedding_batch_latency_p95_ms": round(batch_latencies.p95, 2),
+        "embedding_batch_latency_p99_ms": round(batch_latencies.p99, 2),
+        "query_latency_avg_ms": round(query_latencies.avg, 2) if measured else None,
+        "query_latency_p50_ms": round(query_latencies.p50, 2) if measured else None,
+        "query_latency_p95_ms": round(query_latencies.p95, 2) if measured else None,
+        "query_latency_p99_ms": round(query_latencies.p99, 2) if measured else None,
+        "query_cache_hits": query_cache_hits,
+        "query_cache_misses": query_latencies.count,
         "throughput_docs_per_sec": round(throughput, 2),
         "total_embedding_time_sec": round(total_embedding_time_sec, 2),
         "embedding_dimension": dimension,
         "memory_usage_mb": round(memory_mb, 2),
         "api_cost_usd": round(api_cost, 6),
         "cost_per_1k_queries_usd": round(cost_per_1k_queries, 6),
+        **compute_padding_stats(batch_token_lengths or []),
+        "model_load_time_ms": round(model_load_time_ms, 2),
+        "cold_start_ms": round(cold_start_ms, 2),
+        "warmup_batches": warmup_batches,
+        "embedding_latency_histogram": embedding_latencies.histogram(),
+        "embedding_batch_latency_histogram": batch_latencies.histogram(),
+        "query_latency_histogram": query_latencies.histogram(),
+        **memory_stats,
     }
@@ -0,0 +1,75 @@
+"""Per-stage timing spans and optional cProfile capture for benchmark runs."""
+
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+_local = threading.local()
+
+
+class StageTimer:
+    """Accumulates wall and CPU time per named stage.
+
+    Nested spans are recorded under slash-joined paths (``queries/index_search``).
+    CPU time is per-thread, so concurrent work elsewhere does not leak in.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._stack: List[str] = []
+
+    def add(self, path: str, wall_ms: float, cpu_ms: float):
+        stage = self.stages.setdefault(path, {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0})
+        stage["count"] += 1
+        stage["wall_ms"] += wall_ms
+        stage["cpu_ms"] += cpu_ms
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            path: {"count": s["count"], "wall_ms": round(s["wall_ms"], 3), "cpu_ms": round(s["cpu_ms"], 3)}
+            for path, s in self.stages.items()
+        }
+
+
+def activate_timer(timer: Optional[StageTimer]):
+    """Make ``timer`` the target of ``span()`` calls on the current thread (None to detach)."""
+    _local.timer = timer
+
+
+@contextmanager
+def span(name: str):
+    """Time a block into the current thread's active StageTimer; no-op when none is active."""
+    timer: Optional[StageTimer] = getattr(_local, "timer", None)
+    if timer is None:
+        yield
+        return
+    timer._stack.append(name)
+    path = "/".join(timer._stack)
+    wall0 = time.perf_counter()
+    cpu0 = time.thread_time()
+    try:
+        yield
+    finally:
+        timer.add(path, (time.perf_counter() - wall0) * 1000, (time.thread_time() - cpu0) * 1000)
+        timer._stack.pop()
+
+
+PROFILE_SORT_KEYS = tuple(k.value for k in pstats.SortKey)
+
+
+def profile_to_text(profiler: cProfile.Profile, limit: int = 60, sort: str = "cumulative") -> str:
+    """Render a captured profile as a pstats report."""
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def profile_to_bytes(profiler: cProfile.Profile) -> bytes:
+    """Serialize a captured profile in the ``.prof`` format read by pstats/snakeviz."""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
@@ -0,0 +1,148 @@
+"""Significance testing — paired bootstrap CIs and randomization tests across models.
+
+All resampling is done as matrix products over chunks of resamples: a
+(resamples × queries) weight matrix times the (queries × models) metric
+matrix, so cost is dominated by BLAS rather than Python loops.
+"""
+
+from itertools import combinations
+from typing import Dict, List, Optional
+
+import numpy as np
+
+_CHUNK = 200  # resamples per matrix product; bounds memory to CHUNK × queries
+
+
+def _bootstrap_counts(rng: np.random.Generator, n_resamples: int, n_queries: int) -> np.ndarray:
+    """(n_resamples, n_queries) matrix of how often each query is drawn per resample."""
+    idx = rng.integers(0, n_queries, size=(n_resamples, n_queries), dtype=np.int32)
+    idx += (np.arange(n_resamples, dtype=np.int32) * n_queries)[:, None]
+    counts = np.bincount(idx.ravel(), minlength=n_resamples * n_queries)
+    return counts.reshape(n_resamples, n_queries).astype(np.float32)
+
+
+def bootstrap_means(values: np.ndarray, n_resamples: int, seed: int = 42) -> np.ndarray:
+    """Paired bootstrap of column means.
+
+    values: (n_queries, n_models). Every model is resampled with the same
+    query draws, so differences between columns are paired. Returns
+    (n_resamples, n_models).
+    """
+    n_queries = values.shape[0]
+    rng = np.random.default_rng(seed)
+    values32 = values.astype(np.float32)
+    out = np.empty((n_resamples, values.shape[1]), dtype=np.float32)
+    for start in range(0, n_resamples, _CHUNK):
+        size = min(_CHUNK, n_resamples - start)
+        out[start:start + size] = _bootstrap_counts(rng, size, n_queries) @ values32 / n_queries
+    return out
+
+
+def paired_randomization_pvalues(diffs: np.ndarray, n_resamples: int, seed: int = 42) -> np.ndarray:
+    """Two-sided sign-flip randomization test for each column of per-query differences.
+
+    diffs: (n_queries, n_pairs). Returns p-values of shape (n_pairs,).
+    """
+    n_queries, n_pairs = diffs.shape
+    rng = np.random.default_rng(seed)
+    diffs32 = diffs.astype(np.float32)
+    observed = np.abs(diffs32.mean(axis=0))
+    extreme = np.zeros(n_pairs, dtype=np.int64)
+    for start in range(0, n_resamples, _CHUNK):
+        size = min(_CHUNK, n_resamples - start)
+        signs = rng.integers(0, 2, size=(size, n_queries), dtype=np.int8).astype(np.float32) * 2 - 1
+        permuted = np.abs(signs @ diffs32 / n_queries)
+        extreme += (permuted >= observed - 1e-12).sum(axis=0)
+    return (extreme + 1) / (n_resamples + 1)
+
+
+def holm_adjust(p_values: np.ndarray) -> np.ndarray:
+    """Holm-Bonferroni step-down adjustment for the family of pairwise tests."""
+    m = len(p_values)
+    order = np.argsort(p_values)
+    adjusted = np.empty(m)
+    running = 0.0
+    for rank, i in enumerate(order):
+        running = max(running, (m - rank) * p_values[i])
+        adjusted[i] = min(1.0, running)
+    return adjusted
+
+
+def compare_models(
+    per_query: Dict[str, Dict[str, np.ndarray]],
+    metrics: List[str],
+    n_resamples: int = 10000,
+    confidence: float = 0.95,
+    seed: int = 42,
+) -> Dict:
+    """Bootstrap CIs per model and paired tests for every model pair.
+
+    per_query: model_id -> metric name -> (n_queries,) array, all models
+    evaluated on the same queries in the same order. Arrays of different
+    length (early-stopped models) are compared on their common prefix. All
+    metrics share one set of resampling draws, so the cost is paid once.
+    """
+    model_ids = list(per_query.keys())
+    metrics = [m for m in metrics if model_ids and all(m in per_query[mid] for mid in model_ids)]
+    result = {"n_resamples": n_resamples, "confidence": confidence, "n_queries": 0, "metrics": {}}
+    if not metrics:
+        return result
+
+    n_models = len(model_ids)
+    # (n_queries, n_metrics * n_models); column = metric_idx * n_models + model_idx
+    n_common = min(len(per_query[mid][metric]) for metric in metrics for mid in model_ids)
+    values = np.column_stack([per_query[mid][metric][:n_common] for metric in metrics for mid in model_ids])
+    if values.shape[0] == 0:
+        return result
+    result["n_queries"] = int(values.shape[0])
+
+    alpha = (1 - confidence) / 2
+    pairs = list(combinations(range(n_models), 2))
+    a_cols = np.array([mi * n_models + a for mi in range(len(metrics)) for a, _ in pairs], dtype=int)
+    b_cols = np.array([mi * n_models + b for mi in range(len(metrics)) for _, b in pairs], dtype=int)
+
+    means = values.mean(axis=0)
+    boot = bootstrap_means(values, n_resamples, seed)
+    lo, hi = np.quantile(boot, [alpha, 1 - alpha], axis=0)
+    if pairs:
+        diff_boot = boot[:, a_cols] - boot[:, b_cols]
+        d_lo, d_hi = np.quantile(diff_boot, [alpha, 1 - alpha], axis=0)
+        p_values = paired_randomization_pvalues(values[:, a_cols] - values[:, b_cols], n_resamples, seed)
+
+    for mi, metric in enumerate(metrics):
+        models = {}
+        for i, mid in enumerate(model_ids):
+            col = mi * n_models + i
+            models[mid] = {
+                "mean": round(float(means[col]), 4),
+                "ci_low": round(float(lo[col]), 4),
+                "ci_high": round(float(hi[col]), 4),
+            }
+
+        pairwise = []
+        if pairs:
+            pair_span = slice(mi * len(pairs), (mi + 1) * len(pairs))
+            p_adjusted = holm_adjust(p_values[pair_span])
+            for j, (a, b) in enumerate(pairs):
+                col = mi * len(pairs) + j
+                pairwise.append({
+                    "model_a": model_ids[a],
+                    "model_b": model_ids[b],
+                    "mean_diff": round(float(means[a_cols[col]] - means[b_cols[col]]), 4),
+                    "ci_low": round(float(d_lo[col]), 4),
+                    "ci_high": round(float(d_hi[col]), 4),
+                    "p_value": round(float(p_values[col]), 4),
+                    "p_value_holm": round(float(p_adjusted[j]), 4),
+                    "significant": bool(p_adjusted[j] < 1 - confidence),
+                })
+
+        result["metrics"][metric] = {"models": models, "pairwise": pairwise}
+    return result
+
+
+def default_metrics(available: List[str], top_k_values: Optional[List[int]] = None) -> List[str]:
+    """MRR, MAP and NDCG/recall at the largest k ≤ 10 (or the largest k available)."""
+    ks = sorted(top_k_values or [])
+    k = max([x for x in ks if x <= 10], default=ks[-1] if ks else 10)
+    wanted = ["mrr", "map", f"ndcg@{k}", f"recall@{k}"]
+    return [m for m in wanted if m in available]
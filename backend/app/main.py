@@ -1,10 +1,15 @@
 """FastAPI application entry point."""
 
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.config import CORS_ORIGINS
-from app.api.routes import models, datasets, benchmark, results, explore, health
+from app.config import CORS_ORIGINS, PRELOAD_MODELS, CHECKPOINTS_ENABLED
+from app.api.routes import models, datasets, benchmark, results, explore, health, metrics
+from app.embeddings.registry import preload_models
+from app.benchmark.runner import recover_runs
+from app.monitoring.metrics import http_request_duration
 
 app = FastAPI(
     title="Embedding Model Comparison API",
@@ -20,12 +25,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(models.router, prefix="/api")
-app.include_router(datasets.router, prefix="/api")
-app.include_router(benchmark.router, prefix="/api")
-app.include_router(results.router, prefix="/api")
-app.include_router(explore.router, prefix="/api")
-app.include_router(health.router, prefix="/api")
+_routers = [
+    (models.router, "/api"),
+    (datasets.router, "/api"),
+    (benchmark.router, "/api"),
+    (results.router, "/api"),
+    (explore.router, "/api"),
+    (health.router, "/api"),
+    (metrics.router, ""),
+]
+for router, prefix in _routers:
+    app.include_router(router, prefix=prefix)
+
+# Full path template of every route, for metric labels. Depending on the FastAPI
+# version, the matched route is either the router's own (unprefixed) route or a
+# prefixed copy, which falls back to its own template.
+_route_templates = {
+    id(route): prefix + getattr(route, "path_format", route.path)
+    for router, prefix in _routers for route in router.routes
+}
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not raw path, to keep cardinality bounded
+    route = "unmatched"
+    matched = request.scope.get("route")
+    if matched is not None:
+        route = _route_templates.get(id(matched)) or getattr(matched, "path_format", matched.path)
+    http_request_duration.observe(
+        time.perf_counter() - t0,
+        method=request.method,
+        route=route,
+        status=str(response.status_code),
+    )
+    return response
+
+
+@app.on_event("startup")
+async def startup():
+    if PRELOAD_MODELS:
+        preload_models(PRELOAD_MODELS)
+    if CHECKPOINTS_ENABLED:
+        recover_runs()
 
 
 @app.get("/")
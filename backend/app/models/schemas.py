@@ -1,6 +1,6 @@
 """Pydantic models for API requests and responses."""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PositiveFloat
 from typing import Optional, List, Dict, Any
 from enum import Enum
 
@@ -13,6 +13,12 @@ class SimilarityMetric(str, Enum):
     euclidean = "euclidean"
 
 
+class IndexType(str, Enum):
+    flat = "flat"  # exact search
+    hnsw = "hnsw"
+    ivf = "ivf"
+
+
 class ModelStatus(str, Enum):
     ready = "ready"
     loading = "loading"
@@ -20,12 +26,28 @@ class ModelStatus(str, Enum):
     api_key_missing = "api_key_missing"
 
 
+class LoadTestMode(str, Enum):
+    closed_loop = "closed_loop"  # levels are concurrent workers
+    open_loop = "open_loop"      # levels are target QPS with Poisson arrivals
+
+
+class ChunkStrategy(str, Enum):
+    tokens = "tokens"        # windows of whole words
+    sentences = "sentences"  # windows of whole sentences, words for oversized ones
+
+
+class ChunkAggregation(str, Enum):
+    max = "max"    # document scores as its best chunk
+    mean = "mean"  # document scores as the mean over all its chunks
+
+
 class BenchmarkStatus(str, Enum):
     pending = "pending"
     running = "running"
     completed = "completed"
     cancelled = "cancelled"
     failed = "failed"
+    interrupted = "interrupted"  # process exited mid-run; resumable from its checkpoint
 
 
 # ── Dataset schemas ─────────────────────────────────────────────────────────
@@ -51,6 +73,7 @@ class DatasetInfo(BaseModel):
     avg_doc_length: float
     category: str
     is_builtin: bool = True
+    version: int = 1
 
 
 class DatasetFull(DatasetInfo):
@@ -58,6 +81,23 @@ class DatasetFull(DatasetInfo):
     queries: List[RelevanceJudgment]
 
 
+class DatasetUpdateRequest(BaseModel):
+    upsert_documents: List[DatasetDocument] = []  # new doc_ids are added, existing ones replaced
+    remove_doc_ids: List[str] = []
+    queries: Optional[List[RelevanceJudgment]] = None  # replaces all queries when given
+
+
+class DatasetVersionInfo(BaseModel):
+    dataset_id: str
+    version: int
+    content_hash: str
+    created_at: str
+    document_count: int
+    added: List[str] = []
+    removed: List[str] = []
+    changed: List[str] = []
+
+
 # ── Model schemas ───────────────────────────────────────────────────────────
 
 class ModelInfo(BaseModel):
@@ -71,6 +111,7 @@ class ModelInfo(BaseModel):
     query_prefix: str = ""
     document_prefix: str = ""
     status: ModelStatus = ModelStatus.ready
+    error: Optional[str] = None  # last background-load failure
 
 
 class ValidateModelsRequest(BaseModel):
@@ -79,22 +120,79 @@ class ValidateModelsRequest(BaseModel):
 
 class ValidateModelsResponse(BaseModel):
     results: Dict[str, ModelStatus]
+    errors: Dict[str, str] = {}  # model_id -> load error message, for models in error
 
 
 # ── Benchmark schemas ───────────────────────────────────────────────────────
 
+class LoadTestConfig(BaseModel):
+    mode: LoadTestMode = LoadTestMode.closed_loop
+    levels: List[PositiveFloat] = Field(default=[1, 4, 16], min_length=1)
+    requests_per_level: int = Field(default=100, ge=1, le=10000)
+
+
+class EarlyStoppingConfig(BaseModel):
+    metric: str = "mrr"  # per-query metric key, e.g. "mrr", "ndcg@10"
+    batch_size: int = Field(default=10, ge=1)
+    min_queries: int = Field(default=20, ge=2)
+    ci_half_width: Optional[float] = Field(default=0.02, gt=0)
+    confidence: float = Field(default=0.95, ge=0.8, le=0.99)
+    stop_on_separation: bool = True
+    seed: int = 42
+
+
+class ChunkingConfig(BaseModel):
+    strategy: ChunkStrategy = ChunkStrategy.sentences
+    max_tokens: Optional[int] = Field(default=None, ge=16)  # window; capped at each model's max_tokens
+    overlap_tokens: int = Field(default=32, ge=0)
+    aggregation: ChunkAggregation = ChunkAggregation.max
+
+
 class BenchmarkRequest(BaseModel):
     dataset_id: str
     model_ids: List[str] = Field(..., min_length=1, max_length=6)
     top_k_values: List[int] = Field(default=[1, 3, 5, 10, 20])
     similarity_metric: SimilarityMetric = SimilarityMetric.cosine
     normalize_embeddings: bool = True
+    load_test: Optional[LoadTestConfig] = None
+    profile: bool = False  # capture a cProfile of the run, served at /results/{run_id}/profile
+    early_stopping: Optional[EarlyStoppingConfig] = None
+    force: bool = False  # re-run models even when a memoized result matches
+    autotune_batch_size: bool = False  # probe throughput per batch size and persist the best
+    distributed: bool = False  # embed documents on the workers in WORKER_URLS
+    chunking: Optional[ChunkingConfig] = None  # embed and index chunks of long documents
+    trace_allocations: bool = False  # extra untimed pass measuring the embedding allocation peak
+
+
+class SweepRequest(BaseModel):
+    """Grid of retrieval configurations evaluated over one embedding pass per model."""
+    dataset_id: str
+    model_ids: List[str] = Field(..., min_length=1, max_length=6)
+    top_k_values: List[int] = Field(default=[1, 3, 5, 10, 20])
+    similarity_metrics: List[SimilarityMetric] = Field(default=list(SimilarityMetric), min_length=1)
+    normalize_options: List[bool] = Field(default=[True, False], min_length=1)
+    index_types: List[IndexType] = Field(default=[IndexType.flat], min_length=1)
+
+
+class ScalingRequest(BaseModel):
+    """Corpus-scaling study: real embeddings padded with synthetic distractors."""
+    dataset_id: str
+    model_ids: List[str] = Field(..., min_length=1, max_length=6)
+    corpus_sizes: List[int] = Field(default=[10_000, 100_000, 1_000_000], min_length=1)
+    index_types: List[IndexType] = Field(default=list(IndexType), min_length=1)
+    similarity_metric: SimilarityMetric = SimilarityMetric.cosine
+    normalize_embeddings: bool = True
+    top_k_values: List[int] = Field(default=[1, 3, 5, 10, 20])
+    # Draw distractors around this corpus's embeddings instead of a Gaussian fitted to the dataset
+    distractor_dataset_id: Optional[str] = None
+    seed: int = 42
 
 
 class BenchmarkProgress(BaseModel):
     run_id: str
     status: BenchmarkStatus
     current_model: Optional[str] = None
+    current_phase: Optional[str] = None
     models_completed: int = 0
     total_models: int = 0
     documents_embedded: int = 0
@@ -103,6 +201,7 @@ class BenchmarkProgress(BaseModel):
     total_queries: int = 0
     elapsed_seconds: float = 0
     eta_seconds: Optional[float] = None
+    stale: bool = False  # running but its worker died or stopped making progress
 
 
 class BenchmarkRunResponse(BaseModel):
@@ -122,18 +221,103 @@ class IRMetrics(BaseModel):
     hit_rate_at_k: Dict[int, float]
 
 
+class HistogramBucket(BaseModel):
+    lower_ms: float
+    upper_ms: float
+    count: int
+
+
+class LatencyHistogram(BaseModel):
+    count: int = 0
+    min_ms: float = 0.0
+    max_ms: float = 0.0
+    buckets: List[HistogramBucket] = []  # non-empty log-spaced buckets
+
+
 class PerformanceMetrics(BaseModel):
     embedding_latency_avg_ms: float
     embedding_latency_p50_ms: float
     embedding_latency_p95_ms: float
     embedding_latency_p99_ms: float
-    query_latency_avg_ms: float
+    embedding_batch_latency_avg_ms: float = 0.0  # per provider request
+    embedding_batch_latency_p50_ms: float = 0.0
+    embedding_batch_latency_p95_ms: float = 0.0
+    embedding_batch_latency_p99_ms: float = 0.0
+    # Provider query latency over query-cache misses; None when every query hit the cache
+    query_latency_avg_ms: Optional[float] = None
+    query_latency_p50_ms: Optional[float] = None
+    query_latency_p95_ms: Optional[float] = None
+    query_latency_p99_ms: Optional[float] = None
+    query_cache_hits: int = 0
+    query_cache_misses: int = 0
     throughput_docs_per_sec: float
     total_embedding_time_sec: float
     embedding_dimension: int
     memory_usage_mb: float
     api_cost_usd: float
     cost_per_1k_queries_usd: float
+    batch_token_counts: List[int] = []
+    padding_waste_ratio: float = 0.0
+    model_load_time_ms: float = 0.0
+    cold_start_ms: float = 0.0  # load + first warm-up batch
+    warmup_batches: int = 0
+    # Measured memory (MB); peaks are relative to the RSS at stage start
+    model_load_rss_mb: float = 0.0
+    embed_peak_rss_delta_mb: float = 0.0
+    embed_alloc_peak_mb: float = 0.0  # only measured with BenchmarkRequest.trace_allocations
+    embeddings_matrix_mb: float = 0.0
+    index_size_mb: float = 0.0
+    index_build_peak_rss_delta_mb: float = 0.0
+    index_build_alloc_peak_mb: float = 0.0
+    documents_embedded: int = 0  # sent to the provider this run
+    documents_reused: int = 0    # unchanged since the cached dataset version
+    batch_size: int = 32  # documents per provider request
+    embedding_latency_histogram: Optional[LatencyHistogram] = None
+    embedding_batch_latency_histogram: Optional[LatencyHistogram] = None
+    query_latency_histogram: Optional[LatencyHistogram] = None
+
+
+class LoadTestLevelResult(BaseModel):
+    mode: LoadTestMode
+    level: float  # concurrency or target QPS, depending on mode
+    requests: int
+    achieved_qps: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    latency_p99_ms: float
+    error_rate: float
+
+
+class BatchSizeProbe(BaseModel):
+    batch_size: int
+    docs_per_sec: float
+
+
+class DistributedEmbedStats(BaseModel):
+    shards: int
+    documents: int
+    worker_sec: float  # summed shard round-trip time across workers
+    wall_sec: float    # this model's first shard start to last shard end
+    phase_wall_sec: float = 0.0  # whole distributed phase (all models share it)
+    workers: Dict[str, int]  # worker URL -> shards completed
+
+
+class ChunkingStats(BaseModel):
+    window_tokens: int
+    chunks: int
+    documents_chunked: int  # documents split into more than one chunk
+    avg_chunks_per_doc: float
+    extra_tokens: int       # tokens embedded beyond one truncated pass per document
+    extra_cost_usd: float
+    extra_embedding_time_sec: float  # share of this run's embedding time spent on extra tokens
+    search_latency_avg_ms: float     # chunk search plus aggregation, per query
+    aggregation: ChunkAggregation
+
+
+class StageTiming(BaseModel):
+    count: int
+    wall_ms: float
+    cpu_ms: float
 
 
 class ModelBenchmarkResult(BaseModel):
@@ -141,6 +325,14 @@ class ModelBenchmarkResult(BaseModel):
     ir_metrics: IRMetrics
     performance: PerformanceMetrics
     per_query_results: Optional[List[Dict[str, Any]]] = None
+    load_test: Optional[List[LoadTestLevelResult]] = None
+    stage_timings: Optional[Dict[str, StageTiming]] = None  # stage path -> totals
+    queries_evaluated: Optional[int] = None
+    early_stop_reason: Optional[str] = None  # "precision" | "separation" when stopped early
+    from_cache: bool = False  # served from the result memo instead of re-running
+    batch_size_curve: Optional[List[BatchSizeProbe]] = None  # throughput vs. batch size from tuning
+    distributed: Optional[DistributedEmbedStats] = None
+    chunking: Optional[ChunkingStats] = None
 
 
 class BenchmarkResults(BaseModel):
@@ -151,6 +343,66 @@ class BenchmarkResults(BaseModel):
     similarity_metric: str
 
 
+class SweepConfigResult(BaseModel):
+    model_id: str
+    similarity_metric: SimilarityMetric
+    normalize: bool
+    index_type: IndexType
+    ir_metrics: IRMetrics
+    index_build_ms: float
+    search_latency_avg_ms: float  # per query, batched search
+    index_size_mb: float
+
+
+class SweepResults(BaseModel):
+    run_id: str
+    dataset_id: str
+    top_k_values: List[int]
+    embedding_time_sec: Dict[str, float]  # model_id -> one-off doc + query embedding time
+    configs: List[SweepConfigResult]
+
+
+class ScalingPointResult(BaseModel):
+    model_id: str
+    corpus_size: int
+    distractors: int
+    index_type: IndexType
+    ir_metrics: Optional[IRMetrics] = None
+    degradation: Dict[str, float] = {}  # metric -> relative drop vs. the real corpus alone
+    index_build_ms: float = 0.0
+    search_latency_avg_ms: float = 0.0
+    search_latency_p50_ms: float = 0.0
+    search_latency_p95_ms: float = 0.0
+    search_latency_p99_ms: float = 0.0
+    index_memory_mb: float = 0.0  # estimated from index structure
+    build_rss_delta_mb: float = 0.0
+    skipped: Optional[str] = None
+
+
+class ScalingResults(BaseModel):
+    run_id: str
+    dataset_id: str
+    similarity_metric: str
+    top_k_values: List[int]
+    baseline: Dict[str, IRMetrics]  # model_id -> exact search over the real corpus
+    points: List[ScalingPointResult]
+
+
+class ModelAgreementResults(BaseModel):
+    run_id: str
+    dataset_id: str
+    model_ids: List[str]
+    k: int
+    num_documents: int  # docs embedded by every model
+    num_anchors: int  # docs whose neighbor lists were compared
+    num_queries: int  # queries retrieved by every model
+    # Square matrices indexed like model_ids; None where a model has no data
+    knn_overlap: List[List[Optional[float]]]
+    knn_rank_correlation: List[List[Optional[float]]]
+    retrieval_overlap: List[List[Optional[float]]]
+    retrieval_rank_correlation: List[List[Optional[float]]]
+
+
 # ── Explore schemas ─────────────────────────────────────────────────────────
 
 class LiveQueryRequest(BaseModel):
@@ -170,6 +422,7 @@ class LiveQueryModelResult(BaseModel):
     model_id: str
     hits: List[LiveQueryHit]
     latency_ms: float
+    error: Optional[str] = None
 
 
 class LiveQueryResponse(BaseModel):
@@ -187,6 +440,8 @@ class SimilarityResponse(BaseModel):
     text_a: str
     text_b: str
     scores: Dict[str, float]  # model_id -> cosine similarity
+    latency_ms: Dict[str, float] = {}
+    errors: Dict[str, str] = {}  # model_id -> error for slow/failing providers
 
 
 # ── Health ──────────────────────────────────────────────────────────────────
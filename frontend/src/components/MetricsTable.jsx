@@ -123,7 +123,7 @@ function PerformanceTable({ results }) {
               </td>
               <td className="text-right py-2 px-3 tabular-nums text-gray-700">{r.performance.embedding_latency_avg_ms.toFixed(1)}</td>
               <td className="text-right py-2 px-3 tabular-nums text-gray-700">{r.performance.embedding_latency_p95_ms.toFixed(1)}</td>
-              <td className="text-right py-2 px-3 tabular-nums text-gray-700">{r.performance.query_latency_avg_ms.toFixed(1)}</td>
+              <td className="text-right py-2 px-3 tabular-nums text-gray-700">{r.performance.query_latency_avg_ms != null ? r.performance.query_latency_avg_ms.toFixed(1) : '—'}</td>
               <td className="text-right py-2 px-3 tabular-nums text-gray-700">{r.performance.throughput_docs_per_sec.toFixed(1)}/s</td>
               <td className="text-right py-2 px-3 tabular-nums text-gray-700">{r.performance.embedding_dimension}</td>
               <td className="text-right py-2 px-3 tabular-nums text-gray-700">{r.performance.memory_usage_mb.toFixed(2)}</td>